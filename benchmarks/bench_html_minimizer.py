@@ -0,0 +1,81 @@
+"""
+Throughput benchmark: single-pass html_minimizer vs the BeautifulSoup
+clean_soup/build_minimal_html path, on a synthetic page.
+
+    python benchmarks/bench_html_minimizer.py --mb 0.5 --depth 200 --memory
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from utility_belt.web.html_minimizer import minimize_html
+from utility_belt.web.minimal_html import build_minimal_html, clean_soup
+
+BLOCKS = (
+    '<div class="card" data-id="{i}"><h2 class="t">Item {i}</h2>'
+    '<p style="x">Some <strong>text</strong> with <a href="/p/{i}" rel="nofollow">a link</a>'
+    " &amp; an entity.</p></div>\n",
+    "<ul class=list><li>one<li>two <em>three</em></ul>\n",
+    "<script>var x = {i}; if (x < 3) {{ go(); }}</script><!-- comment {i} -->\n",
+    '<form action="/s"><input name=q><button>Go</button></form>\n',
+    '<p><img src="/i/{i}.png" alt="pic {i}" loading="lazy"><br>caption</p>\n',
+)
+
+
+def make_page(n_bytes: int, depth: int = 0, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = ["<!DOCTYPE html><html><head><title>Bench</title></head><body>", "<div>" * depth]
+    size = 0
+    i = 0
+    while size < n_bytes:
+        s = rng.choice(BLOCKS).format(i=i)
+        parts.append(s)
+        size += len(s)
+        i += 1
+    parts.append("</div>" * depth + "</body></html>")
+    return "".join(parts)
+
+
+def soup_engine(html: str) -> str:
+    return build_minimal_html(clean_soup(BeautifulSoup(html, "html.parser")))
+
+
+def timed(fn, html):
+    start = time.perf_counter()
+    result = fn(html)
+    return result, time.perf_counter() - start
+
+
+def peak_memory(fn, html) -> int:
+    tracemalloc.start()
+    try:
+        fn(html)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--mb", type=float, default=0.5, help="Page size in MB")
+    ap.add_argument("--depth", type=int, default=0, help="Extra nesting of the content")
+    ap.add_argument("--memory", action="store_true", help="Also measure peak memory (slow)")
+    args = ap.parse_args()
+
+    html = make_page(int(args.mb * 1024 * 1024), args.depth)
+    mb = len(html.encode("utf-8")) / 1e6
+    texts = {}
+    for label, fn in (("soup", soup_engine), ("stream", minimize_html)):
+        out, elapsed = timed(fn, html)
+        texts[label] = "".join(BeautifulSoup(out, "html.parser").get_text().split())
+        line = f"{label:>6}: {mb / elapsed:7.2f} MB/s  {elapsed:7.2f} s"
+        if args.memory:
+            line += f"  peak {peak_memory(fn, html) / 1e6:8.1f} MB"
+        print(line)
+    assert texts["soup"] == texts["stream"], "retained text differs"
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+TTL benchmark for InMemoryDatabase: set_with_ttl on many keys with mixed
+TTLs, then active expiration with advance_to in time steps.
+
+    python benchmarks/bench_in_memory_ttl.py --keys 1000000
+"""
+import argparse
+import random
+import time
+
+from utility_belt.storage.in_memory_database import InMemoryDatabase
+
+# (ttl range, share of keys): short-lived sessions, medium caches, long-lived.
+TTL_MIX = (((1, 60), 0.5), ((60, 3600), 0.3), ((3600, 86400), 0.2))
+
+
+def make_ttls(n: int, seed: int = 0) -> list[int]:
+    rng = random.Random(seed)
+    ranges, weights = zip(*TTL_MIX)
+    return [rng.randint(*r) for r in rng.choices(ranges, weights, k=n)]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--keys", type=int, default=1_000_000, help="Keys to insert")
+    ap.add_argument("--renew", type=float, default=0.2, help="Share of keys whose TTL is renewed")
+    ap.add_argument("--step", type=int, default=60, help="advance_to step in seconds")
+    args = ap.parse_args()
+
+    ttls = make_ttls(args.keys)
+    db = InMemoryDatabase()
+
+    start = time.perf_counter()
+    for i, ttl in enumerate(ttls):
+        db.set_with_ttl(f"key{i}", "f", "v", i % 1000, ttl)
+    elapsed = time.perf_counter() - start
+    print(f"set_with_ttl: {args.keys / elapsed:10,.0f} ops/s")
+
+    renewed = int(args.keys * args.renew)
+    start = time.perf_counter()
+    for i in range(renewed):
+        db.expire(f"key{i}", 1000, ttls[i] * 2)
+    elapsed = time.perf_counter() - start
+    if renewed:
+        print(f"expire:       {renewed / elapsed:10,.0f} ops/s")
+    heap_entries = len(db._expiry_heap)
+
+    start = time.perf_counter()
+    evicted, now, steps = 0, 1000, 0
+    while db.expiry_times:
+        now += args.step
+        evicted += db.advance_to(now)
+        steps += 1
+    elapsed = time.perf_counter() - start
+    print(
+        f"advance_to:   {evicted / elapsed:10,.0f} evictions/s over {steps} steps"
+        f" | heap entries before {heap_entries:,} | left {len(db.data)} keys"
+    )
+
+
+if __name__ == "__main__":
+    main()
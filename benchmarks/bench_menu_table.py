@@ -0,0 +1,113 @@
+"""
+Benchmark: streaming dopamine-menu parser vs the notebook's readlines /
+uncompiled re.match / index-stepping loop, file to CSV.
+
+The notebook version builds a pandas DataFrame for to_csv; when pandas is
+not installed its rows are written with the csv module instead, which
+understates the old cost. Peak memory is measured with tracemalloc.
+
+    python benchmarks/bench_menu_table.py --mb 50
+"""
+import argparse
+import csv
+import re
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import synthetic
+
+from utility_belt.text.dopamine_menu import COLUMNS, convert_file
+
+
+def notebook_parse(file_path):
+    # parse_dopamine_menu from convert-txt-to-table.ipynb, returning the row dicts.
+    with open(file_path, "r", encoding="utf-8") as file:
+        lines = file.readlines()
+    data = []
+    category, subcategory = None, None
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        if line.startswith("## "):
+            category = line[3:].strip()
+            subcategory = None
+            i += 1
+            continue
+        elif line.startswith("### "):
+            subcategory = line[4:].strip()
+            i += 1
+            continue
+        elif re.match(r"^\d+\. \*\*.*\*\*$", line):
+            name_match = re.match(r"\d+\. \*\*(.*?)\*\*", line)
+            name = name_match.group(1).strip() if name_match else None
+            details = {}
+            i += 1
+            while i < len(lines):
+                next_line = lines[i].strip()
+                if next_line.startswith("- "):
+                    key_value_match = re.match(r"-\s*(.+?):\s*(.+)", next_line)
+                    if key_value_match:
+                        details[key_value_match.group(1).strip()] = key_value_match.group(2).strip()
+                elif re.match(r"^\d+\. \*\*.*\*\*$", next_line):
+                    i -= 1
+                    break
+                elif not next_line:
+                    break
+                i += 1
+            for key in COLUMNS[3:]:
+                if key not in details:
+                    details[key] = None
+            data.append({"Category": category, "Subcategory": subcategory, "Name": name,
+                         **details})
+        i += 1
+    return data
+
+
+def notebook_to_csv(src, dst):
+    data = notebook_parse(src)
+    try:
+        import pandas as pd
+    except ImportError:
+        with open(dst, "w", encoding="utf-8", newline="") as fh:
+            writer = csv.DictWriter(fh, COLUMNS, extrasaction="ignore", lineterminator="\n")
+            writer.writeheader()
+            writer.writerows(data)
+    else:
+        pd.DataFrame(data).to_csv(dst, index=False)
+
+
+def measure(fn, *args) -> tuple[float, int]:
+    start = time.perf_counter()
+    fn(*args)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    try:
+        fn(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--mb", type=float, default=20.0, help="Menu size in MB")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "menu.md"
+        src.write_text(synthetic.make_menu(int(args.mb * 1e6)), encoding="utf-8")
+        mb = src.stat().st_size / 1e6
+        t_old, m_old = measure(notebook_to_csv, src, Path(tmp) / "old.csv")
+        t_new, m_new = measure(convert_file, src, Path(tmp) / "new.csv")
+        same = (Path(tmp) / "old.csv").read_bytes() == (Path(tmp) / "new.csv").read_bytes()
+        assert same, "outputs differ"
+        print(f"notebook: {mb / t_old:8.1f} MB/s | peak {m_old / 1e6:8.1f} MB")
+        print(f"stream:   {mb / t_new:8.1f} MB/s | peak {m_new / 1e6:8.1f} MB"
+              f" | speedup x{t_old / t_new:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+DurableInMemoryDatabase: write throughput, write amplification and restart
+time (full log replay vs snapshot + log tail).
+
+    python benchmarks/bench_persistence.py --ops 500000 --keys 50000
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from utility_belt.storage.persistence import DurableInMemoryDatabase
+
+
+def make_ops(n: int, keys: int, value_bytes: int, seed: int = 0) -> list[tuple]:
+    rng = random.Random(seed)
+    pad = "x" * max(0, value_bytes - 8)
+    return [(f"user:{rng.randrange(keys)}", rng.choice(("name", "age", "plan")), f"{i:08d}{pad}", i)
+            for i in range(n)]
+
+
+def logical_bytes(ops) -> int:
+    return sum(len(k) + len(f) + len(v) + 8 for k, f, v, _ in ops)
+
+
+def timed_open(directory: Path, **options):
+    start = time.perf_counter()
+    db = DurableInMemoryDatabase(directory, **options)
+    elapsed = time.perf_counter() - start
+    return db, elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--ops", type=int, default=500_000, help="Writes to perform")
+    ap.add_argument("--keys", type=int, default=50_000, help="Distinct keys")
+    ap.add_argument("--value-bytes", type=int, default=32, help="Bytes per value")
+    ap.add_argument("--max-versions", type=int, default=4, help="History kept per field")
+    ap.add_argument("--tail", type=float, default=0.05, help="Share of writes after the snapshot")
+    args = ap.parse_args()
+
+    ops = make_ops(args.ops, args.keys, args.value_bytes)
+    logical = logical_bytes(ops)
+    options = {"max_versions": args.max_versions}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_only = Path(tmp) / "log_only"
+        with DurableInMemoryDatabase(log_only, compact_bytes=1 << 62, **options) as db:
+            start = time.perf_counter()
+            for key, field, value, ts in ops:
+                db.set(key, field, value, ts)
+            db.sync()
+            elapsed = time.perf_counter() - start
+            stats = db.stats
+        print(f"writes:    {args.ops / elapsed:10,.0f} ops/s, {stats['syncs']:,} fsyncs")
+        print(f"log only:  write amplification x{stats['log_bytes'] / logical:.2f}")
+
+        compacting = Path(tmp) / "compacting"
+        cut = int(len(ops) * (1 - args.tail))
+        with DurableInMemoryDatabase(compacting, compact_bytes=8 << 20, **options) as db:
+            for key, field, value, ts in ops[:cut]:
+                db.set(key, field, value, ts)
+            db.compact()
+            for key, field, value, ts in ops[cut:]:
+                db.set(key, field, value, ts)
+            stats = db.stats
+        written = stats["log_bytes"] + stats["snapshot_bytes"]
+        print(
+            f"compacted: write amplification x{written / logical:.2f}"
+            f" ({stats['compactions']} compactions)"
+        )
+
+        db, full = timed_open(log_only, **options)
+        replayed = db.replayed
+        db.close()
+        db, fast = timed_open(compacting, **options)
+        tail = db.replayed
+        db.close()
+        print(f"restart:   full log replay {full:6.2f} s ({replayed:,} records)")
+        print(f"           snapshot + tail {fast:6.2f} s ({tail:,} records)")
+
+
+if __name__ == "__main__":
+    main()
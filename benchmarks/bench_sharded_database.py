@@ -0,0 +1,69 @@
+"""
+Throughput of ShardedInMemoryDatabase for several shard counts, with worker
+threads running a mix of set / get / compare_and_set over a shared keyspace.
+
+    python benchmarks/bench_sharded_database.py --threads 8 --shards 1,4,16,64
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+
+from utility_belt.storage.sharded_database import ShardedInMemoryDatabase
+
+
+def make_ops(n: int, keys: int, seed: int) -> list[tuple]:
+    rng = random.Random(seed)
+    ops = []
+    for i in range(n):
+        key = f"key{rng.randrange(keys)}"
+        r = rng.random()
+        if r < 0.3:
+            ops.append(("set", key, "f", str(i), i))
+        elif r < 0.9:
+            ops.append(("get", key, "f", i))
+        else:
+            ops.append(("compare_and_set", key, "f", str(i - 1), str(i), i))
+    return ops
+
+
+def run(db, per_thread_ops) -> float:
+    barrier = threading.Barrier(len(per_thread_ops) + 1)
+
+    def worker(ops):
+        barrier.wait()
+        for name, *args in ops:
+            getattr(db, name)(*args)
+
+    threads = [threading.Thread(target=worker, args=(ops,)) for ops in per_thread_ops]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--threads", type=int, default=8, help="Worker threads")
+    ap.add_argument("--ops", type=int, default=200_000, help="Operations per thread")
+    ap.add_argument("--keys", type=int, default=10_000, help="Distinct keys")
+    ap.add_argument("--shards", default="1,4,16,64", help="Comma-separated shard counts")
+    args = ap.parse_args()
+
+    per_thread_ops = [make_ops(args.ops, args.keys, seed) for seed in range(args.threads)]
+    total = args.ops * args.threads
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"{args.threads} threads x {args.ops:,} ops, {args.keys:,} keys,"
+          f" GIL {'on' if gil else 'off'}")
+    for shards in (int(s) for s in args.shards.split(",")):
+        db = ShardedInMemoryDatabase(shards=shards)
+        elapsed = run(db, per_thread_ops)
+        print(f"shards {shards:>4}: {total / elapsed:12,.0f} ops/s")
+
+
+if __name__ == "__main__":
+    main()
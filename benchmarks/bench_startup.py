@@ -0,0 +1,78 @@
+"""
+Startup benchmark: wall time of `import utility_belt` and `ub-merge-files --help`
+in fresh interpreters, checked against a fixed budget.
+
+Each command runs --runs times and the best time counts (startup noise is
+one-sided); the bare interpreter is timed too so the overhead is visible.
+Exits with status 1 when a command is over budget or loads a heavy
+dependency (reportlab, bs4, requests) it does not need.
+
+    python benchmarks/bench_startup.py --runs 10 --budget-ms 250
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ("reportlab", "bs4", "requests")
+
+# Print the heavy modules a snippet left in sys.modules.
+_REPORT = (
+    "import sys; print('heavy:' + ','.join(m for m in {heavy!r} if m in sys.modules))"
+)
+
+COMMANDS = {
+    "python (baseline)": "pass",
+    "import utility_belt": "import utility_belt",
+    "ub-merge-files --help": (
+        "import sys; sys.argv = ['ub-merge-files', '--help']\n"
+        "from utility_belt.cli.merge_files_to_text import main\n"
+        "try:\n"
+        "    main()\n"
+        "except SystemExit:\n"
+        "    pass"
+    ),
+}
+
+
+def best_time(code: str, runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, stdout=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def heavy_imports(code: str) -> list[str]:
+    report = _REPORT.format(heavy=HEAVY_MODULES)
+    out = subprocess.run(
+        [sys.executable, "-c", f"{code}\n{report}"],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    loaded = out.splitlines()[-1].removeprefix("heavy:")
+    return [m for m in loaded.split(",") if m]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--runs", type=int, default=10, help="Runs per command (best counts)")
+    ap.add_argument("--budget-ms", type=float, default=250.0,
+                    help="Maximum wall time per command, in milliseconds")
+    args = ap.parse_args()
+
+    failed = False
+    for label, code in COMMANDS.items():
+        ms = best_time(code, args.runs) * 1000
+        heavy = heavy_imports(code)
+        over = ms > args.budget_ms
+        failed |= over or bool(heavy)
+        note = " OVER BUDGET" if over else ""
+        if heavy:
+            note += f" loads {', '.join(heavy)}"
+        print(f"{label:>24}: {ms:7.1f} ms (budget {args.budget_ms:.0f} ms){note}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Benchmark suite: throughput and peak memory of the main code paths on
+synthetic inputs (see synthetic.py), written as JSON so runs can be compared.
+
+Each case builds its input untimed, runs --repeat times (the best time
+counts) and then once more under tracemalloc for the peak of Python
+allocations; the two are separate because tracing slows the code down.
+--compare prints the throughput change against an earlier results file and
+exits with status 1 when a case is slower by more than --tolerance.
+
+    python benchmarks/bench_suite.py --output baseline.json
+    python benchmarks/bench_suite.py --only merge_serial,db_ops --compare baseline.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from pathlib import Path
+
+import synthetic
+
+from utility_belt.files.merge import merge_files_to_text
+from utility_belt.storage.in_memory_database import InMemoryDatabase
+from utility_belt.text.remove_emojis import remove_emojis_and_uncommon_symbols
+
+MB = 1e6
+
+
+def case_merge_serial(args, workdir: Path, stack: ExitStack):
+    return _merge_case(args, workdir, workers=1)
+
+
+def case_merge_parallel(args, workdir: Path, stack: ExitStack):
+    return _merge_case(args, workdir, workers=4)
+
+
+def _merge_case(args, workdir: Path, workers: int):
+    root = workdir / "tree"
+    if not root.exists():
+        info = synthetic.make_tree(
+            root, files=int(args.files * args.scale), median_bytes=args.median_bytes,
+            binary_ratio=args.binary_ratio, excluded_depth=args.excluded_depth,
+        )
+        (workdir / "tree.json").write_text(json.dumps(info))
+    info = json.loads((workdir / "tree.json").read_text())
+    out = workdir / f"merged-{workers}.txt"
+
+    def run():
+        merge_files_to_text(root, out, workers=workers)
+
+    return run, info["text_bytes"] / MB, "MB"
+
+
+def case_remove_emojis(args, workdir: Path, stack: ExitStack):
+    text = synthetic.make_emoji_corpus(int(args.text_mb * args.scale * MB))
+    remove_emojis_and_uncommon_symbols("✅")  # Build the removal table untimed.
+    return (lambda: remove_emojis_and_uncommon_symbols(text)), len(text.encode()) / MB, "MB"
+
+
+def _served_pages(args, stack: ExitStack) -> tuple[str, list[str]]:
+    pages = {
+        f"/page/{i}": synthetic.make_nested_page(int(args.page_kb * 1000), args.depth, seed=i)
+        for i in range(max(1, int(args.pages * args.scale)))
+    }
+    base = stack.enter_context(synthetic.serve_pages(pages))
+    return base, [base + path for path in pages]
+
+
+def case_clean_soup(args, workdir: Path, stack: ExitStack):
+    from bs4 import BeautifulSoup
+
+    from utility_belt.web.fetch import fetch_many
+    from utility_belt.web.minimal_html import clean_soup
+
+    _, urls = _served_pages(args, stack)
+    html = [r.text for r in fetch_many(urls, concurrency=8)]
+
+    def run():
+        for page in html:
+            clean_soup(BeautifulSoup(page, "html.parser"))
+
+    return run, sum(len(p.encode()) for p in html) / MB, "MB"
+
+
+def case_fetch_minimal_html(args, workdir: Path, stack: ExitStack):
+    from utility_belt.web.minimal_html import minimal_html_many
+
+    _, urls = _served_pages(args, stack)
+
+    def run():
+        for _, page, error in minimal_html_many(urls, engine="stream", concurrency=8):
+            if error:
+                raise RuntimeError(error)
+
+    return run, len(urls), "pages"
+
+
+def case_pdf_report(args, workdir: Path, stack: ExitStack):
+    from utility_belt.pdf.write_string_report_to_pdf import generate_pdf_from_report
+
+    report = synthetic.make_report(max(1, int(args.sections * args.scale)))
+    out = workdir / "report.pdf"
+    return (lambda: generate_pdf_from_report(report, out)), len(report.encode()) / MB, "MB"
+
+
+def case_menu_table(args, workdir: Path, stack: ExitStack):
+    from utility_belt.text.dopamine_menu import convert_file
+
+    src = workdir / "menu.md"
+    src.write_text(synthetic.make_menu(int(args.menu_mb * args.scale * MB)), encoding="utf-8")
+    return (lambda: convert_file(src, workdir / "menu.csv")), src.stat().st_size / MB, "MB"
+
+
+def case_db_ops(args, workdir: Path, stack: ExitStack):
+    trace = synthetic.make_db_trace(int(args.ops * args.scale), keys=args.keys)
+
+    def run():
+        deque(InMemoryDatabase().execute_batch(trace), maxlen=0)
+
+    return run, len(trace), "ops"
+
+
+def case_db_scan(args, workdir: Path, stack: ExitStack):
+    db = InMemoryDatabase()
+    keys = max(1, int(args.keys * args.scale))
+    for i in range(keys):
+        db.set(f"user{i:08d}", "name", str(i), 1)
+    prefixes = [f"user{i:05d}" for i in range(0, keys // 1000 + 1)]
+
+    def run() -> int:
+        seen = sum(len(db.scan_prefix(prefix, 2)) for prefix in prefixes)
+        page, cursor = db.scan_page(2, limit=500)
+        seen += len(page)
+        while cursor is not None:
+            page, cursor = db.scan_page(2, limit=500, cursor=cursor)
+            seen += len(page)
+        return seen
+
+    return run, run(), "keys"
+
+
+CASES = {
+    "merge_serial": case_merge_serial,
+    "merge_parallel": case_merge_parallel,
+    "remove_emojis": case_remove_emojis,
+    "clean_soup": case_clean_soup,
+    "fetch_minimal_html": case_fetch_minimal_html,
+    "pdf_report": case_pdf_report,
+    "menu_table": case_menu_table,
+    "db_ops": case_db_ops,
+    "db_scan": case_db_scan,
+}
+
+
+def measure(run, repeat: int, memory: bool) -> tuple[float, int | None]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return best, peak
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=Path(__file__).parent, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Print the throughput change per case; returns the cases that regressed.
+    """
+    regressed = []
+    for name, result in results.items():
+        old = baseline.get("results", {}).get(name)
+        if old is None:
+            continue
+        ratio = result["throughput"] / old["throughput"]
+        flag = ""
+        if ratio < 1 - tolerance:
+            flag = "  REGRESSION"
+            regressed.append(name)
+        print(f"{name:>20}: x{ratio:.2f} throughput vs baseline{flag}")
+    return regressed
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--only", help=f"Comma-separated cases (default all: {','.join(CASES)})")
+    ap.add_argument("--scale", type=float, default=1.0, help="Multiply every input size")
+    ap.add_argument("--repeat", type=int, default=3, help="Timed runs per case (best counts)")
+    ap.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run")
+    ap.add_argument("--output", "-o", type=Path, help="Write the results JSON here")
+    ap.add_argument("--compare", type=Path, help="Results JSON of an earlier run")
+    ap.add_argument("--tolerance", type=float, default=0.15,
+                    help="Allowed throughput drop vs --compare before failing")
+    tree = ap.add_argument_group("file tree")
+    tree.add_argument("--files", type=int, default=2000, help="Files in the tree")
+    tree.add_argument("--median-bytes", type=int, default=4096, help="Median file size")
+    tree.add_argument("--binary-ratio", type=float, default=0.05, help="Share of binary files")
+    tree.add_argument("--excluded-depth", type=int, default=3,
+                      help="Nesting of the excluded directories")
+    inputs = ap.add_argument_group("other inputs")
+    inputs.add_argument("--text-mb", type=float, default=4.0, help="Emoji corpus size")
+    inputs.add_argument("--pages", type=int, default=10, help="HTML pages served")
+    inputs.add_argument("--page-kb", type=float, default=100.0, help="Size of each page")
+    inputs.add_argument("--depth", type=int, default=100, help="HTML nesting depth")
+    inputs.add_argument("--sections", type=int, default=200, help="Report sections")
+    inputs.add_argument("--menu-mb", type=float, default=4.0, help="Dopamine menu size")
+    inputs.add_argument("--ops", type=int, default=200_000, help="Database ops in the trace")
+    inputs.add_argument("--keys", type=int, default=10_000, help="Distinct database keys")
+    args = ap.parse_args()
+
+    names = args.only.split(",") if args.only else list(CASES)
+    unknown = [n for n in names if n not in CASES]
+    if unknown:
+        ap.error(f"unknown cases: {', '.join(unknown)}")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, ExitStack() as stack:
+        for name in names:
+            run, amount, unit = CASES[name](args, Path(tmp), stack)
+            seconds, peak = measure(run, args.repeat, not args.no_memory)
+            results[name] = {
+                "seconds": seconds,
+                "amount": amount,
+                "unit": unit,
+                "throughput": amount / seconds,
+                "peak_bytes": peak,
+            }
+            memory = f" | peak {peak / MB:7.1f} MB" if peak is not None else ""
+            print(f"{name:>20}: {amount / seconds:12.1f} {unit}/s | {seconds:7.3f} s{memory}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Synthetic inputs for the benchmarks: file trees, emoji-dense text, deeply
+nested HTML (plus a local HTTP server to fetch it from), long markdown
+reports, dopamine menus and InMemoryDatabase command traces. Everything is seeded, so the
+same arguments always give the same input.
+
+Import it from a benchmark script run as ``python benchmarks/<script>.py``
+(the script's directory is on sys.path).
+"""
+import random
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+WORDS = (
+    "alpha bravo charlie delta echo foxtrot golf hotel india juliet kilo lima "
+    "mike november oscar papa quebec romeo sierra tango uniform victor whiskey"
+).split()
+
+TEXT_EXTS = (".py", ".md", ".txt", ".json", ".js", ".html")
+
+# Directories merge_files_to_text excludes by default, used for the pruned subtrees.
+EXCLUDED_DIRS = ("node_modules", ".git", "__pycache__", "build")
+
+EMOJI_SAMPLES = (
+    "\U0001F600", "\U0001F680", "✅", "✨", "❤️", "\U0001F44D\U0001F3FD",
+    "\U0001F468‍\U0001F469‍\U0001F467", "\U0001F1FA\U0001F1F8", "©", "→",
+)
+
+HTML_BLOCKS = (
+    '<div class="card" data-id="{i}"><h2 class="t">Item {i}</h2>'
+    '<p style="x">Some <strong>text</strong> with <a href="/p/{i}" rel="nofollow">a link</a>'
+    " &amp; an entity.</p></div>\n",
+    "<ul class=list><li>one<li>two <em>three</em></ul>\n",
+    "<script>var x = {i}; if (x < 3) {{ go(); }}</script><!-- comment {i} -->\n",
+    '<form action="/s"><input name=q><button>Go</button></form>\n',
+    '<p><img src="/i/{i}.png" alt="pic {i}" loading="lazy"><br>caption</p>\n',
+)
+
+
+def _text_line(rng: random.Random) -> str:
+    return " ".join(rng.choices(WORDS, k=rng.randint(4, 14))) + "\n"
+
+
+def make_tree(
+    root,
+    files: int = 2000,
+    median_bytes: int = 4096,
+    sigma: float = 1.2,
+    binary_ratio: float = 0.05,
+    excluded_depth: int = 3,
+    excluded_share: float = 0.2,
+    seed: int = 0,
+) -> dict:
+    """
+    Write a source-like tree under root and describe it.
+
+    File sizes are log-normal around median_bytes (sigma is the spread of
+    the underlying normal); binary_ratio of the files start with NUL bytes.
+    excluded_share of the files go into EXCLUDED_DIRS subtrees nested
+    excluded_depth directories deep, which the merge should prune unread.
+    Returns {"files", "text_files", "binary_files", "excluded_files",
+    "text_bytes"}, where text_bytes counts the files a default merge reads.
+    """
+    rng = random.Random(seed)
+    root = Path(root)
+    stats = dict(files=0, text_files=0, binary_files=0, excluded_files=0, text_bytes=0)
+    packages = [root / f"pkg{i}" / f"mod{j}" for i in range(8) for j in range(4)]
+    excluded = [
+        root / f"pkg{i}" / name / Path(*[f"d{k}" for k in range(excluded_depth)])
+        for i, name in enumerate(EXCLUDED_DIRS)
+    ]
+    for directory in packages + excluded:
+        directory.mkdir(parents=True, exist_ok=True)
+    for n in range(files):
+        size = max(1, int(rng.lognormvariate(0, sigma) * median_bytes))
+        is_excluded = rng.random() < excluded_share
+        is_binary = not is_excluded and rng.random() < binary_ratio
+        directory = rng.choice(excluded if is_excluded else packages)
+        path = directory / f"f{n:06d}{rng.choice(TEXT_EXTS)}"
+        if is_binary:
+            path.write_bytes(b"\x00\x01\x02\x03" + rng.randbytes(size))
+            stats["binary_files"] += 1
+        else:
+            lines, written = [], 0
+            while written < size:
+                line = _text_line(rng)
+                lines.append(line)
+                written += len(line)
+            data = "".join(lines).encode("utf-8")
+            path.write_bytes(data)
+            if is_excluded:
+                stats["excluded_files"] += 1
+            else:
+                stats["text_files"] += 1
+                stats["text_bytes"] += len(data)
+        stats["files"] += 1
+    return stats
+
+
+def make_emoji_corpus(n_bytes: int, emoji_ratio: float = 0.3, seed: int = 0) -> str:
+    """
+    Prose where about emoji_ratio of the tokens are emoji (incl. ZWJ
+    sequences, flags and skin tones) or symbols the cleaner removes.
+    """
+    rng = random.Random(seed)
+    parts, size = [], 0
+    while size < n_bytes:
+        token = rng.choice(EMOJI_SAMPLES) if rng.random() < emoji_ratio else rng.choice(WORDS)
+        token += "\n" if rng.random() < 0.05 else " "
+        parts.append(token)
+        size += len(token.encode("utf-8"))
+    return "".join(parts)
+
+
+def make_nested_page(n_bytes: int, depth: int = 100, seed: int = 0) -> str:
+    """
+    HTML page of about n_bytes whose content blocks sit at random nesting
+    depths up to depth (divs, sections and spans), with scripts, forms and
+    comments for the cleaners to drop.
+    """
+    rng = random.Random(seed)
+    parts = ["<!DOCTYPE html><html><head><title>Bench</title></head><body>"]
+    open_tags = []
+    size = i = 0
+    while size < n_bytes:
+        target = rng.randint(0, depth)
+        while len(open_tags) > target:
+            parts.append(f"</{open_tags.pop()}>")
+        while len(open_tags) < target:
+            tag = rng.choice(("div", "section", "span"))
+            parts.append(f'<{tag} class="n{len(open_tags)}">')
+            open_tags.append(tag)
+        block = rng.choice(HTML_BLOCKS).format(i=i)
+        parts.append(block)
+        size += len(block) + 8 * target
+        i += 1
+    parts.extend(f"</{tag}>" for tag in reversed(open_tags))
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+@contextmanager
+def serve_pages(pages: dict[str, str]):
+    """
+    Serve {path: html} from a local threading HTTP server and yield its base
+    URL; unknown paths get a 404.
+    """
+    bodies = {path: html.encode("utf-8") for path, html in pages.items()}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            body = bodies.get(self.path)
+            self.send_response(200 if body is not None else 404)
+            body = body if body is not None else b"not found"
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def make_report(sections: int = 200, seed: int = 0) -> str:
+    """
+    Markdown-like report in generate_pdf_from_report's format: numbered
+    sections with sub-headings, paragraphs and ordered lists.
+    """
+    rng = random.Random(seed)
+    lines = []
+    for s in range(1, sections + 1):
+        lines += [f"## {s}: Section {s}", ""]
+        for sub in range(rng.randint(1, 3)):
+            lines += [f"### Part {s}.{sub}", ""]
+            lines += [_text_line(rng).strip() for _ in range(rng.randint(2, 6))]
+            lines.append("")
+            lines += [f"{k}. {_text_line(rng).strip()}" for k in range(1, rng.randint(2, 7))]
+            lines.append("")
+    return "\n".join(lines)
+
+
+def make_db_trace(ops: int = 200_000, keys: int = 10_000, ttl_share: float = 0.05,
+                  seed: int = 0) -> list[tuple]:
+    """
+    InMemoryDatabase.execute_batch commands with rising timestamps: mostly
+    SET / GET, some LOOK_BACK, COMPARE_AND_SET and (ttl_share) SET_WITH_TTL.
+    """
+    rng = random.Random(seed)
+    trace = []
+    for ts in range(1, ops + 1):
+        key = f"user{rng.randrange(keys)}"
+        field = rng.choice(("name", "age", "city"))
+        r = rng.random()
+        if r < ttl_share:
+            trace.append(("SET_WITH_TTL", ts, key, field, str(ts), rng.randint(10, 10_000)))
+        elif r < 0.4:
+            trace.append(("SET", ts, key, field, str(ts)))
+        elif r < 0.8:
+            trace.append(("GET", ts, key, field))
+        elif r < 0.9:
+            # LOOK_BACK's timestamp is the past moment to read at.
+            trace.append(("LOOK_BACK", max(1, ts - rng.randint(1, 1000)), key, field))
+        else:
+            trace.append(("COMPARE_AND_SET", ts, key, field, str(ts - 1), str(ts)))
+    return trace
+
+
+MENU_DETAILS = {
+    "Energy": ("🔋", "🔋🔋", "🔋🔋🔋"),
+    "Executive Function": ("🧠", "🧠🧠", "🧠🧠🧠🧠"),
+    "Spoons": ("🥄", "🥄🥄🥄"),
+    "Cost": ("💰", "💰💰", "💰💰💰💰"),
+    "Time": ("⏱️", "⏱️⏱️", "⏱️⏱️⏱️⏱️⏱️"),
+    "Boost": ("🎯", "🎯🎯🎯"),
+    "Tags": ("🏠 ⚡", "🌅 🤝 🔄", "🎨"),
+}
+
+
+def make_menu(n_bytes: int, seed: int = 0) -> str:
+    """
+    Dopamine-menu markdown of about n_bytes: ## categories, ### subcategories
+    and numbered **name** items, each with a random subset of the detail keys
+    (plus free-text Notes), blank-line separated.
+    """
+    rng = random.Random(seed)
+    parts, size, item = ["# Dopamine Menu\n\n"], 0, 0
+    while size < n_bytes:
+        block = [f"## {' '.join(rng.choices(WORDS, k=2)).title()}\n\n"]
+        for _ in range(rng.randint(1, 4)):
+            block.append(f"### {rng.choice(WORDS).title()}\n\n")
+            for n in range(1, rng.randint(3, 12)):
+                item += 1
+                block.append(f"{n}. **{' '.join(rng.choices(WORDS, k=3))} {item}**\n")
+                for key, values in MENU_DETAILS.items():
+                    if rng.random() < 0.8:
+                        block.append(f"- {key}: {rng.choice(values)}\n")
+                if rng.random() < 0.5:
+                    block.append(f"- Notes: {_text_line(rng)}")
+                block.append("\n")
+        text = "".join(block)
+        parts.append(text)
+        size += len(text.encode("utf-8"))
+    return "".join(parts)
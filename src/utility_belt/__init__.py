@@ -1,4 +1,59 @@
 """
 utility_belt: small, focused helpers for web, text, pdf, storage, and file ops.
+
+Subpackages and the main public functions are attributes of the package,
+imported on first access (module __getattr__), so ``import utility_belt``
+stays cheap and reportlab / bs4 / requests load only for the pdf and web
+helpers that need them:
+
+    import utility_belt
+    utility_belt.merge_files_to_text(".", "merged.txt")
 """
-__all__ = ["web", "text", "pdf", "storage", "files"]
+import importlib
+
+_SUBPACKAGES = ("web", "text", "pdf", "storage", "files", "cli")
+
+# Public name -> module (under utility_belt) that defines it.
+_EXPORTS = {
+    "merge_files_to_text": "files.merge",
+    "iter_files": "files.discovery",
+    "MergedArchive": "files.archive",
+    "create_files": "files.create_files",
+    "slugify": "files.bulk_rename",
+    "slugify_all": "files.bulk_rename",
+    "plan_directory": "files.bulk_rename",
+    "remove_emojis_and_uncommon_symbols": "text.remove_emojis",
+    "clean_file": "text.remove_emojis",
+    "clean_stream": "text.remove_emojis",
+    "parse_dopamine_menu": "text.dopamine_menu",
+    "generate_pdf_from_report": "pdf.write_string_report_to_pdf",
+    "generate_pdf_streaming": "pdf.write_string_report_to_pdf",
+    "generate_pdfs": "pdf.write_string_report_to_pdf",
+    "fetch_many": "web.fetch",
+    "HTTPCache": "web.http_cache",
+    "minimize_html": "web.html_minimizer",
+    "fetch_minimal_html": "web.minimal_html",
+    "minimal_html_many": "web.minimal_html",
+    "InMemoryDatabase": "storage.in_memory_database",
+    "ShardedInMemoryDatabase": "storage.sharded_database",
+    "DurableInMemoryDatabase": "storage.persistence",
+    "read_command_file": "storage.commands",
+}
+
+__all__ = [*_SUBPACKAGES, *_EXPORTS]
+
+
+def __getattr__(name):
+    if name in _SUBPACKAGES:
+        value = importlib.import_module(f"{__name__}.{name}")
+    elif name in _EXPORTS:
+        module = importlib.import_module(f"{__name__}.{_EXPORTS[name]}")
+        value = getattr(module, name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value  # Later lookups skip __getattr__.
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
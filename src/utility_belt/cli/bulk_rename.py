@@ -0,0 +1,127 @@
+import argparse
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from utility_belt.files.bulk_rename import (
+    DEFAULT_EXCLUDES,
+    apply_plan,
+    make_directories,
+    merge_plans,
+    plan_directory,
+    undo_journal,
+)
+
+SHOW_CONFLICTS = 20
+
+
+def default_journal() -> Path:
+    return Path(f"bulk-rename-{datetime.now():%Y%m%d-%H%M%S}.journal.jsonl")
+
+
+def target_directories(inputs, subdirs: bool) -> list[Path]:
+    if not subdirs:
+        return [Path(d) for d in inputs]
+    found = []
+    for parent in inputs:
+        with os.scandir(parent) as it:
+            found += [Path(e.path) for e in it if e.is_dir(follow_symlinks=False)]
+    return sorted(found)
+
+
+def _print_errors(errors):
+    if errors:
+        print("Errors (first few):")
+        for src, dst, error in errors:
+            print(" -", src, "->", dst, ":", error)
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="Rename directory entries to URL-safe slugs (or a template) in one batch"
+    )
+    ap.add_argument("dirs", nargs="*", type=Path, help="Directories whose entries are renamed")
+    ap.add_argument("--template", "-t",
+                    help="New-name template: {name} {stem} {ext} {n} {parent} "
+                         "(e.g. 'product-{parent}-{n}{ext}'; default: slug of the name)")
+    ap.add_argument("--subdirs", action="store_true",
+                    help="Rename inside each subdirectory of the given directories instead")
+    kind = ap.add_mutually_exclusive_group()
+    kind.add_argument("--files-only", action="store_true", help="Leave directories alone")
+    kind.add_argument("--dirs-only", action="store_true", help="Leave files alone")
+    ap.add_argument("--exclude", default=",".join(DEFAULT_EXCLUDES),
+                    help="Comma-separated name globs never renamed")
+    ap.add_argument("--dry-run", "-n", action="store_true", help="Print the plan, change nothing")
+    ap.add_argument("--workers", "-j", type=int, default=1,
+                    help="Threads applying renames (helps on network filesystems)")
+    ap.add_argument("--journal", type=Path,
+                    help="Undo journal path (default bulk-rename-<time>.journal.jsonl)")
+    ap.add_argument("--no-journal", action="store_true", help="Do not write an undo journal")
+    ap.add_argument("--undo", type=Path, metavar="JOURNAL", help="Reverse a previous run")
+    ap.add_argument("--mkdir-from", type=Path, metavar="NAMES",
+                    help="Create a slug-named directory in DIR per line of this file")
+
+    args = ap.parse_args()
+    journal = None if args.no_journal else (args.journal or default_journal())
+
+    if args.undo:
+        summary = undo_journal(args.undo, args.workers)
+        print("Undone:", summary["renamed"], "renames,",
+              summary["removed_dirs"], "directories removed")
+        _print_errors(summary["errors"])
+        if summary["failed"]:
+            sys.exit(1)
+        return
+
+    if not args.dirs:
+        ap.error("give at least one directory (or --undo JOURNAL)")
+
+    if args.mkdir_from:
+        if len(args.dirs) != 1:
+            ap.error("--mkdir-from takes exactly one directory")
+        names = [
+            line.strip()
+            for line in args.mkdir_from.read_text(encoding="utf-8").splitlines()
+            if line.strip()
+        ]
+        summary = make_directories(args.dirs[0], names, journal, args.dry_run)
+        verb = "Would create:" if args.dry_run else "Created:"
+        if args.dry_run:
+            for path in summary["created"]:
+                print(" +", path)
+        print(verb, len(summary["created"]), "directories;", summary["existing"], "already there")
+        if summary["duplicates"]:
+            print("Duplicate slugs skipped:", ", ".join(summary["duplicates"][:SHOW_CONFLICTS]))
+        if journal and not args.dry_run:
+            print("Journal:", journal)
+        return
+
+    exclude = [p.strip() for p in args.exclude.split(",") if p.strip()]
+    plan = merge_plans(
+        plan_directory(d, args.template, not args.dirs_only, not args.files_only, exclude)
+        for d in target_directories(args.dirs, args.subdirs)
+    )
+    if args.dry_run:
+        for src, dst in plan.renames:
+            print(src, "->", dst)
+    summary = apply_plan(plan, journal, args.workers, args.dry_run)
+
+    if args.dry_run:
+        print("Would rename:", summary["planned"], "| unchanged:", summary["unchanged"])
+    else:
+        print("Renamed:", summary["renamed"], "of", summary["planned"],
+              "| unchanged:", summary["unchanged"])
+        if summary["journal"]:
+            print("Journal:", summary["journal"], "(undo with --undo)")
+    if plan.conflicts:
+        print("Conflicts (left as they are):", len(plan.conflicts))
+        for src, dst, reason in plan.conflicts[:SHOW_CONFLICTS]:
+            print(" -", src, "->", dst, ":", reason)
+    _print_errors(summary["errors"])
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import io
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+
+from utility_belt.files.discovery import iter_files
+from utility_belt.text.remove_emojis import CHUNK_CHARS, clean_file, clean_stream
+
+DEFAULT_EXTS = {".txt", ".md"}
+
+
+def parse_exts(value: str):
+    if not value:
+        return DEFAULT_EXTS
+    parts = [p.strip().lower() for p in value.split(",")]
+    return {p if p.startswith(".") else "." + p for p in parts if p}
+
+
+def _with_suffix(path: Path, suffix: str) -> Path:
+    return path.with_name(f"{path.stem}{suffix}{path.suffix}")
+
+
+def plan_jobs(inputs, exts, output_dir: Path | None, suffix: str, in_place: bool):
+    """
+    (source, destination) pairs for every input file and every file with a
+    matching extension under each input directory. Destinations are the
+    source itself (in_place), output_dir/<name or path relative to the input
+    directory>, or a sibling named <stem><suffix><ext>.
+    """
+    jobs = []
+    for item in inputs:
+        item = Path(item)
+        if item.is_dir():
+            sources = [
+                (e.path, e.path.relative_to(item))
+                for e in iter_files(item, exts)
+                if in_place or output_dir or not e.path.stem.endswith(suffix)
+            ]
+        else:
+            sources = [(item, Path(item.name))]
+        for src, rel in sources:
+            if in_place:
+                dst = src
+            elif output_dir is not None:
+                dst = output_dir / rel
+            else:
+                dst = _with_suffix(src, suffix)
+            jobs.append((src, dst))
+    return jobs
+
+
+def _clean_job(job):
+    src, dst, chunk_chars = job
+    try:
+        read, written = clean_file(src, dst, chunk_chars)
+        return str(src), read, written, None
+    except Exception as e:
+        return str(src), 0, 0, str(e)
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="Remove emojis and uncommon symbols from text files, directories or stdin"
+    )
+    ap.add_argument("inputs", nargs="*",
+                    help="Files or folders to clean (default / '-': stdin to stdout)")
+    ap.add_argument("--output-dir", "-o", type=Path, help="Write cleaned files under this folder")
+    ap.add_argument("--suffix", default="_clean",
+                    help="Suffix for cleaned files written next to the input")
+    ap.add_argument("--in-place", action="store_true", help="Replace each input file (atomically)")
+    ap.add_argument("--exts",
+                    help="Comma-separated extensions to pick up in folders (default '.txt,.md')")
+    ap.add_argument("--workers", "-j", type=int, default=os.cpu_count() or 1,
+                    help="Worker processes")
+    ap.add_argument("--chunk-chars", type=int, default=CHUNK_CHARS,
+                    help="Characters per streamed chunk")
+
+    args = ap.parse_args()
+
+    if not args.inputs or args.inputs == ["-"]:
+        src = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+        dst = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", newline="")
+        clean_stream(src, dst, args.chunk_chars)
+        dst.detach()  # Flushes, and leaves sys.stdout open.
+        src.detach()
+        return
+
+    jobs = [
+        (src, dst, args.chunk_chars)
+        for src, dst in plan_jobs(
+            args.inputs, parse_exts(args.exts), args.output_dir, args.suffix, args.in_place
+        )
+    ]
+    cleaned = removed = 0
+    failures = []
+    with ExitStack() as stack:
+        if args.workers > 1 and len(jobs) > 1:
+            pool = stack.enter_context(ProcessPoolExecutor(max_workers=args.workers))
+            results = pool.map(_clean_job, jobs, chunksize=max(1, len(jobs) // (args.workers * 8)))
+        else:
+            results = map(_clean_job, jobs)
+        for path, read, written, error in results:
+            if error is not None:
+                failures.append((path, error))
+                continue
+            cleaned += 1
+            removed += read - written
+
+    print("Cleaned:", cleaned, "files,", removed, "characters removed")
+    if failures:
+        print("Failed:", len(failures))
+        for p, e in failures[:10]:
+            print(" -", p, "->", e)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+
+from utility_belt.files.discovery import iter_files
+from utility_belt.text.dopamine_menu import (
+    COLUMNS,
+    FORMATS,
+    convert_file,
+    format_for,
+    parse_menu,
+    write_csv,
+    write_rows,
+)
+
+DEFAULT_EXTS = {".txt", ".md"}
+
+
+def menu_files(inputs) -> list[tuple[Path, Path]]:
+    """
+    (file, path relative to its input) for every input file and every .txt /
+    .md file under each input directory, in order.
+    """
+    found = []
+    for item in map(Path, inputs):
+        if item.is_dir():
+            found += [(e.path, e.path.relative_to(item)) for e in iter_files(item, DEFAULT_EXTS)]
+        else:
+            found.append((item, Path(item.name)))
+    return found
+
+
+def _convert_job(job):
+    src, dst, fmt, columns, header = job
+    try:
+        return str(src), convert_file(src, dst, fmt, columns, header), None
+    except Exception as e:
+        return str(src), 0, str(e)
+
+
+def _run(jobs, workers: int):
+    with ExitStack() as stack:
+        if workers > 1 and len(jobs) > 1:
+            pool = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+            yield from pool.map(_convert_job, jobs, chunksize=max(1, len(jobs) // (workers * 8)))
+        else:
+            yield from map(_convert_job, jobs)
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="Turn dopamine-menu markdown (## / ### / 1. **name** / - key: value) "
+                    "into a CSV or JSON lines table"
+    )
+    ap.add_argument("inputs", nargs="*",
+                    help="Menu files or folders of .txt/.md files (default / '-': stdin)")
+    ap.add_argument("--output", "-o", default="-",
+                    help="One table for all inputs, in input order (default '-': stdout)")
+    ap.add_argument("--output-dir", type=Path,
+                    help="Write one table per input file under this folder instead")
+    ap.add_argument("--format", "-f", choices=FORMATS,
+                    help="Table format (default: from the --output extension, else csv)")
+    ap.add_argument("--extra-keys", default="",
+                    help="Comma-separated detail keys to add as CSV columns")
+    ap.add_argument("--workers", "-j", type=int, default=os.cpu_count() or 1,
+                    help="Worker processes for several input files")
+
+    args = ap.parse_args()
+    fmt = args.format
+    if fmt is None and args.output != "-" and not args.output_dir:
+        try:
+            fmt = format_for(args.output)
+        except ValueError as e:
+            ap.error(str(e))
+    fmt = fmt or "csv"
+    extra = [k.strip() for k in args.extra_keys.split(",") if k.strip()]
+    columns = (*COLUMNS, *(k for k in extra if k not in COLUMNS))
+
+    if not args.inputs or args.inputs == ["-"]:
+        src = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8")
+        dst = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", newline="")
+        write_rows(parse_menu(src), dst, fmt, columns)
+        dst.detach()  # Flushes, and leaves sys.stdout open.
+        src.detach()
+        return
+
+    files = menu_files(args.inputs)
+    failures = []
+    rows = 0
+    with ExitStack() as stack:
+        if args.output_dir:
+            jobs = [(src, args.output_dir / rel.with_suffix(f".{fmt}"), fmt, columns, True)
+                    for src, rel in files]
+            for path, n, error in _run(jobs, args.workers):
+                rows += n
+                if error is not None:
+                    failures.append((path, error))
+        else:
+            if args.output == "-":
+                out = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", newline="")
+                stack.callback(out.detach)
+            else:
+                Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+                out = stack.enter_context(open(args.output, "w", encoding="utf-8", newline=""))
+            if fmt == "csv":
+                write_csv((), out, columns)
+            # Workers parse into headerless part files; they are joined in input order.
+            parts = Path(stack.enter_context(tempfile.TemporaryDirectory()))
+            jobs = [(src, parts / f"{i}.{fmt}", fmt, columns, False)
+                    for i, (src, _) in enumerate(files)]
+            for (_, part, *_), (path, n, error) in zip(jobs, _run(jobs, args.workers)):
+                if error is not None:
+                    failures.append((path, error))
+                    continue
+                rows += n
+                with open(part, "r", encoding="utf-8", newline="") as fh:
+                    shutil.copyfileobj(fh, out)
+                os.unlink(part)
+            out.flush()
+
+    print("Rows:", rows, "from", len(files) - len(failures), "files", file=sys.stderr)
+    if failures:
+        print("Failed:", len(failures), file=sys.stderr)
+        for p, e in failures[:10]:
+            print(" -", p, "->", e, file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
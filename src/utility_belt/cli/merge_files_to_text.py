@@ -1,6 +1,10 @@
 import argparse
+from contextlib import nullcontext
 from pathlib import Path
-from utility_belt.files.merge import merge_files_to_text, DEFAULT_EXTS, DEFAULT_EXCLUDES
+
+from utility_belt import metrics
+from utility_belt.files.merge import DEFAULT_EXCLUDES, DEFAULT_EXTS, merge_files_to_text
+
 
 def parse_exts(value: str):
     if not value:
@@ -18,27 +22,66 @@ def main():
     ap.add_argument("--input-dir", "-i", type=Path, required=True, help="Folder to scan")
     ap.add_argument("--output", "-o", type=Path, required=True, help="Output .txt path")
     ap.add_argument("--exts", help="Comma-separated extensions (e.g., '.py,.md,.txt')")
-    ap.add_argument("--exclude", help="Comma-separated substrings to exclude (e.g., 'node_modules,.git')")
+    ap.add_argument("--exclude",
+                    help="Comma-separated names or gitignore-style globs to exclude "
+                         "(e.g., 'node_modules,*.log,docs/build/')")
     ap.add_argument("--max-bytes", type=int, default=2*1024*1024, help="Max bytes per file")
     ap.add_argument("--no-headers", action="store_true", help="Do not include per-file headers")
     ap.add_argument("--no-eof", action="store_true", help="Do not include end-of-file markers")
     ap.add_argument("--absolute", action="store_true", help="Use absolute paths in headers")
+    ap.add_argument("--jobs", "-j", type=int, default=1, help="Threads used to read files")
+    ap.add_argument("--window", type=int,
+                    help="Max files read ahead of the writer (default 4 per job)")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Reuse unchanged files from the previous output via a sidecar manifest")
+    ap.add_argument("--dedup", action="store_true",
+                    help="Write repeated file contents as back-references to the first copy")
+    ap.add_argument("--shard-bytes", type=int,
+                    help="Split output into shards of about this many bytes")
+    ap.add_argument("--shard-tokens", type=int,
+                    help="Split output into shards of about this many tokens")
+    ap.add_argument("--profile", type=Path, metavar="JSON",
+                    help="Write per-phase timings, counters and throughput to this JSON file")
+    ap.add_argument("--cprofile", type=Path, metavar="PSTATS",
+                    help="Also capture a cProfile of the run into this file (needs --profile)")
 
     args = ap.parse_args()
+    if args.cprofile and not args.profile:
+        ap.error("--cprofile needs --profile")
+    if args.incremental and (args.shard_bytes is not None or args.shard_tokens is not None):
+        ap.error("--incremental cannot be combined with --shard-bytes / --shard-tokens")
     include_exts = parse_exts(args.exts)
     exclude = parse_excludes(args.exclude)
 
-    summary = merge_files_to_text(
-        input_dir=args.input_dir,
-        output_txt=args.output,
-        include_exts=include_exts,
-        exclude_substrings=exclude,
-        max_file_bytes=args.max_bytes,
-        include_headers=not args.no_headers,
-        include_eof_markers=not args.no_eof,
-        use_relative_paths=not args.absolute,
-    )
-    print("Merged:", summary["written"], "files into", summary["output"])
+    profile = metrics.profiled(args.profile, args.cprofile) if args.profile else nullcontext()
+    with profile:
+        summary = merge_files_to_text(
+            input_dir=args.input_dir,
+            output_txt=args.output,
+            include_exts=include_exts,
+            exclude_substrings=exclude,
+            max_file_bytes=args.max_bytes,
+            include_headers=not args.no_headers,
+            include_eof_markers=not args.no_eof,
+            use_relative_paths=not args.absolute,
+            workers=args.jobs,
+            window=args.window,
+            incremental=args.incremental,
+            shard_bytes=args.shard_bytes,
+            shard_tokens=args.shard_tokens,
+            dedup=args.dedup,
+        )
+    if "shards" in summary:
+        print("Merged:", summary["written"], "files into", len(summary["shards"]), "shards")
+        print("Index:", summary["index"])
+    else:
+        print("Merged:", summary["written"], "files into", summary["output"])
+    if args.incremental:
+        print("Manifest:", summary["manifest_hits"], "hits,", summary["manifest_misses"], "misses")
+    if args.dedup:
+        print("Duplicates:", summary["duplicates"], "saving", summary["dedup_bytes_saved"], "bytes")
+    if args.profile:
+        print("Profile:", args.profile)
     if summary["skipped"]:
         print("Skipped:", summary["skipped"])
     if summary["errors"]:
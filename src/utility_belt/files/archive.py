@@ -0,0 +1,178 @@
+"""
+Sharded merge output and a random-access reader for it.
+
+merge_files_to_text(..., shard_bytes=N) (or shard_tokens=N) splits the merge
+into ``<stem>.00000<suffix>``, ``<stem>.00001<suffix>``, ... and writes
+``<stem>.index.json`` mapping each source path (relative, "/"-separated) to
+``[shard, offset, length]`` of its content. MergedArchive uses that index and
+mmap to return any file's content without scanning the shards.
+"""
+import json
+import mmap
+import os
+from pathlib import Path, PurePath
+
+INDEX_VERSION = 1
+
+# Rough bytes-per-token ratio used to turn a token budget into a byte budget.
+BYTES_PER_TOKEN = 4
+
+
+def index_path_for(output_txt: Path) -> Path:
+    return output_txt.with_name(f"{output_txt.stem}.index.json")
+
+
+def shard_path_for(output_txt: Path, shard: int) -> Path:
+    return output_txt.with_name(f"{output_txt.stem}.{shard:05d}{output_txt.suffix}")
+
+
+class ShardWriter:
+    """
+    Writes merge segments across shard files of at most ~budget bytes each
+    and records where each file's content lands.
+
+    preamble(shard) returns the bytes that open each shard. A shard is only
+    closed once it holds at least one file, so a file larger than the budget
+    gets a shard to itself.
+
+    The index of an earlier run is removed up front and the new one is only
+    written on a clean exit, so a merge that fails partway never leaves an
+    index pointing at half-written shards. Shards an earlier, larger run
+    left past the last new one are deleted then too.
+    """
+
+    def __init__(self, output_txt: Path, budget: int, preamble):
+        if budget <= 0:
+            raise ValueError("shard budget must be positive")
+        self.output_txt = output_txt
+        self.budget = budget
+        self.preamble = preamble
+        self.paths: list[Path] = []
+        self.files: dict[str, list[int]] = {}
+        self.file = None
+        self._count = 0
+        index_path_for(output_txt).unlink(missing_ok=True)
+        self._open_next()
+
+    def _open_next(self):
+        if self.file is not None:
+            self.file.close()
+        path = shard_path_for(self.output_txt, len(self.paths))
+        self.paths.append(path)
+        self.file = open(path, "wb")
+        self.file.write(self.preamble(len(self.paths) - 1))
+        self._count = 0
+
+    def fit(self, estimate: int):
+        """
+        Return the shard file the next segment (~estimate bytes) goes to.
+        """
+        if self._count and self.file.tell() + estimate > self.budget:
+            self._open_next()
+        return self.file
+
+    def add(self, rel_path: str, offset: int, length: int) -> None:
+        self.files[rel_path] = [len(self.paths) - 1, offset, length]
+        self._count += 1
+
+    def alias(self, rel_path: str, other: str) -> None:
+        """
+        Point rel_path at the content already recorded for other.
+        """
+        self.files[rel_path] = self.files[other]
+        self._count += 1
+
+    def close(self, ok: bool = True) -> None:
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        if not ok:
+            return
+        stale = len(self.paths)
+        while shard_path_for(self.output_txt, stale).exists():
+            shard_path_for(self.output_txt, stale).unlink()
+            stale += 1
+        index = {
+            "version": INDEX_VERSION,
+            "shards": [p.name for p in self.paths],
+            "files": self.files,
+        }
+        index_path = index_path_for(self.output_txt)
+        tmp = index_path.with_name(index_path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(index, fh, separators=(",", ":"))
+        os.replace(tmp, index_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(ok=exc_type is None)
+
+
+class MergedArchive:
+    """
+    Random access to a sharded merge via its index:
+
+        with MergedArchive("merged.index.json") as archive:
+            text = archive.read_text("src/app.py")
+
+    Shards are memory-mapped on first use; lookups are a dict hit plus a slice.
+    """
+
+    def __init__(self, index_path):
+        self.index_path = Path(index_path)
+        with open(self.index_path, "r", encoding="utf-8") as fh:
+            index = json.load(fh)
+        if index.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version: {index.get('version')!r}")
+        self.shards = [self.index_path.with_name(name) for name in index["shards"]]
+        self.files: dict[str, list[int]] = index["files"]
+        self._maps: dict[int, mmap.mmap] = {}
+
+    @staticmethod
+    def _key(path) -> str:
+        return path.as_posix() if isinstance(path, PurePath) else str(path).replace("\\", "/")
+
+    def __contains__(self, path) -> bool:
+        return self._key(path) in self.files
+
+    def __iter__(self):
+        return iter(self.files)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def locate(self, path) -> tuple[Path, int, int]:
+        """
+        (shard path, offset, length) of path's content; KeyError if absent.
+        """
+        shard, offset, length = self.files[self._key(path)]
+        return self.shards[shard], offset, length
+
+    def _map(self, shard: int) -> mmap.mmap:
+        mm = self._maps.get(shard)
+        if mm is None:
+            with open(self.shards[shard], "rb") as fh:
+                mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[shard] = mm
+        return mm
+
+    def read_bytes(self, path) -> bytes:
+        shard, offset, length = self.files[self._key(path)]
+        return self._map(shard)[offset:offset + length]
+
+    def read_text(self, path) -> str:
+        return self.read_bytes(path).decode("utf-8")
+
+    def close(self) -> None:
+        for mm in self._maps.values():
+            mm.close()
+        self._maps.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,421 @@
+"""
+Bulk renames (and directory creation) planned up front and applied as a batch.
+
+Each target directory is read once (os.scandir); new names come from
+slugify_all, which runs every name through one precompiled translation
+table in a single pass, or from a template. plan_renames turns the moves
+into a plan graph: targets claimed twice or already taken by an entry that
+stays put are reported as conflicts (and left alone), chains like
+a -> b, b -> c are ordered so no rename overwrites anything, and cycles
+(a -> b, b -> a) go through a temporary name.
+
+apply_plan writes the plan to an undo journal (JSON lines) before touching
+anything and marks each rename there as it completes; independent chains
+can run on a thread pool, which pays off on network filesystems where
+every rename is a round trip. No rename ever replaces an existing path.
+undo_journal reverses the completed renames.
+
+    plan = plan_directory("Products", template="product-{parent}-{n}{ext}")
+    summary = apply_plan(plan, journal="rename.journal.jsonl", workers=8)
+"""
+import fnmatch
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, NamedTuple
+
+from utility_belt import metrics
+
+# Characters dropped from slugs: not safe in URLs or on common filesystems.
+UNSAFE_CHARS = "\"#$%&+,/:;=?@[\\]^`{|}~'"
+
+# Entries never renamed: OS metadata files and this module's own journals.
+DEFAULT_EXCLUDES = ("desktop.ini", "Thumbs.db", ".DS_Store", "*.journal.jsonl")
+
+JOURNAL_VERSION = 1
+
+_SLUG_TABLE = str.maketrans({" ": "-", **{c: None for c in UNSAFE_CHARS}})
+_OTHER_WHITESPACE = re.compile(r"[^\S \x00]+")
+# Other whitespace at either end of a (NUL-separated) name: str.split() drops it.
+_EDGE_WHITESPACE = re.compile(r"(?:^|(?<=\x00))[^\S \x00]+|[^\S \x00]+(?=\x00|\Z)")
+_SEPARATOR = "\x00"  # Cannot occur in file names.
+
+
+# Paths in plans are plain strings: hashing and comparing Path objects
+# dominated planning time at 100k entries.
+class Rename(NamedTuple):
+    src: str
+    dst: str
+
+
+class Conflict(NamedTuple):
+    src: str
+    dst: str
+    reason: str
+
+
+class RenamePlan(NamedTuple):
+    """
+    chains: renames that must run in order, one list per independent chain
+    (most hold a single rename); conflicts: moves left out of the plan;
+    unchanged: entries already carrying their target name.
+    """
+    chains: list[list[Rename]]
+    conflicts: list[Conflict]
+    unchanged: int
+
+    @property
+    def renames(self) -> list[Rename]:
+        return [r for chain in self.chains for r in chain]
+
+
+def slugify_all(names: Iterable[str]) -> list[str]:
+    """
+    URL-safe slugs for names, computed over all of them at once: " - " and
+    " and " become "-", whitespace becomes "-", UNSAFE_CHARS are dropped
+    and the result is lowercased ("Salt & Pepper Mills" -> "salt--pepper-mills").
+    """
+    names = list(names)
+    if not names:
+        return []
+    if any(_SEPARATOR in name for name in names):
+        raise ValueError("names must not contain NUL characters")
+    text = _SEPARATOR.join(names).replace(" - ", "-").replace(" and ", "-")
+    text = _EDGE_WHITESPACE.sub("", text.translate(_SLUG_TABLE))
+    text = _OTHER_WHITESPACE.sub("-", text).lower()
+    return text.split(_SEPARATOR)
+
+
+def slugify(name: str) -> str:
+    return slugify_all([name])[0]
+
+
+def _excluded(name: str, exclude) -> bool:
+    lowered = name.lower()
+    return any(fnmatch.fnmatchcase(lowered, pattern.lower()) for pattern in exclude)
+
+
+def scan_directory(directory, files: bool = True, dirs: bool = True,
+                   exclude=DEFAULT_EXCLUDES) -> tuple[list[str], set[str]]:
+    """
+    One os.scandir pass: (sorted names selected for renaming, every name
+    present). Entries matching an exclude glob (case-insensitive) are never
+    selected.
+    """
+    selected, present = [], set()
+    with metrics.span("rename.scan"), os.scandir(directory) as it:
+        for entry in it:
+            present.add(entry.name)
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if (dirs if is_dir else files) and not _excluded(entry.name, exclude):
+                selected.append(entry.name)
+    selected.sort()
+    return selected, present
+
+
+def target_names(names: list[str], template: str | None = None, parent: str = "") -> list[str]:
+    """
+    New names for names (in order): their slugs, or template filled in per
+    name with {name} (slug of the whole name), {stem} (slug without the
+    extension), {ext} (extension as is, with its dot), {n} (1-based position)
+    and {parent} (slug of the containing directory's name).
+    """
+    if template is None:
+        return slugify_all(names)
+    stems, exts = zip(*(os.path.splitext(name) for name in names)) if names else ((), ())
+    slugs = slugify_all([*names, *stems, parent])
+    count = len(names)
+    parent_slug = slugs[-1]
+    return [
+        template.format(
+            name=slugs[i], stem=slugs[count + i], ext=exts[i], n=i + 1, parent=parent_slug
+        )
+        for i in range(count)
+    ]
+
+
+def _temp_name(path: str, taken: set) -> str:
+    head, name = os.path.split(path)
+    n = 0
+    while True:
+        candidate = os.path.join(head, f".{name}.bulk-rename-{n}.tmp")
+        if candidate not in taken:
+            taken.add(candidate)
+            return candidate
+        n += 1
+
+
+def plan_renames(moves: dict, existing: set) -> RenamePlan:
+    """
+    Order {src: dst} moves (path strings or Paths) into a RenamePlan, given
+    every path that exists now. A move is a conflict when its target is invalid, claimed by
+    another move, or taken by a path that is not itself moving away;
+    dropping conflicts can free or block other targets, so this repeats
+    until the plan is stable.
+    """
+    with metrics.span("rename.plan"):
+        moves = {os.fspath(s): os.fspath(d) for s, d in moves.items()}
+        existing = {os.fspath(p) for p in existing}
+        unchanged = sum(1 for s, d in moves.items() if s == d)
+        moves = {s: d for s, d in moves.items() if s != d}
+        conflicts = []
+        for src, dst in list(moves.items()):
+            if os.path.basename(dst) in ("", ".", ".."):
+                conflicts.append(Conflict(src, dst, "invalid target name"))
+                del moves[src]
+        while True:
+            claims: dict[str, list[str]] = {}
+            for src, dst in moves.items():
+                claims.setdefault(dst, []).append(src)
+            bad = []
+            for dst, srcs in claims.items():
+                if len(srcs) > 1:
+                    bad += [(src, "target claimed by several entries") for src in srcs]
+                elif dst in existing and dst not in moves:
+                    bad.append((srcs[0], "target exists"))
+            if not bad:
+                break
+            for src, reason in bad:
+                conflicts.append(Conflict(src, moves.pop(src), reason))
+
+        # Every path has at most one move out and (now) at most one move in,
+        # so the graph is a set of chains and cycles.
+        src_of = {dst: src for src, dst in moves.items()}
+        chains, done = [], set()
+        for src, dst in moves.items():
+            if dst in moves:
+                continue  # Not the end of a chain.
+            chain, cur = [], src
+            while cur is not None and cur not in done:
+                chain.append(Rename(cur, moves[cur]))
+                done.add(cur)
+                cur = src_of.get(cur)
+            chains.append(chain)
+        taken = existing | set(moves.values())
+        for src in moves:
+            if src in done:
+                continue
+            tmp = _temp_name(src, taken)
+            chain = [Rename(src, tmp)]
+            done.add(src)
+            cur = src_of[src]
+            while cur != src:
+                chain.append(Rename(cur, moves[cur]))
+                done.add(cur)
+                cur = src_of[cur]
+            chain.append(Rename(tmp, moves[src]))
+            chains.append(chain)
+        conflicts.sort()
+        return RenamePlan(chains, conflicts, unchanged)
+
+
+def plan_directory(directory, template: str | None = None, files: bool = True,
+                   dirs: bool = True, exclude=DEFAULT_EXCLUDES) -> RenamePlan:
+    """
+    Plan renaming the entries of one directory to their slugs (or template,
+    see target_names), reading the directory once.
+    """
+    directory = os.fspath(directory)
+    names, present = scan_directory(directory, files, dirs, exclude)
+    targets = target_names(names, template, Path(directory).resolve().name)
+    join = os.path.join
+    moves = {join(directory, old): join(directory, new) for old, new in zip(names, targets)}
+    return plan_renames(moves, {join(directory, name) for name in present})
+
+
+def merge_plans(plans: Iterable[RenamePlan]) -> RenamePlan:
+    chains, conflicts, unchanged = [], [], 0
+    for plan in plans:
+        chains += plan.chains
+        conflicts += plan.conflicts
+        unchanged += plan.unchanged
+    return RenamePlan(chains, conflicts, unchanged)
+
+
+def _free(src: str, dst: str) -> bool:
+    # On case-insensitive filesystems a case-only rename "finds" itself.
+    return not os.path.lexists(dst) or os.path.samefile(src, dst)
+
+
+def _run_chain(chain: list[Rename], mark=None) -> tuple[int, tuple | None]:
+    """
+    Apply one chain in order, stopping at the first failure (later renames
+    depend on it). Never replaces an existing path, even one that appeared
+    after planning. mark(step) is called after each rename. Returns
+    (renames done, (src, dst, error) or None).
+    """
+    for step, (src, dst) in enumerate(chain):
+        try:
+            if not _free(src, dst):
+                raise FileExistsError(f"target exists: {dst}")
+            os.rename(src, dst)
+        except OSError as e:
+            return step, (src, dst, str(e))
+        if mark is not None:
+            mark(step)
+    return len(chain), None
+
+
+def _run_chains(chains: list[list[Rename]], workers: int, mark=None, finished=None) -> dict:
+    """
+    Run chains (serially or on a thread pool); mark(chain index, step)
+    records progress and finished(chain index) is called once a chain that
+    renamed anything stops. Returns renamed / failed / errors (first few).
+    """
+    def run(i):
+        result = _run_chain(chains[i], None if mark is None else lambda step: mark(i, step))
+        if finished is not None and result[0]:
+            finished(i)
+        return result
+
+    renamed = 0
+    errors = []
+    with metrics.span("rename.apply"):
+        if workers > 1 and len(chains) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(run, range(len(chains))))
+        else:
+            results = map(run, range(len(chains)))
+        for done, error in results:
+            renamed += done
+            if error is not None:
+                errors.append(error)
+    metrics.count("rename.renamed", renamed)
+    return {"renamed": renamed, "failed": len(errors), "errors": errors[:10]}
+
+
+class _Journal:
+    """
+    Undo journal: a header, the whole plan (and directories about to be
+    created), fsynced before anything changes; then one line per rename,
+    flushed as it completes and fsynced when its chain stops, which is what
+    undo_journal reverses.
+    """
+
+    def __init__(self, path, plan: RenamePlan, created=()):
+        self._fh = open(path, "w", encoding="utf-8")
+        self._lock = threading.Lock()
+        write = self._fh.write
+        write(json.dumps({"journal": "bulk_rename", "version": JOURNAL_VERSION}) + "\n")
+        for directory in created:
+            write(json.dumps({"op": "mkdir", "path": str(directory)}) + "\n")
+        for i, chain in enumerate(plan.chains):
+            for step, (src, dst) in enumerate(chain):
+                write(json.dumps({"op": "rename", "chain": i, "step": step,
+                                  "src": src, "dst": dst}) + "\n")
+        self.sync()
+
+    def mark(self, chain: int, step: int) -> None:
+        with self._lock:
+            self._fh.write(f'{{"op": "done", "chain": {chain}, "step": {step}}}\n')
+            self._fh.flush()
+
+    def chain_done(self, chain: int) -> None:
+        os.fsync(self._fh.fileno())
+
+    def sync(self) -> None:
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+
+    def close(self) -> None:
+        self.sync()
+        self._fh.close()
+
+
+def apply_plan(plan: RenamePlan, journal=None, workers: int = 1, dry_run: bool = False) -> dict:
+    """
+    Carry out plan; with journal (a path) an undo journal is written as it
+    goes (see undo_journal). Chains run on `workers` threads; a failed
+    rename stops only its own chain. Conflicts in the plan are skipped, not
+    applied. Returns a summary: planned, renamed, failed, errors (first
+    few), conflicts, unchanged, journal.
+    """
+    summary = {
+        "planned": sum(len(chain) for chain in plan.chains),
+        "conflicts": len(plan.conflicts),
+        "unchanged": plan.unchanged,
+        "journal": str(journal) if journal and not dry_run else None,
+    }
+    if dry_run:
+        return dict(summary, renamed=0, failed=0, errors=[])
+    if not journal:
+        return dict(summary, **_run_chains(plan.chains, workers))
+    log = _Journal(journal, plan)
+    try:
+        return dict(summary, **_run_chains(plan.chains, workers, log.mark, log.chain_done))
+    finally:
+        log.close()
+
+
+def make_directories(parent, names: Iterable[str], journal=None, dry_run: bool = False) -> dict:
+    """
+    Create one directory per distinct slug of names under parent, reading
+    parent once to skip the ones already there. Returns a summary: created
+    (paths), existing, duplicates (names whose slug repeats an earlier one).
+    """
+    parent = Path(parent)
+    parent.mkdir(parents=True, exist_ok=True)
+    _, present = scan_directory(parent)
+    names = list(names)
+    wanted, duplicates, seen = [], [], set()
+    for name, slug in zip(names, slugify_all(names)):
+        if slug in seen:
+            duplicates.append(name)
+            continue
+        seen.add(slug)
+        if slug and slug not in present:
+            wanted.append(parent / slug)
+    if not dry_run:
+        if journal:
+            _Journal(journal, RenamePlan([], [], 0), created=wanted).close()
+        for path in wanted:
+            path.mkdir()
+    return {
+        "created": [str(p) for p in wanted],
+        "existing": len(seen) - len(wanted),
+        "duplicates": duplicates,
+    }
+
+
+def read_journal(path) -> list[dict]:
+    with open(path, "r", encoding="utf-8") as fh:
+        header = json.loads(fh.readline() or "{}")
+        if header.get("journal") != "bulk_rename" or header.get("version") != JOURNAL_VERSION:
+            raise ValueError(f"not a bulk rename journal: {path}")
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def undo_journal(path, workers: int = 1) -> dict:
+    """
+    Reverse what a journal recorded: the renames marked done run backwards,
+    chain by chain (still never replacing an existing path), then the
+    directories it created are removed if still empty. Returns a summary
+    like apply_plan's plus removed_dirs.
+    """
+    entries = read_journal(path)
+    steps: dict[int, dict[int, Rename]] = {}
+    done: dict[int, int] = {}
+    for entry in entries:
+        if entry["op"] == "rename":
+            steps.setdefault(entry["chain"], {})[entry["step"]] = Rename(
+                entry["src"], entry["dst"]
+            )
+        elif entry["op"] == "done":
+            done[entry["chain"]] = max(done.get(entry["chain"], -1), entry["step"])
+    chains = [
+        [Rename(steps[i][step].dst, steps[i][step].src) for step in range(last, -1, -1)]
+        for i, last in done.items()
+    ]
+    summary = _run_chains(chains, workers)
+    removed = 0
+    for entry in reversed(entries):
+        if entry["op"] == "mkdir":
+            try:
+                os.rmdir(entry["path"])
+                removed += 1
+            except OSError:
+                pass  # Gone already, or no longer empty.
+    return dict(summary, removed_dirs=removed)
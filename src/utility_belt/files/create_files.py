@@ -1,27 +1,52 @@
-# %%
+"""
+Create a set of empty files (placeholders for a batch of exercises).
+
+    python -m utility_belt.files.create_files [directory]
+"""
 import os
+import sys
+from pathlib import Path
 
 # List of desired filenames
-filenames = ["op2.json", "op2.html", "op2.js",
-             "op3.json", "op3.html", "op3.js",
-             "op4.json", "op4.html", "op4.js",
-             "op5.json", "op5.html", "op5.js",
-            ]
-
-# Get the current directory to show where files will be created
-current_directory = os.getcwd()
-print(f"Files will be created in: {current_directory}\n")
-
-# Loop through the list and create each file
-for filename in filenames:
-    try:
-        # 'w' mode creates a file if it doesn't exist
-        with open(filename, 'w') as f:
-            # The 'with' statement automatically handles closing the file.
-            # We don't need to write anything, so we can just pass.
+DEFAULT_FILENAMES = (
+    "op2.json", "op2.html", "op2.js",
+    "op3.json", "op3.html", "op3.js",
+    "op4.json", "op4.html", "op4.js",
+    "op5.json", "op5.html", "op5.js",
+)
+
+
+def create_files(filenames=DEFAULT_FILENAMES, directory=".") -> list[Path]:
+    """
+    Create (or truncate) each file in directory; returns the paths created.
+    Raises OSError on the first file that cannot be written.
+    """
+    directory = Path(directory)
+    created = []
+    for filename in filenames:
+        path = directory / filename
+        # 'w' mode creates the file if it doesn't exist; nothing is written.
+        with open(path, "w"):
             pass
-        print(f"✅ Created file: {filename}")
-    except IOError as e:
-        print(f"❌ Error creating file {filename}: {e}")
+        created.append(path)
+    return created
+
+
+def main(argv=None) -> int:
+    args = sys.argv[1:] if argv is None else argv
+    directory = args[0] if args else os.getcwd()
+    print(f"Files will be created in: {directory}\n")
+    failed = 0
+    for filename in DEFAULT_FILENAMES:
+        try:
+            create_files([filename], directory)
+            print(f"✅ Created file: {filename}")
+        except OSError as e:
+            failed += 1
+            print(f"❌ Error creating file {filename}: {e}")
+    print("\nScript finished.")
+    return 1 if failed else 0
+
 
-print("\nScript finished.")
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
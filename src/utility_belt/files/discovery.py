@@ -0,0 +1,182 @@
+"""
+Directory walking for the merge utilities: an os.scandir-based engine that
+prunes excluded directories before descending and streams results in a
+deterministic order.
+
+Exclude patterns are matched case-insensitively, gitignore style:
+
+- ``name`` matches any path component equal to ``name`` (``node_modules``).
+- ``*.log`` / ``.env*`` (no slash) are globs matched against each component.
+- ``docs/build`` / ``/tmp`` / ``**/fixtures/*.json`` (with a slash) are globs
+  matched against the path relative to the root; ``**`` spans directories.
+- A trailing slash (``out/``) restricts the pattern to directories.
+
+A matching directory is never entered, so nothing below it is listed.
+"""
+import fnmatch
+import os
+import re
+from pathlib import Path
+from typing import Iterator, NamedTuple
+
+
+class FileEntry(NamedTuple):
+    path: Path
+    size: int
+    mtime_ns: int
+
+
+def _translate_path_glob(pattern: str) -> str:
+    """
+    Translate a gitignore-style path glob into a regex source string.
+    """
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2:]:
+            j = pattern.index("]", i + 2)
+            body = pattern[i + 1:j]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append("[" + body.replace("\\", "\\\\") + "]")
+            i = j + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out)
+
+
+class ExcludeMatcher:
+    """
+    Compiled set of exclude patterns (see module docstring for the syntax).
+    """
+
+    def __init__(self, patterns=()):
+        self.patterns = tuple(p.strip() for p in patterns if p and p.strip())
+        names = {False: set(), True: set()}
+        name_globs = {False: [], True: []}
+        path_globs = {False: [], True: []}
+        for raw in self.patterns:
+            pat = raw.casefold().replace("\\", "/")
+            anchored = pat.startswith("/")
+            dir_only = pat.endswith("/")
+            pat = pat.strip("/")
+            if not pat:
+                continue
+            if anchored or "/" in pat:
+                path_globs[dir_only].append(_translate_path_glob(pat))
+            elif any(c in pat for c in "*?["):
+                name_globs[dir_only].append(fnmatch.translate(pat))
+            else:
+                names[dir_only].add(pat)
+        # Index by is_dir: directories are checked against every pattern, files
+        # only against those without a trailing slash.
+        self._names = {False: names[False], True: names[False] | names[True]}
+        self._name_re = {
+            False: self._compile(name_globs[False]),
+            True: self._compile(name_globs[False] + name_globs[True]),
+        }
+        self._path_re = {
+            False: self._compile(path_globs[False], full=True),
+            True: self._compile(path_globs[False] + path_globs[True], full=True),
+        }
+
+    @staticmethod
+    def _compile(sources, full=False):
+        if not sources:
+            return None
+        joined = "|".join(f"(?:{s})" for s in sources)
+        return re.compile(f"(?s:{joined})\\Z" if full else joined)
+
+    def match(self, rel_path: str, is_dir: bool = False) -> bool:
+        """
+        True if rel_path (relative to the root, "/"-separated) is excluded by
+        its last component or its full path. Ancestors are not re-checked;
+        iter_files never descends into an excluded directory.
+        """
+        rel = rel_path.casefold()
+        name = rel.rpartition("/")[2]
+        if name in self._names[is_dir]:
+            return True
+        name_re = self._name_re[is_dir]
+        if name_re is not None and name_re.match(name):
+            return True
+        path_re = self._path_re[is_dir]
+        return path_re is not None and path_re.match(rel) is not None
+
+    def excludes(self, rel_path: str, is_dir: bool = False) -> bool:
+        """
+        Like match(), but also checks every ancestor directory of rel_path.
+        """
+        parts = [p for p in rel_path.replace("\\", "/").split("/") if p]
+        for i in range(1, len(parts)):
+            if self.match("/".join(parts[:i]), is_dir=True):
+                return True
+        return bool(parts) and self.match("/".join(parts), is_dir=is_dir)
+
+
+def _suffix(name: str) -> str:
+    # Same rule as PurePath.suffix.
+    i = name.rfind(".")
+    return name[i:] if 0 < i < len(name) - 1 else ""
+
+
+def _sorted_entries(path):
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        return []
+    # Sibling order of sorted(Path.rglob()): by (normcased) name.
+    entries.sort(key=lambda e: os.path.normcase(e.name))
+    return entries
+
+
+def iter_files(root: Path, include_exts=None, exclude_patterns=()) -> Iterator[FileEntry]:
+    """
+    Walk root depth-first and yield a FileEntry for every regular file that
+    has an included extension and is not excluded.
+
+    Order matches sorted(root.rglob("*")); only one directory listing per
+    level of the current path is held in memory. Symlinked directories are
+    not followed. The size/mtime come from the scandir entry, so callers do
+    not need to stat() the file again.
+    """
+    matcher = exclude_patterns if isinstance(exclude_patterns, ExcludeMatcher) \
+        else ExcludeMatcher(exclude_patterns)
+    root = Path(root)
+    stack = [("", iter(_sorted_entries(root)))]
+    while stack:
+        prefix, entries = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+        rel = prefix + entry.name
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if not matcher.match(rel, is_dir=True):
+                    stack.append((rel + "/", iter(_sorted_entries(entry.path))))
+                continue
+            if not entry.is_file():
+                continue
+            if include_exts and _suffix(entry.name).lower() not in include_exts:
+                continue
+            if matcher.match(rel):
+                continue
+            st = entry.stat()
+        except OSError:
+            continue
+        yield FileEntry(root / rel, st.st_size, st.st_mtime_ns)
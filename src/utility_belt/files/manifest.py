@@ -0,0 +1,96 @@
+"""
+Sidecar manifest for incremental merges.
+
+The manifest sits next to the merged output (``<output>.manifest.json``) and
+records, per source file, its size, mtime, content hash and decoded length
+plus the byte range of its segment (header + content + EOF marker) in the
+output, and for dedup back-references the file they point at (``dup_of``).
+A later run can then copy unchanged segments straight from the previous output.
+"""
+import json
+import os
+from pathlib import Path
+
+from utility_belt import metrics
+
+MANIFEST_VERSION = 2
+COPY_CHUNK = 1024 * 1024
+
+
+def manifest_path_for(output_txt: Path) -> Path:
+    return output_txt.with_name(output_txt.name + ".manifest.json")
+
+
+def load_manifest(manifest_path: Path, output_txt: Path, options: dict) -> dict | None:
+    """
+    Return the {relative path: record} map of a manifest that still describes
+    output_txt, or None if it is missing, unreadable, written with different
+    options, or the output changed since it was written.
+    """
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as fh:
+            manifest = json.load(fh)
+        st = output_txt.stat()
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("options") != options:
+        return None
+    if manifest.get("output") != {"size": st.st_size, "mtime_ns": st.st_mtime_ns}:
+        return None
+    return manifest.get("files", {})
+
+
+def write_manifest(manifest_path: Path, output_txt: Path, options: dict, files: dict) -> None:
+    st = output_txt.stat()
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "options": options,
+        "output": {"size": st.st_size, "mtime_ns": st.st_mtime_ns},
+        "files": files,
+    }
+    tmp = manifest_path.with_name(manifest_path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, separators=(",", ":"))
+    os.replace(tmp, manifest_path)
+
+
+def copy_range(src, dst, offset: int, length: int) -> None:
+    """
+    Copy length bytes starting at offset from binary file src to dst.
+    """
+    src.seek(offset)
+    remaining = length
+    while remaining > 0:
+        chunk = src.read(min(COPY_CHUNK, remaining))
+        if not chunk:
+            raise EOFError(f"{getattr(src, 'name', 'source')} ended {remaining} bytes early")
+        dst.write(chunk)
+        remaining -= len(chunk)
+
+
+class SegmentCopier:
+    """
+    Queue byte ranges of src to append to dst, merging adjacent ranges so a
+    run of unchanged files becomes one bulk copy.
+    """
+
+    def __init__(self, src, dst):
+        self.src = src
+        self.dst = dst
+        self._start = None
+        self._end = None
+
+    def add(self, offset: int, length: int) -> None:
+        if self._end == offset:
+            self._end += length
+            return
+        self.flush()
+        self._start, self._end = offset, offset + length
+
+    def flush(self) -> None:
+        if self._start is not None:
+            length = self._end - self._start
+            with metrics.span("merge.copy"):
+                copy_range(self.src, self.dst, self._start, length)
+            metrics.count("merge.copy.bytes", length)
+        self._start = self._end = None
@@ -1,97 +1,525 @@
-\
+"""
+Utilities for merging text-friendly files into a single UTF-8 .txt.
+"""
+import codecs
+import hashlib
+import io
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+
+from utility_belt import metrics
+from utility_belt.files.archive import BYTES_PER_TOKEN, ShardWriter, index_path_for
+from utility_belt.files.discovery import ExcludeMatcher, iter_files
+from utility_belt.files.manifest import (
+    SegmentCopier,
+    load_manifest,
+    manifest_path_for,
+    write_manifest,
+)
+
+DEFAULT_EXTS = {
+    ".txt", ".md", ".py", ".json", ".yaml", ".yml", ".toml",
+    ".csv", ".tsv", ".xml", ".ini", ".cfg", ".html", ".css", ".js", ".ts"
+}
+
+DEFAULT_EXCLUDES = {"node_modules", ".git", "__pycache__", "build", "dist", ".venv", ".mypy_cache"}
+
+EOF_MARKER = b"\n===== END FILE =====\n"
+
+# Leading bytes checked for NUL to detect binary files, and the read size.
+SNIFF_BYTES = 2048
+READ_CHUNK = 64 * 1024
+
+# Files read ahead of the writer per worker thread when no explicit window is given.
+WINDOW_PER_WORKER = 4
+
+
+def _file_header(shown, size: int) -> bytes:
+    return f"\n===== FILE: {shown} | SIZE: {size} bytes =====\n".encode("utf-8")
+
+
+def _backref_header(shown, size: int, first_shown) -> bytes:
+    # shown is None when per-file headers are off; the back-reference is still written.
+    if shown is None:
+        return f"\n===== DUPLICATE OF: {first_shown} =====\n".encode("utf-8")
+    return (
+        f"\n===== FILE: {shown} | SIZE: {size} bytes | DUPLICATE OF: {first_shown} =====\n"
+    ).encode("utf-8")
+
+
+def is_excluded(path: Path, exclude_patterns, root: Path | None = None) -> bool:
     """
-    Utilities for merging text-friendly files into a single UTF-8 .txt.
+    True if path (taken relative to root, when given) or any of its parent
+    directories matches an exclude pattern. See utility_belt.files.discovery.
     """
-    from pathlib import Path
-    from datetime import datetime
+    rel = path.relative_to(root) if root is not None else path
+    return ExcludeMatcher(exclude_patterns).excludes(rel.as_posix())
 
-    DEFAULT_EXTS = {
-        ".txt", ".md", ".py", ".json", ".yaml", ".yml", ".toml",
-        ".csv", ".tsv", ".xml", ".ini", ".cfg", ".html", ".css", ".js", ".ts"
-    }
 
-    DEFAULT_EXCLUDES = {"node_modules", ".git", "__pycache__", "build", "dist", ".venv", ".mypy_cache"}
+def copy_decoded(src, dst, first: bytes = b"", hasher=None, chunk_size: int = READ_CHUNK) -> int:
+    """
+    Decode binary file src as UTF-8 and write the re-encoded text to dst, one
+    chunk at a time. Matches reading the file in text mode with
+    errors="replace": invalid bytes become U+FFFD and CRLF/CR become LF.
+    Chunks that are already valid UTF-8 without CRs are copied as-is.
+
+    first is data already read from src. Returns the number of bytes written;
+    hasher, if given, is updated with them.
+
+    Reads, decoding (with hashing) and writes are timed as the merge.read /
+    merge.decode / merge.write metrics spans.
+    """
+    decoder = io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder("utf-8")("replace"), translate=True
+    )
+    # Plain bound methods unless metrics are being recorded.
+    read = metrics.timed("merge.read", src.read)
+    decode = metrics.timed("merge.decode", _decode_chunk)
+    write = metrics.timed("merge.write", dst.write)
+    written = nread = 0
+    chunk = first or read(chunk_size)
+    while chunk:
+        nread += len(chunk)
+        data = decode(decoder, hasher, chunk)
+        write(data)
+        written += len(data)
+        chunk = read(chunk_size)
+    tail = decoder.decode(b"", final=True).encode("utf-8")
+    if tail:
+        write(tail)
+        if hasher is not None:
+            hasher.update(tail)
+        written += len(tail)
+    metrics.count("merge.read.bytes", nread)
+    metrics.count("merge.write.bytes", written)
+    return written
+
+
+def _decode_chunk(decoder, hasher, chunk: bytes) -> bytes:
+    data = None
+    if b"\r" not in chunk and decoder.getstate() == (b"", 0):
+        if chunk.isascii():
+            data = chunk
+        else:
+            try:
+                chunk.decode("utf-8")
+                data = chunk
+            except UnicodeDecodeError:
+                pass  # invalid, or a character split across chunks
+    if data is None:
+        data = decoder.decode(chunk).encode("utf-8")
+    if hasher is not None:
+        hasher.update(data)
+    return data
+
+
+def write_text_segment(
+    dst,
+    path: Path,
+    header: bytes = b"",
+    footer: bytes = b"",
+    max_bytes=None,
+    size: int | None = None,
+) -> tuple[int, int, str]:
+    """
+    Append header, the decoded content of path (see copy_decoded) and footer
+    to binary file dst, opening path once.
+
+    Returns (content_offset, content_length, sha256 of the content), offsets
+    relative to the start of the segment. Files over max_bytes or with NUL
+    bytes in the first SNIFF_BYTES raise ValueError; on any error dst is
+    truncated back to where the segment started.
+    """
+    if size is None:
+        size = path.stat().st_size
+    if max_bytes is not None and size > max_bytes:
+        raise ValueError(f"File too large ({size} bytes)")
+    start = dst.tell()
+    try:
+        with open(path, "rb") as src:
+            first = metrics.timed("merge.read", src.read)(READ_CHUNK)
+            if b"\x00" in first[:SNIFF_BYTES]:
+                raise ValueError("binary data detected")
+            dst.write(header)
+            hasher = hashlib.sha256()
+            length = copy_decoded(src, dst, first, hasher)
+            dst.write(footer)
+    except BaseException:
+        dst.seek(start)
+        dst.truncate()
+        raise
+    return len(header), length, hasher.hexdigest()
+
+
+def safe_read_text(path: Path, max_bytes=None, size: int | None = None) -> str:
+    """
+    Read path as text. size, if already known (e.g. from discovery), saves a stat().
+    """
+    buf = io.BytesIO()
+    write_text_segment(buf, path, max_bytes=max_bytes, size=size)
+    return buf.getvalue().decode("utf-8")
+
+
+def discover_files(root: Path, include_exts=DEFAULT_EXTS, exclude_substrings=DEFAULT_EXCLUDES):
+    """
+    Sorted list of files under root; see iter_files for the streaming version.
+    """
+    return [entry.path for entry in iter_files(root, include_exts, exclude_substrings)]
+
+
+def _buffered(render, entry):
+    buf = io.BytesIO()
+    info = render(buf, entry)
+    return buf.getvalue(), info
+
+
+def _replay(data, info):
+    def write(out):
+        with metrics.span("merge.replay"):
+            out.write(data)
+        metrics.count("merge.replay.bytes", len(data))
+        return info
+
+    return write
 
-    def is_excluded(path: Path, exclude_substrings):
-        p = str(path).lower()
-        return any(substr.lower() in p for substr in exclude_substrings)
 
-    def safe_read_text(path: Path, max_bytes=None) -> str:
-        if max_bytes is not None and path.stat().st_size > max_bytes:
-            raise ValueError(f"File too large ({path.stat().st_size} bytes)")
-        # sniff for null bytes
+def _raise(error):
+    def write(out):
+        raise error
+
+    return write
+
+
+def iter_segment_writers(
+    entries,
+    render,
+    workers: int = 1,
+    window: int | None = None,
+    needs_read=None,
+):
+    """
+    Yield (entry, write) for each FileEntry, in the order given.
+
+    render(dst, entry) writes one file's segment to a binary file and returns
+    some info about it; write(out) does the same for out and returns that
+    info (or raises the error reading the file hit). Serially, write streams
+    straight into out. With workers > 1 the segments are rendered ahead on a
+    thread pool into memory; at most `window` files (default
+    WINDOW_PER_WORKER * workers) are in flight at once, so a slow file holds
+    back at most that many finished segments.
+
+    Entries for which needs_read(entry) is false are passed through unread,
+    as (entry, None).
+    """
+    if workers <= 1:
+        for entry in entries:
+            if needs_read is not None and not needs_read(entry):
+                yield entry, None
+            else:
+                yield entry, partial(render, entry=entry)
+        return
+
+    if window is None:
+        window = WINDOW_PER_WORKER * workers
+    window = max(window, 1)
+
+    def ready(fut):
+        if fut is None:
+            return None
         try:
-            with open(path, "rb") as rb:
-                head = rb.read(2048)
-                if b"\x00" in head:
-                    raise UnicodeDecodeError("utf-8", head, 0, 1, "binary data detected")
-        except Exception:
-            pass
+            return _replay(*fut.result())
+        except Exception as e:
+            return _raise(e)
+
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
         try:
-            return path.read_text(encoding="utf-8", errors="strict")
-        except Exception:
-            try:
-                return path.read_text(encoding="utf-8", errors="replace")
-            except Exception:
-                return path.read_text(encoding="latin-1", errors="replace")
-
-    def discover_files(root: Path, include_exts=DEFAULT_EXTS, exclude_substrings=DEFAULT_EXCLUDES):
-        files = []
-        for p in sorted(root.rglob("*")):
-            if not p.is_file():
-                continue
-            if include_exts and p.suffix.lower() not in include_exts:
-                continue
-            if is_excluded(p, exclude_substrings):
-                continue
-            files.append(p)
-        return files
-
-    def merge_files_to_text(
-        input_dir: Path,
-        output_txt: Path,
-        include_exts=DEFAULT_EXTS,
-        exclude_substrings=DEFAULT_EXCLUDES,
-        max_file_bytes: int | None = 2 * 1024 * 1024,
-        include_headers: bool = True,
-        include_eof_markers: bool = True,
-        use_relative_paths: bool = True,
-    ) -> dict:
+            for entry in entries:
+                if len(pending) >= window:
+                    done, fut = pending.popleft()
+                    yield done, ready(fut)
+                if needs_read is not None and not needs_read(entry):
+                    pending.append((entry, None))
+                else:
+                    pending.append((entry, pool.submit(_buffered, render, entry)))
+            while pending:
+                done, fut = pending.popleft()
+                yield done, ready(fut)
+        finally:
+            # Consumer stopped early: don't read files nobody will write.
+            for _, fut in pending:
+                if fut is not None:
+                    fut.cancel()
+
+
+def merge_files_to_text(
+    input_dir,
+    output_txt,
+    include_exts=DEFAULT_EXTS,
+    exclude_substrings=DEFAULT_EXCLUDES,
+    max_file_bytes: int | None = 2 * 1024 * 1024,
+    include_headers: bool = True,
+    include_eof_markers: bool = True,
+    use_relative_paths: bool = True,
+    workers: int = 1,
+    window: int | None = None,
+    incremental: bool = False,
+    shard_bytes: int | None = None,
+    shard_tokens: int | None = None,
+    dedup: bool = False,
+) -> dict:
+    """
+    Merge files from input_dir into output_txt (str or path-like). Returns a
+    summary dict.
+
+    Each file is opened once and decoded in chunks straight into the output
+    (see write_text_segment). workers > 1 reads files on a thread pool (see
+    iter_segment_writers); the output is identical to a serial run.
+
+    incremental=True keeps a manifest next to the output (see
+    utility_belt.files.manifest). Files whose size and mtime match the
+    manifest are not read again; their segments are copied from the previous
+    output instead. The summary then reports manifest_hits/manifest_misses.
+
+    shard_bytes / shard_tokens split the output into shards of roughly that
+    size plus an offset index, readable with utility_belt.files.archive.MergedArchive.
+    The summary then lists the shards and the index. Not combinable with
+    incremental.
+
+    dedup=True writes content that is byte-identical (after decoding) to an
+    earlier file as a short back-reference header naming the first copy. The
+    summary then reports duplicates and dedup_bytes_saved; in a sharded index
+    duplicates point at the first copy's content.
+
+    Inside utility_belt.metrics.recording() the phases are timed as spans:
+    merge.discover, merge.read, merge.decode, merge.write (into the output
+    serially, into a memory buffer with workers > 1, copied to the output
+    as merge.replay), merge.copy (unchanged segments) and merge.manifest;
+    counters track files, bytes, skips, manifest hits and duplicates, and
+    merge.file_bytes is a histogram of the sizes of files read.
+    """
+    if shard_tokens is not None and shard_bytes is None:
+        shard_bytes = shard_tokens * BYTES_PER_TOKEN
+    if incremental and shard_bytes is not None:
+        raise ValueError("incremental mode does not support sharded output")
+
+    input_dir, output_txt = Path(input_dir), Path(output_txt)
+    root = input_dir.resolve()
+    # The preamble reports the file count, so collect the (lightweight) entries first.
+    with metrics.span("merge.discover"):
+        files = list(iter_files(root, include_exts, exclude_substrings))
+    metrics.count("merge.discovered", len(files))
+    written = 0
+    skipped = 0
+    hits = 0
+    err_files: list[tuple[str, str]] = []
+    output_txt.parent.mkdir(parents=True, exist_ok=True)
+
+    manifest_path = manifest_path_for(output_txt)
+    options = {
+        "root": str(root),
+        "max_file_bytes": max_file_bytes,
+        "include_headers": include_headers,
+        "include_eof_markers": include_eof_markers,
+        "use_relative_paths": use_relative_paths,
+        "dedup": dedup,
+    }
+    previous = None
+    if incremental:
+        with metrics.span("merge.manifest"):
+            previous = load_manifest(manifest_path, output_txt, options)
+    records = {}
+    timestamp = datetime.utcnow().isoformat()
+
+    def preamble(shard=None):
+        text = (
+            "# Merged Text Export\n"
+            f"# Source root: {root}\n"
+            f"# Timestamp: {timestamp}Z\n"
+            f"# Files included: {len(files)}\n"
+        )
+        if shard is not None:
+            text += f"# Shard: {shard}\n"
+        return (text + "\n").encode("utf-8")
+
+    footer = EOF_MARKER if include_eof_markers else b""
+    # sha256 of content -> (shown path, relative path) of its first copy, for dedup.
+    seen: dict[str, tuple[str, str]] = {}
+    unchanged_hashes = set()
+    duplicates = 0
+    bytes_saved = 0
+
+    def rel_of(entry):
+        return entry.path.relative_to(root).as_posix()
+
+    def shown_of(entry):
+        f = entry.path
+        return str(f.relative_to(root) if use_relative_paths else f.resolve())
+
+    def header_for(entry):
+        return _file_header(shown_of(entry), entry.size) if include_headers else b""
+
+    def render(dst, entry):
+        metrics.observe("merge.file_bytes", entry.size)
+        return write_text_segment(
+            dst, entry.path, header_for(entry), footer, max_file_bytes, entry.size
+        )
+
+    def backref_for(entry, digest, content_length):
         """
-        Merge files from input_dir into output_txt. Returns a summary dict.
+        The back-reference segment for entry's content (first seen as
+        seen[digest]), or None when writing the content out is no bigger.
         """
-        root = input_dir.resolve()
-        files = discover_files(root, include_exts, exclude_substrings)
-        written = 0
-        skipped = 0
-        err_files: list[tuple[str, str]] = []
-        output_txt.parent.mkdir(parents=True, exist_ok=True)
-
-        with open(output_txt, "w", encoding="utf-8") as out:
-            out.write("# Merged Text Export\n")
-            out.write(f"# Source root: {root}\n")
-            out.write(f"# Timestamp: {datetime.utcnow().isoformat()}Z\n")
-            out.write(f"# Files included: {len(files)}\n\n")
-
-            for f in files:
+        segment = _backref_header(
+            shown_of(entry) if include_headers else None, entry.size, seen[digest][0]
+        ) + footer
+        if len(segment) < len(header_for(entry)) + content_length + len(footer):
+            return segment
+        return None
+
+    def changed(entry):
+        rec = previous.get(rel_of(entry))
+        if rec is None or rec["size"] != entry.size or rec["mtime_ns"] != entry.mtime_ns:
+            return True
+        if dedup:
+            # A back-reference needs no read as long as an earlier unchanged
+            # file still carries the content; otherwise this copy becomes the first.
+            first = rec["sha256"] not in unchanged_hashes
+            unchanged_hashes.add(rec["sha256"])
+            return first and "dup_of" in rec
+        return False
+
+    # With a previous output to copy from, build the new one alongside it.
+    target = output_txt.with_name(output_txt.name + ".tmp") if previous else output_txt
+    shards = None
+    with ExitStack() as stack:
+        if shard_bytes is not None:
+            shards = stack.enter_context(ShardWriter(output_txt, shard_bytes, preamble))
+            out = shards.file
+        else:
+            out = stack.enter_context(open(target, "wb"))
+            out.write(preamble())
+        copier = None
+        if previous:
+            copier = SegmentCopier(stack.enter_context(open(output_txt, "rb")), out)
+        pos = out.tell()
+
+        for entry, write in iter_segment_writers(
+            files,
+            render,
+            workers,
+            window,
+            needs_read=changed if previous else None,
+        ):
+            rel = rel_of(entry)
+            backref = None
+            if write is None:
+                old_rec = previous[rel]
+                digest, content_length = old_rec["sha256"], old_rec["content_length"]
+                if "dup_of" in old_rec and digest not in seen:
+                    # The file it pointed at could not be written this run.
+                    skipped += 1
+                    err_files.append((str(entry.path), "content of duplicate is unavailable"))
+                    continue
+                if dedup and digest in seen:
+                    backref = backref_for(entry, digest, content_length)
+                if backref is None and "dup_of" in old_rec:
+                    # Its back-reference no longer pays off (the first copy's path
+                    # changed), so the content has to be read after all.
+                    def write(dst, entry=entry):
+                        return render(dst, entry)
+                else:
+                    hits += 1
+                    metrics.count("merge.manifest_hits")
+                    if backref is None:
+                        copier.add(old_rec["offset"], old_rec["length"])
+            if write is not None:
+                if copier:
+                    copier.flush()
+                if shards:
+                    out = shards.fit(len(header_for(entry)) + entry.size)
+                    pos = out.tell()
                 try:
-                    content = safe_read_text(f, max_bytes=max_file_bytes)
-                    if include_headers:
-                        shown = f.relative_to(root) if use_relative_paths else f.resolve()
-                        out.write(f"\n===== FILE: {shown} | SIZE: {f.stat().st_size} bytes =====\n")
-                    out.write(content)
-                    if include_eof_markers:
-                        out.write("\n===== END FILE =====\n")
-                    written += 1
+                    content_offset, content_length, digest = write(out)
                 except Exception as e:
                     skipped += 1
-                    err_files.append((str(f), str(e)))
-
-        return {
-            "root": str(root),
-            "output": str(output_txt),
-            "discovered": len(files),
-            "written": written,
-            "skipped": skipped,
-            "errors": err_files[:10],
-        }
+                    metrics.count("merge.skipped")
+                    err_files.append((str(entry.path), str(e)))
+                    continue
+                if dedup and digest in seen:
+                    backref = backref_for(entry, digest, content_length)
+                    if backref is not None:
+                        # Already streamed out in full; replace it with the back-reference.
+                        out.seek(pos)
+                        out.truncate()
+
+            if backref is not None:
+                if copier:
+                    copier.flush()
+                first_rel = seen[digest][1]
+                out.write(backref)
+                if shards:
+                    shards.alias(rel, first_rel)
+                duplicates += 1
+                metrics.count("merge.duplicates")
+                bytes_saved += len(header_for(entry)) + content_length + len(footer) - len(backref)
+                rec = {
+                    "size": entry.size,
+                    "mtime_ns": entry.mtime_ns,
+                    "sha256": digest,
+                    "content_length": content_length,
+                    "offset": pos,
+                    "length": len(backref),
+                    "dup_of": first_rel,
+                }
+            elif write is None:
+                rec = dict(old_rec, offset=pos)
+            else:
+                if shards:
+                    shards.add(rel, pos + content_offset, content_length)
+                rec = {
+                    "size": entry.size,
+                    "mtime_ns": entry.mtime_ns,
+                    "sha256": digest,
+                    "content_length": content_length,
+                    "offset": pos,
+                    "length": out.tell() - pos,
+                }
+            if dedup:
+                seen.setdefault(digest, (shown_of(entry), rel))
+            pos += rec["length"]
+            records[rel] = rec
+            written += 1
+            metrics.count("merge.files")
+        if copier:
+            copier.flush()
+
+    if target != output_txt:
+        os.replace(target, output_txt)
+    if incremental:
+        with metrics.span("merge.manifest"):
+            write_manifest(manifest_path, output_txt, options, records)
+
+    summary = {
+        "root": str(root),
+        "output": str(output_txt),
+        "discovered": len(files),
+        "written": written,
+        "skipped": skipped,
+        "errors": err_files[:10],
+    }
+    if incremental:
+        summary["manifest_hits"] = hits
+        summary["manifest_misses"] = written + skipped - hits
+    if dedup:
+        summary["duplicates"] = duplicates
+        summary["dedup_bytes_saved"] = bytes_saved
+    if shards:
+        summary["shards"] = [str(p) for p in shards.paths]
+        summary["index"] = str(index_path_for(output_txt))
+    return summary
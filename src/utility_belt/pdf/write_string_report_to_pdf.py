@@ -1,109 +1,249 @@
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle, ListStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, ListFlowable, ListItem
+import os
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Iterable, Iterator, NamedTuple
 
-def generate_pdf_from_report(report_text: str, output_path: str) -> None:
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ListStyle, ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import ListFlowable, ListItem, Paragraph, SimpleDocTemplate, Spacer
+
+from utility_belt import metrics
+
+# One pass per line; alternatives are tried in the order the formats take
+# precedence: "## N: TITLE", "### TITLE", "N. item".
+_LINE = re.compile(r'##\s*\d+:\s*(?P<section>.+)|###\s*(?P<sub>.+)|\d+\.\s+(?P<item>.+)')
+
+# Reports in flight per worker in generate_pdfs.
+WINDOW_PER_WORKER = 4
+# Flowables queued ahead of the layout engine by generate_pdf_streaming.
+FLOWABLE_WINDOW = 256
+
+
+class ReportStyles(NamedTuple):
+    section: ParagraphStyle
+    sub: ParagraphStyle
+    body: ParagraphStyle
+    ordered_list: ListStyle
+
+
+class PdfResult(NamedTuple):
+    path: str
+    error: str | None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@lru_cache(maxsize=1)
+def report_styles() -> ReportStyles:
     """
-    Parse a markdown-like report_text into a formatted PDF.
-    
-    - Section headings: lines starting with "## N: TITLE"
-    - Sub-headings: lines starting with "### TITLE"
-    - Ordered lists: lines starting with "1. ", "2. ", etc.
-    - Paragraphs: other text blocks separated by blank lines.
-    
-    Args:
-      report_text: the full report string
-      output_path: file path to write the PDF (e.g. "./report.pdf")
+    Styles for report PDFs, built once per process.
     """
-    # 1. Set up document and styles
-    doc = SimpleDocTemplate(output_path, pagesize=letter,
-                            rightMargin=40, leftMargin=40, topMargin=40, bottomMargin=40)
     styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(name='SectionHeading', parent=styles['Heading1'], fontSize=16, spaceAfter=12))
-    styles.add(ParagraphStyle(name='SubHeading', parent=styles['Heading2'], fontSize=14, spaceAfter=8))
+    styles.add(ParagraphStyle(
+        name='SectionHeading', parent=styles['Heading1'], fontSize=16, spaceAfter=12
+    ))
+    styles.add(ParagraphStyle(
+        name='SubHeading', parent=styles['Heading2'], fontSize=14, spaceAfter=8
+    ))
     body_style = styles['BodyText']
-    list_style = ListStyle('OrderedList', leftIndent=20, bulletType='1', bulletFontName=body_style.fontName)
-    
-    flowables = []
-    
-    # 2. Tokenize into lines and process
-    lines = report_text.splitlines()
+    list_style = ListStyle(
+        'OrderedList', leftIndent=20, bulletType='1', bulletFontName=body_style.fontName
+    )
+    return ReportStyles(styles['SectionHeading'], styles['SubHeading'], body_style, list_style)
+
+
+def tokenize_line(line: str) -> tuple[str, str | None]:
+    """
+    Classify one report line as ("section" | "sub" | "item", text),
+    ("blank", None) or ("text", line).
+    """
+    m = _LINE.match(line)
+    if m:
+        kind = m.lastgroup
+        return kind, m.group(kind)
+    if not line.strip():
+        return "blank", None
+    return "text", line
+
+
+def iter_report_flowables(lines: Iterable[str], styles: ReportStyles | None = None):
+    """
+    Yield the flowables for report lines (see generate_pdf_from_report for
+    the format) as soon as each one is complete.
+    """
+    styles = styles or report_styles()
+    body_style = styles.body
     buffer = []           # accumulate paragraph lines
-    in_list = False
     list_items = []
-    
-    def flush_paragraph():
-        nonlocal buffer
-        text = ' '.join(l.strip() for l in buffer).strip()
+
+    def paragraph():
+        text = ' '.join(part.strip() for part in buffer).strip()
+        buffer.clear()
         if text:
-            flowables.append(Paragraph(text, body_style))
-            flowables.append(Spacer(1, 6))
-        buffer = []
-    
-    def flush_list():
-        nonlocal list_items
+            yield Paragraph(text, body_style)
+            yield Spacer(1, 6)
+
+    def ordered_list():
         if list_items:
-            lf = ListFlowable(
+            yield ListFlowable(
                 [ListItem(Paragraph(item, body_style)) for item in list_items],
-                style=list_style
+                style=styles.ordered_list
             )
-            flowables.append(lf)
-            flowables.append(Spacer(1, 6))
-        list_items = []
-    
+            yield Spacer(1, 6)
+        list_items.clear()
+
     for line in lines:
-        # Section heading
-        m_sec = re.match(r'##\s*\d+:\s*(.+)', line)
-        if m_sec:
+        kind, text = tokenize_line(line)
+        if kind == "section" or kind == "sub":
             # flush any pending text
-            if in_list:
-                flush_list()
-                in_list = False
-            flush_paragraph()
-            flowables.append(Paragraph(m_sec.group(1).upper(), styles['SectionHeading']))
-            continue
-        
-        # Sub-heading
-        m_sub = re.match(r'###\s*(.+)', line)
-        if m_sub:
-            if in_list:
-                flush_list()
-                in_list = False
-            flush_paragraph()
-            flowables.append(Paragraph(m_sub.group(1), styles['SubHeading']))
-            continue
-        
-        # Ordered-list item
-        m_li = re.match(r'\d+\.\s+(.+)', line)
-        if m_li:
-            if not in_list:
-                flush_paragraph()
-            in_list = True
-            list_items.append(m_li.group(1).strip())
-            continue
-        
-        # Blank line
-        if not line.strip():
-            if in_list:
-                flush_list()
-                in_list = False
+            yield from ordered_list()
+            yield from paragraph()
+            if kind == "section":
+                yield Paragraph(text.upper(), styles.section)
+            else:
+                yield Paragraph(text, styles.sub)
+        elif kind == "item":
+            if not list_items:
+                yield from paragraph()
+            list_items.append(text.strip())
+        elif kind == "blank":
+            if list_items:
+                yield from ordered_list()
             else:
-                flush_paragraph()
-            continue
-        
-        # Regular paragraph line
-        buffer.append(line)
-    
+                yield from paragraph()
+        else:
+            # Regular paragraph line
+            buffer.append(line)
+
     # Flush any trailing content
-    if in_list:
-        flush_list()
+    if list_items:
+        yield from ordered_list()
+    else:
+        yield from paragraph()
+
+
+def _document(output_path) -> SimpleDocTemplate:
+    if isinstance(output_path, os.PathLike):
+        output_path = os.fspath(output_path)  # reportlab wants str or a file object
+    return SimpleDocTemplate(output_path, pagesize=letter,
+                             rightMargin=40, leftMargin=40, topMargin=40, bottomMargin=40)
+
+
+def generate_pdf_from_report(report_text: str, output_path: str) -> None:
+    """
+    Parse a markdown-like report_text into a formatted PDF.
+
+    - Section headings: lines starting with "## N: TITLE"
+    - Sub-headings: lines starting with "### TITLE"
+    - Ordered lists: lines starting with "1. ", "2. ", etc.
+    - Paragraphs: other text blocks separated by blank lines.
+
+    Args:
+      report_text: the full report string
+      output_path: file path to write the PDF (e.g. "./report.pdf")
+
+    Timed as the pdf.tokenize and pdf.build metrics spans.
+    """
+    doc = _document(output_path)
+    with metrics.span("pdf.tokenize"):
+        flowables = list(iter_report_flowables(report_text.splitlines()))
+    metrics.count("pdf.flowables", len(flowables))  # build() empties the list.
+    with metrics.span("pdf.build"):
+        doc.build(flowables)
+    metrics.count("pdf.reports")
+
+
+class _FlowableFeed(list):
+    """
+    The list doc.build() consumes from the front, topped up from a flowable
+    iterator whenever it runs low, so only a window of the report exists at
+    a time. build() checks len() before every flowable, which drives the
+    refill; split remainders pushed back to the front are kept as usual.
+    """
+
+    def __init__(self, flowables, window: int | None = None):
+        super().__init__()
+        self._source = iter(flowables)
+        self._window = window or FLOWABLE_WINDOW
+
+    def __len__(self):
+        size = super().__len__()
+        if size < self._window and self._source is not None:
+            for f in self._source:
+                self.append(f)
+                size += 1
+                if size >= self._window * 2:
+                    break
+            else:
+                self._source = None
+        return size
+
+
+def _iter_lines(source):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "r", encoding="utf-8") as fh:
+            for line in fh:
+                yield line.rstrip("\r\n")
     else:
-        flush_paragraph()
-    
-    # 3. Build PDF
-    doc.build(flowables)
+        for line in source:
+            yield line.rstrip("\r\n")
+
+
+def generate_pdf_streaming(source, output_path) -> None:
+    """
+    Like generate_pdf_from_report, for reports too big to hold in memory:
+    source is a path to a UTF-8 text file or any iterable of lines (line
+    endings are stripped). Lines are read, tokenized and laid out lazily,
+    keeping about FLOWABLE_WINDOW flowables alive; for the same text the
+    output matches generate_pdf_from_report.
 
+    What still grows with the report is reportlab's record of finished
+    pages (a few KB of drawing operators each), held until the file is
+    written.
+
+    Tokenizing happens during layout, so the whole run is one pdf.build
+    metrics span.
+    """
+    doc = _document(output_path)
+    with metrics.span("pdf.build"):
+        doc.build(_FlowableFeed(iter_report_flowables(_iter_lines(source))))
+    metrics.count("pdf.reports")
+
+
+def _render_job(job) -> PdfResult:
+    report_text, output_path = job
+    try:
+        generate_pdf_from_report(report_text, output_path)
+        return PdfResult(str(output_path), None)
+    except Exception as e:
+        return PdfResult(str(output_path), f"{type(e).__name__}: {e}")
+
+
+def generate_pdfs(jobs: Iterable[tuple[str, str]], workers: int = 1) -> Iterator[PdfResult]:
+    """
+    Render (report_text, output_path) pairs and yield a PdfResult for each,
+    in input order. A failing report is reported in its result and the rest
+    of the batch carries on.
+
+    With workers > 1 reports render on a process pool whose workers build
+    their styles once; jobs is consumed lazily with a bounded number of
+    reports in flight, so it can be a generator over a very large batch.
+    """
+    if workers <= 1:
+        yield from map(_render_job, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=report_styles) as pool:
+        pending = deque()
+        for job in jobs:
+            pending.append(pool.submit(_render_job, job))
+            if len(pending) >= workers * WINDOW_PER_WORKER:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
 
 
 if __name__ == '__main__':
@@ -112,4 +252,4 @@ if __name__ == '__main__':
 """
 
     generate_pdf_from_report(report_markdown, 'melina_brand_alchemy.pdf')
-    print("PDF written to melina_brand_alchemy.pdf")
\ No newline at end of file
+    print("PDF written to melina_brand_alchemy.pdf")
@@ -0,0 +1,95 @@
+"""
+Command files for InMemoryDatabase.execute_batch, read as streams.
+
+Text files have one command per line, fields separated by tabs when the
+line has any, otherwise by whitespace; blank lines and lines starting with
+"#" are skipped:
+
+    SET 1000 user1 age 30
+    LOOK_BACK 1100 user1 age
+
+Binary files start with BINARY_MAGIC followed by record_codec records whose
+op code is COMMAND_CODES[name] and whose fields are (timestamp, key, *args);
+values keep their types and may contain any characters.
+
+    for result in db.execute_batch(read_command_file("replay.cmd")):
+        ...
+"""
+import io
+from typing import Iterable, Iterator
+
+from utility_belt.storage.record_codec import encode_record, read_records
+
+BINARY_MAGIC = b"UBCMD\x00\x01\n"
+
+COMMAND_CODES = {
+    "SET": 1,
+    "GET": 2,
+    "LOOK_BACK": 3,
+    "COMPARE_AND_SET": 4,
+    "COMPARE_AND_DELETE": 5,
+    "SET_WITH_TTL": 6,
+    "EXPIRE": 7,
+}
+_CODE_NAMES = {code: name for name, code in COMMAND_CODES.items()}
+
+
+def parse_command_line(line: str) -> tuple | None:
+    """
+    The command on one text line, or None for blank and comment lines.
+    """
+    line = line.rstrip("\r\n")
+    if not line.strip() or line.lstrip().startswith("#"):
+        return None
+    parts = line.split("\t") if "\t" in line else line.split()
+    if len(parts) < 3:
+        raise ValueError(f"malformed command line: {line!r}")
+    parts[1] = int(parts[1])
+    return tuple(parts)
+
+
+def iter_text_commands(lines: Iterable[str]) -> Iterator[tuple]:
+    for number, line in enumerate(lines, 1):
+        try:
+            command = parse_command_line(line)
+        except ValueError as e:
+            raise ValueError(f"line {number}: {e}") from None
+        if command is not None:
+            yield command
+
+
+def iter_binary_commands(fh) -> Iterator[tuple]:
+    """
+    Commands from a binary command file opened in "rb" mode.
+    """
+    if fh.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+        raise ValueError("not a binary command file")
+    for code, fields in read_records(fh):
+        name = _CODE_NAMES.get(code)
+        if name is None:
+            raise ValueError(f"unknown command code {code}")
+        yield (name, *fields)
+
+
+def write_binary_commands(commands: Iterable[tuple], fh) -> int:
+    """
+    Write commands to a binary file object; returns the number written.
+    """
+    fh.write(BINARY_MAGIC)
+    count = 0
+    for name, *fields in commands:
+        fh.write(encode_record(COMMAND_CODES[name], *fields))
+        count += 1
+    return count
+
+
+def read_command_file(path) -> Iterator[tuple]:
+    """
+    Stream the commands of a text or binary command file (detected from the
+    first bytes).
+    """
+    with open(path, "rb") as fh:
+        if fh.peek(len(BINARY_MAGIC))[:len(BINARY_MAGIC)] == BINARY_MAGIC:
+            yield from iter_binary_commands(fh)
+        else:
+            yield from iter_text_commands(io.TextIOWrapper(fh, encoding="utf-8"))
@@ -1,94 +1,336 @@
-class InMemoryDatabase:
+import heapq
+from array import array
+from bisect import bisect_right
+from itertools import islice
+
+from utility_belt.storage.key_index import SortedKeyIndex
+
+
+def _takewhile_prefix(keys, prefix):
+    for key in keys:
+        if not key.startswith(prefix):
+            return
+        yield key
+
+
+class FieldHistory:
+    """
+    Versions of one field as parallel columns sorted by timestamp: an
+    array('q') of timestamps and a list of values. Versions with equal
+    timestamps keep their write order.
+    """
+
+    __slots__ = ("times", "values")
+
     def __init__(self):
-        self.data = {}  # Stores key -> {field -> [(timestamp, value), ...]}
+        self.times = array("q")
+        self.values = []
+
+    def __len__(self):
+        return len(self.times)
+
+    def add(self, timestamp: int, value) -> None:
+        times = self.times
+        if not times or timestamp >= times[-1]:
+            times.append(timestamp)
+            self.values.append(value)
+        else:
+            # Out-of-order write: insert after any versions with the same timestamp.
+            i = bisect_right(times, timestamp)
+            times.insert(i, timestamp)
+            self.values.insert(i, value)
+
+    def latest(self):
+        return self.values[-1]
+
+    def at(self, timestamp: int, default=""):
+        """
+        Value of the newest version at or before timestamp.
+        """
+        i = bisect_right(self.times, timestamp)
+        return self.values[i - 1] if i else default
+
+    def trim(self, max_versions: int | None = None, min_timestamp: int | None = None) -> None:
+        """
+        Drop the oldest versions beyond the newest max_versions, and those
+        superseded before min_timestamp (the version current at min_timestamp
+        stays so look-backs from then on are still answered).
+        """
+        drop = 0
+        if max_versions is not None:
+            drop = len(self.times) - max_versions
+        if min_timestamp is not None:
+            drop = max(drop, bisect_right(self.times, min_timestamp) - 1)
+        if drop > 0:
+            del self.times[:drop]
+            del self.values[:drop]
+
+
+# Command handlers for execute_batch: (db, timestamp, key, *args) -> result,
+# for commands shaped like ("SET", timestamp, key, field, value).
+COMMANDS = {
+    "SET": lambda db, ts, key, field, value: db.set(key, field, value, ts),
+    "GET": lambda db, ts, key, field: db.get(key, field, ts),
+    "LOOK_BACK": lambda db, ts, key, field: db.look_back(key, field, ts),
+    "COMPARE_AND_SET": lambda db, ts, key, field, expected, new: db.compare_and_set(
+        key, field, expected, new, ts
+    ),
+    "COMPARE_AND_DELETE": lambda db, ts, key, field, expected: db.compare_and_delete(
+        key, field, expected, ts
+    ),
+    "SET_WITH_TTL": lambda db, ts, key, field, value, ttl: db.set_with_ttl(
+        key, field, value, ts, ttl
+    ),
+    "EXPIRE": lambda db, ts, key, ttl: db.expire(key, ts, ttl),
+}
+READ_COMMANDS = frozenset({"GET", "LOOK_BACK"})
+
+
+class InMemoryDatabase:
+    def __init__(self, max_versions: int | None = None, max_age: int | None = None):
+        """
+        Optional history retention, applied to a field whenever it is written:
+        keep at most max_versions versions, and/or drop versions that were
+        superseded more than max_age before the write's timestamp.
+        """
+        if max_versions is not None and max_versions < 1:
+            raise ValueError("max_versions must be at least 1")
+        self.max_versions = max_versions
+        self.max_age = max_age
+        self.data = {}  # Stores key -> {field -> FieldHistory}
         self.expiry_times = {}  # Stores key-expiration time pairs
+        self.key_index = SortedKeyIndex()  # The keys of data, in order, for scans.
+        # (expires_at, key) min-heap for advance_to. Entries whose time no
+        # longer matches expiry_times are stale and skipped when popped.
+        self._expiry_heap = []
 
     def _is_expired(self, key, timestamp):
         if key in self.expiry_times and self.expiry_times[key] <= int(timestamp):
-            del self.data[key]
-            del self.expiry_times[key]
+            self._drop_key(key)
             return True
         return False
 
+    def _drop_key(self, key):
+        if self.data.pop(key, None) is not None:
+            self.key_index.discard(key)
+        self.expiry_times.pop(key, None)
+
+    def _set_expiry(self, key, expires_at):
+        self.expiry_times[key] = expires_at
+        heap = self._expiry_heap
+        heapq.heappush(heap, (expires_at, key))
+        if len(heap) > 2 * len(self.expiry_times) + 64:
+            # Mostly stale after many TTL updates: rebuild from the live times.
+            self._rebuild_expiry_heap()
+
+    def _rebuild_indexes(self):
+        """
+        Rebuild the key index and expiry heap after data / expiry_times
+        were filled directly (e.g. from a snapshot).
+        """
+        self.key_index = SortedKeyIndex(self.data)
+        self._rebuild_expiry_heap()
+
+    def _rebuild_expiry_heap(self):
+        heap = [(t, k) for k, t in self.expiry_times.items()]
+        heapq.heapify(heap)
+        self._expiry_heap = heap
+
+    def _history(self, key, field, create=False):
+        """
+        The FieldHistory of key/field, or None; with create, missing records
+        are made.
+        """
+        fields = self.data.get(key)
+        if fields is None:
+            if not create:
+                return None
+            fields = self.data[key] = {}
+            self.key_index.add(key)
+        history = fields.get(field)
+        if history is None and create:
+            history = fields[field] = FieldHistory()
+        return history
+
+    def _drop_field(self, key, field):
+        fields = self.data[key]
+        del fields[field]
+        if not fields:  # Clean up empty records to prevent memory bloat
+            self._drop_key(key)
+
+    # Every change to data / expiry_times goes through _put, _drop_field,
+    # _drop_key and _set_expiry, so subclasses can observe state changes
+    # (DurableInMemoryDatabase logs them).
+    def _put(self, key, field, value, timestamp):
+        history = self._history(key, field, create=True)
+        history.add(timestamp, value)
+        if self.max_versions is not None or self.max_age is not None:
+            min_timestamp = timestamp - self.max_age if self.max_age is not None else None
+            history.trim(self.max_versions, min_timestamp)
+
     def set(self, key, field, value, timestamp):
-        if not self._is_expired(key, timestamp):
-            if key not in self.data:
-                self.data[key] = {}
-            if field not in self.data[key]:
-                self.data[key][field] = []
-            self.data[key][field].append((int(timestamp), value))
+        # A key whose TTL has run out is evicted first; the write then starts
+        # a fresh record, whether or not advance_to already swept it.
+        self._is_expired(key, timestamp)
+        self._put(key, field, value, int(timestamp))
+        return ""
+
+    def set_with_ttl(self, key, field, value, timestamp, ttl):
+        """
+        set, then expire the whole key ttl after timestamp.
+        """
+        self.set(key, field, value, timestamp)
+        if key in self.data:
+            self._set_expiry(key, int(timestamp) + int(ttl))
         return ""
 
+    def expire(self, key, timestamp, ttl):
+        """
+        Expire an existing key ttl after timestamp, replacing any earlier TTL.
+        """
+        if key in self.data and not self._is_expired(key, timestamp):
+            self._set_expiry(key, int(timestamp) + int(ttl))
+            return "true"
+        return "false"
+
+    def advance_to(self, timestamp):
+        """
+        Evict every key whose TTL ran out at or before timestamp, including
+        keys nothing reads again. Costs O(log n) per expiry that has come
+        due. Returns the number of keys evicted.
+        """
+        timestamp = int(timestamp)
+        heap = self._expiry_heap
+        expiry_times = self.expiry_times
+        evicted = 0
+        while heap and heap[0][0] <= timestamp:
+            expires_at, key = heapq.heappop(heap)
+            if expiry_times.get(key) == expires_at:
+                self._drop_key(key)
+                evicted += 1
+        return evicted
+
     def get(self, key, field, timestamp):
         if key in self.data and not self._is_expired(key, timestamp):
-            if field in self.data[key]:
-                return self.data[key][field][-1][1]  # Return the most recent value
+            history = self._history(key, field)
+            if history is not None:
+                return history.latest()  # Return the most recent value
         return ""
 
     def compare_and_set(self, key, field, expected_value, new_value, timestamp):
-        if key in self.data and not self._is_expired(key, timestamp) and field in self.data[key]:
-            if self.data[key][field][-1][1] == expected_value:
-                self.data[key][field].append((int(timestamp), new_value))
+        if key in self.data and not self._is_expired(key, timestamp):
+            history = self._history(key, field)
+            if history is not None and history.latest() == expected_value:
+                self._put(key, field, new_value, int(timestamp))
                 return "true"
         return "false"
 
     def compare_and_delete(self, key, field, expected_value, timestamp):
-        if key in self.data and not self._is_expired(key, timestamp) and field in self.data[key]:
-            if self.data[key][field][-1][1] == expected_value:
-                del self.data[key][field]
-                if not self.data[key]:  # Clean up empty records to prevent memory bloat
-                    del self.data[key]
+        if key in self.data and not self._is_expired(key, timestamp):
+            history = self._history(key, field)
+            if history is not None and history.latest() == expected_value:
+                self._drop_field(key, field)
                 return "true"
         return "false"
 
     def look_back(self, key, field, past_timestamp):
         """Retrieve the value of a field at a specific past timestamp."""
-        if key in self.data:
-            if field in self.data[key]:
-                values = self.data[key][field]
-                # Find the most recent value before or at 'past_timestamp'
-                for timestamp, value in reversed(values):
-                    if timestamp <= int(past_timestamp):
-                        return value
+        history = self._history(key, field)
+        if history is not None:
+            # Most recent value at or before 'past_timestamp', by binary search
+            return history.at(int(past_timestamp))
         return ""
 
-# Instantiate the database and perform tests
-db = InMemoryDatabase()
-
-# Test sequence
-test_queries = [
-    ("SET", 1000, "user1", "age", "30"),
-    ("SET", 1500, "user1", "age", "31"),
-    ("LOOK_BACK", 1100, "user1", "age"),
-    ("GET", 1600, "user1", "age"),
-    ("COMPARE_AND_SET", 1700, "user1", "age", "31", "32"),
-    ("GET", 1800, "user1", "age"),
-    ("COMPARE_AND_DELETE", 1900, "user1", "age", "32"),
-    ("GET", 2000, "user1", "age")
-]
-
-# Execute test queries and collect results
-results = []
-for query in test_queries:
-    if query[0] == "SET":
-        _, timestamp, key, field, value = query
-        result = db.set(key, field, value, timestamp)
-        results.append(result)
-    elif query[0] == "LOOK_BACK":
-        _, past_timestamp, key, field = query
-        result = db.look_back(key, field, past_timestamp)
-        results.append(result)
-    elif query[0] == "GET":
-        _, timestamp, key, field = query
-        result = db.get(key, field, timestamp)
-        results.append(result)
-    elif query[0] == "COMPARE_AND_SET":
-        _, timestamp, key, field, expected_value, new_value = query
-        result = db.compare_and_set(key, field, expected_value, new_value, timestamp)
-        results.append(result)
-    elif query[0] == "COMPARE_AND_DELETE":
-        _, timestamp, key, field, expected_value = query
-        result = db.compare_and_delete(key, field, expected_value, timestamp)
-        results.append(result)
-
-print(results)
+    def _live(self, key, timestamp) -> bool:
+        expires_at = self.expiry_times.get(key)
+        return expires_at is None or expires_at > timestamp
+
+    def scan_range(self, start, end, timestamp, limit=None):
+        """
+        Keys start <= key < end (None: unbounded) in order, leaving out keys
+        expired at timestamp; at most limit of them. O(log n + k).
+        """
+        timestamp = int(timestamp)
+        keys = (k for k in self.key_index.irange(start, end) if self._live(k, timestamp))
+        return list(islice(keys, limit))
+
+    def scan_prefix(self, prefix, timestamp, limit=None):
+        """
+        Keys starting with prefix in order, leaving out keys expired at
+        timestamp; at most limit of them. O(log n + k).
+        """
+        timestamp = int(timestamp)
+        keys = _takewhile_prefix(self.key_index.irange(prefix), prefix)
+        return list(islice((k for k in keys if self._live(k, timestamp)), limit))
+
+    def scan_page(self, timestamp, start=None, end=None, prefix=None, limit=100, cursor=None):
+        """
+        One page of a key scan (by range and/or prefix) that can be resumed:
+        returns (keys, next_cursor), with next_cursor None after the last
+        page. Pass next_cursor back to continue; it is the last key returned,
+        so pages stay consistent while keys are added or removed.
+        """
+        timestamp = int(timestamp)
+        if prefix is not None and (start is None or prefix > start):
+            start = prefix
+        keys = self.key_index.irange(start, end, after=cursor)
+        if prefix is not None:
+            keys = _takewhile_prefix(keys, prefix)
+        page = list(islice((k for k in keys if self._live(k, timestamp)), limit + 1))
+        if len(page) > limit:
+            page.pop()
+            return page, page[-1]
+        return page, None
+
+    def scan_fields(self, key, timestamp, start=None, end=None):
+        """
+        (field, current value) of key's fields with start <= field < end, in
+        order; empty if the key is missing or expired at timestamp.
+        """
+        fields = self.data.get(key)
+        if fields is None or not self._live(key, int(timestamp)):
+            return []
+        return [
+            (field, fields[field].latest())
+            for field in sorted(fields)
+            if (start is None or field >= start) and (end is None or field < end)
+        ]
+
+    def execute_batch(self, commands):
+        """
+        Run (NAME, timestamp, key, *args) commands (see COMMANDS) in order and
+        yield each result; commands are consumed lazily, so this can replay
+        streams of any length (e.g. storage.commands.read_command_file).
+
+        GET / LOOK_BACK on keys without a TTL are answered straight from the
+        key's field histories; everything else goes through the methods, so
+        results are the same as calling them one by one. Unknown commands
+        raise ValueError.
+        """
+        data = self.data
+        expiry_times = self.expiry_times
+        set_ = self.set
+        for command in commands:
+            name = command[0]
+            if name == "SET":  # The most common write, without the table hop.
+                _, ts, key, field, value = command
+                yield set_(key, field, value, ts)
+                continue
+            if name in READ_COMMANDS:
+                key = command[2]
+                fields = data.get(key)
+                if fields is None:
+                    yield ""
+                    continue
+                if key not in expiry_times:
+                    _, ts, _, field = command
+                    history = fields.get(field)
+                    if history is None:
+                        yield ""
+                    else:
+                        yield history.latest() if name == "GET" else history.at(int(ts))
+                    continue
+            handler = COMMANDS.get(name)
+            if handler is None:
+                raise ValueError(f"unknown command {name!r}")
+            yield handler(self, *command[1:])
@@ -0,0 +1,100 @@
+"""
+Ordered set of keys for range and prefix scans.
+
+SortedKeyIndex keeps keys in sorted blocks of about BLOCK_SIZE keys, with
+the last key of every block in a separate list: finding a position is two
+bisects, inserting or removing moves at most one block's worth of items, and
+iterating from a position is a walk over the blocks. Keys must be mutually
+comparable (e.g. all str).
+"""
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator
+
+BLOCK_SIZE = 512
+
+
+class SortedKeyIndex:
+    def __init__(self, keys: Iterable = ()):
+        ordered = sorted(set(keys))
+        self._blocks = [ordered[i:i + BLOCK_SIZE] for i in range(0, len(ordered), BLOCK_SIZE)]
+        self._maxes = [block[-1] for block in self._blocks]
+        self._len = len(ordered)
+
+    def __len__(self):
+        return self._len
+
+    def __contains__(self, key) -> bool:
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return False
+        block = self._blocks[i]
+        j = bisect_left(block, key)
+        return block[j] == key
+
+    def __iter__(self) -> Iterator:
+        for block in self._blocks:
+            yield from block
+
+    def add(self, key) -> None:
+        maxes = self._maxes
+        if not maxes:
+            self._blocks.append([key])
+            maxes.append(key)
+            self._len = 1
+            return
+        i = bisect_left(maxes, key)
+        if i == len(maxes):
+            i -= 1  # Beyond every key: goes at the end of the last block.
+        block = self._blocks[i]
+        j = bisect_left(block, key)
+        if j < len(block) and block[j] == key:
+            return
+        block.insert(j, key)
+        maxes[i] = block[-1]
+        self._len += 1
+        if len(block) > 2 * BLOCK_SIZE:
+            self._blocks[i:i + 1] = [block[:BLOCK_SIZE], block[BLOCK_SIZE:]]
+            maxes[i:i + 1] = [block[BLOCK_SIZE - 1], block[-1]]
+
+    def discard(self, key) -> None:
+        maxes = self._maxes
+        i = bisect_left(maxes, key)
+        if i == len(maxes):
+            return
+        block = self._blocks[i]
+        j = bisect_left(block, key)
+        if block[j] != key:
+            return
+        del block[j]
+        self._len -= 1
+        if block:
+            maxes[i] = block[-1]
+        else:
+            del self._blocks[i]
+            del maxes[i]
+
+    def irange(self, start=None, stop=None, after=None) -> Iterator:
+        """
+        Keys k with start <= k < stop in order (None: unbounded); with after,
+        only keys > after (to resume a scan past the last key seen).
+        """
+        maxes = self._maxes
+        if after is not None and (start is None or after >= start):
+            i = bisect_right(maxes, after)
+            find = bisect_right
+            first = after
+        elif start is not None:
+            i = bisect_left(maxes, start)
+            find = bisect_left
+            first = start
+        else:
+            i, find, first = 0, None, None
+        blocks = self._blocks
+        for n in range(i, len(blocks)):
+            block = blocks[n]
+            j = find(block, first) if n == i and find is not None else 0
+            for k in range(j, len(block)):
+                key = block[k]
+                if stop is not None and key >= stop:
+                    return
+                yield key
@@ -0,0 +1,344 @@
+"""
+Durable InMemoryDatabase: append-only operation log plus binary snapshots.
+
+Every state change (field write, field/key removal, TTL) is appended to
+``log.<generation>`` as a framed record (see record_codec); records are
+written and fsynced in groups, so one fsync covers many writes. compact()
+writes the whole state to ``snapshot.bin`` and starts a fresh, empty log of
+the next generation; it runs on its own once the log passes compact_bytes.
+Opening the directory again loads the snapshot through mmap and replays only
+the current log, truncating a torn tail left by a crash.
+
+    with DurableInMemoryDatabase("state/") as db:
+        db.set("user1", "age", "30", 1000)
+"""
+import mmap
+import os
+import threading
+import time
+from pathlib import Path
+
+from utility_belt.storage.in_memory_database import FieldHistory, InMemoryDatabase
+from utility_belt.storage.record_codec import encode_record, iter_records
+
+# Log records: the state changes InMemoryDatabase makes.
+OP_PUT = 1  # key, field, value, timestamp
+OP_DROP_FIELD = 2  # key, field
+OP_DROP_KEY = 3  # key
+OP_EXPIRY = 4  # key, expires_at
+
+# Snapshot records; TTLs are stored as OP_EXPIRY.
+SNAP_HEADER = 16  # format version, log generation the snapshot starts
+SNAP_FIELD = 17  # key, field, timestamps (array('q') bytes), *values
+SNAP_END = 18  # field count, TTL count
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_NAME = "snapshot.bin"
+DEFAULT_GROUP_SIZE = 256
+DEFAULT_GROUP_INTERVAL = 0.005
+DEFAULT_COMPACT_BYTES = 64 * 1024 * 1024
+
+
+def log_name(generation: int) -> str:
+    return f"log.{generation:06d}"
+
+
+def _fsync_dir(directory: Path) -> None:
+    if os.name == "posix":
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def _mapped_records(path: Path):
+    """
+    Yield (op, fields, end_offset) from the file at path through mmap; an
+    empty or missing file yields nothing.
+    """
+    try:
+        fh = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            return
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            records = iter_records(mm)
+            try:
+                yield from records
+            finally:
+                records.close()  # Release its view of mm before unmapping.
+
+
+class AppendOnlyLog:
+    """
+    Appends records to a file, writing and fsyncing them in groups: when
+    group_size records are pending or group_interval seconds have passed
+    since the last sync. A record that is still pending when no further
+    append comes is synced by a background timer, so every record is on
+    disk at most about group_interval after append() returns. sync() forces
+    a sync; close() syncs.
+    """
+
+    def __init__(self, path, group_size: int = DEFAULT_GROUP_SIZE,
+                 group_interval: float = DEFAULT_GROUP_INTERVAL):
+        self.path = Path(path)
+        self.group_size = group_size
+        self.group_interval = group_interval
+        self._fh = open(self.path, "ab")
+        self.size = self._fh.tell()
+        self.bytes_written = 0
+        self.syncs = 0
+        self._pending = []
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def append(self, record: bytes) -> None:
+        with self._lock:
+            self._pending.append(record)
+            self.size += len(record)
+            if (
+                len(self._pending) >= self.group_size
+                or time.monotonic() - self._last_sync >= self.group_interval
+            ):
+                self._sync()
+            elif self._timer is None:
+                # A running timer already covers this record.
+                self._timer = threading.Timer(self.group_interval, self._sync_due)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _sync_due(self) -> None:
+        with self._lock:
+            self._timer = None
+            if self._pending and not self._fh.closed:
+                self._sync()
+
+    def sync(self) -> None:
+        with self._lock:
+            self._sync()
+
+    def _sync(self) -> None:
+        # Caller holds the lock.
+        if self._pending:
+            data = b"".join(self._pending)
+            self._pending.clear()
+            self._fh.write(data)
+            self.bytes_written += len(data)
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self.syncs += 1
+        self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._fh.closed:
+                self._sync()
+                self._fh.close()
+
+
+def write_snapshot(db: InMemoryDatabase, path, generation: int) -> int:
+    """
+    Write db's state to path atomically (temp file, fsync, rename). Returns
+    the snapshot size in bytes.
+    """
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    fields = 0
+    with open(tmp, "wb") as fh:
+        fh.write(encode_record(SNAP_HEADER, SNAPSHOT_VERSION, generation))
+        for key, histories in db.data.items():
+            for field, history in histories.items():
+                times = history.times.tobytes()
+                fh.write(encode_record(SNAP_FIELD, key, field, times, *history.values))
+                fields += 1
+        for key, expires_at in db.expiry_times.items():
+            fh.write(encode_record(OP_EXPIRY, key, expires_at))
+        fh.write(encode_record(SNAP_END, fields, len(db.expiry_times)))
+        size = fh.tell()
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+    _fsync_dir(path.parent)
+    return size
+
+
+def load_snapshot(db: InMemoryDatabase, path) -> int:
+    """
+    Load a snapshot into the empty db; returns the log generation it starts
+    (0 without a snapshot). Raises ValueError on an incomplete snapshot.
+    """
+    generation = None
+    complete = False
+    for op, fields, _ in _mapped_records(Path(path)):
+        if op == SNAP_FIELD:
+            key, field, times, *values = fields
+            history = FieldHistory()
+            history.times.frombytes(times)
+            history.values = values
+            db.data.setdefault(key, {})[field] = history
+        elif op == OP_EXPIRY:
+            db.expiry_times[fields[0]] = fields[1]
+        elif op == SNAP_HEADER:
+            if fields[0] != SNAPSHOT_VERSION:
+                raise ValueError(f"unsupported snapshot version {fields[0]}")
+            generation = fields[1]
+        elif op == SNAP_END:
+            complete = True
+    if generation is None:
+        return 0
+    if not complete:
+        raise ValueError(f"incomplete snapshot: {path}")
+    db._rebuild_indexes()
+    return generation
+
+
+class DurableInMemoryDatabase(InMemoryDatabase):
+    """
+    InMemoryDatabase whose state survives restarts (see module docstring).
+    A write reaches disk (written and fsynced) with its group: at the latest
+    about group_interval seconds after it was made, even if nothing else is
+    written, or sooner once group_size writes are pending. A crash loses at
+    most the writes of that window. Call sync() to make everything so far
+    durable at once, and close() (or use it as a context manager) when done.
+    """
+
+    def __init__(self, directory, max_versions: int | None = None, max_age: int | None = None,
+                 group_size: int = DEFAULT_GROUP_SIZE,
+                 group_interval: float = DEFAULT_GROUP_INTERVAL,
+                 compact_bytes: int = DEFAULT_COMPACT_BYTES):
+        super().__init__(max_versions, max_age)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.compact_bytes = compact_bytes
+        self._group = (group_size, group_interval)
+        self._log = None
+        self._suspended = True  # Nothing is logged while recovering.
+        self._snapshot_bytes = 0
+        self._log_bytes = 0
+        self._syncs = 0
+        self._compactions = 0
+        self.generation = load_snapshot(self, self.directory / SNAPSHOT_NAME)
+        self.replayed = self._replay(self.directory / log_name(self.generation))
+        for stale in self.directory.glob("log.*"):
+            if stale.name != log_name(self.generation):
+                stale.unlink()  # Left behind by an interrupted compaction.
+        self._log = AppendOnlyLog(self.directory / log_name(self.generation), *self._group)
+        self._suspended = False
+
+    def _replay(self, path: Path) -> int:
+        apply = {
+            OP_PUT: self._put,
+            OP_DROP_FIELD: self._drop_field,
+            OP_DROP_KEY: self._drop_key,
+            OP_EXPIRY: self._set_expiry,
+        }
+        count = end = 0
+        for op, fields, end in _mapped_records(path):
+            apply[op](*fields)
+            count += 1
+        if path.exists() and path.stat().st_size > end:
+            # Torn tail from a crash mid-write: cut it so appends follow valid records.
+            with open(path, "r+b") as fh:
+                fh.truncate(end)
+        return count
+
+    # Changes are logged after they are applied, so a compaction triggered
+    # by the append includes them in its snapshot.
+    def _record(self, op, *fields) -> bytes | None:
+        # None while replaying (nothing is logged then).
+        if self._suspended:
+            return None
+        if self._log is None:
+            raise ValueError("database is closed")
+        return encode_record(op, *fields)
+
+    def _write(self, record: bytes | None) -> None:
+        if record is None:
+            return
+        self._log.append(record)
+        if self._log.size >= self.compact_bytes:
+            self.compact()
+
+    def _append(self, op, *fields):
+        self._write(self._record(op, *fields))
+
+    def _put(self, key, field, value, timestamp):
+        # Encode first: a value the codec rejects must not reach memory either.
+        record = self._record(OP_PUT, key, field, value, timestamp)
+        super()._put(key, field, value, timestamp)
+        self._write(record)
+
+    def _drop_field(self, key, field):
+        # Replaying the drop repeats the key cleanup, so that is not logged.
+        suspended, self._suspended = self._suspended, True
+        try:
+            super()._drop_field(key, field)
+        finally:
+            self._suspended = suspended
+        self._append(OP_DROP_FIELD, key, field)
+
+    def _drop_key(self, key):
+        present = key in self.data or key in self.expiry_times
+        super()._drop_key(key)
+        if present:
+            self._append(OP_DROP_KEY, key)
+
+    def _set_expiry(self, key, expires_at):
+        super()._set_expiry(key, expires_at)
+        self._append(OP_EXPIRY, key, expires_at)
+
+    def _retire_log(self) -> AppendOnlyLog:
+        log, self._log = self._log, None
+        log.close()
+        self._log_bytes += log.bytes_written
+        self._syncs += log.syncs
+        return log
+
+    def compact(self) -> None:
+        """
+        Snapshot the current state and start an empty log of the next
+        generation. The snapshot is in place before the old log goes, so a
+        crash at any point leaves a consistent pair.
+        """
+        old = self._retire_log()
+        generation = self.generation + 1
+        self._snapshot_bytes += write_snapshot(self, self.directory / SNAPSHOT_NAME, generation)
+        self._log = AppendOnlyLog(self.directory / log_name(generation), *self._group)
+        _fsync_dir(self.directory)
+        old.path.unlink()
+        self.generation = generation
+        self._compactions += 1
+
+    def sync(self) -> None:
+        self._log.sync()
+
+    def close(self) -> None:
+        if self._log is not None:
+            self._retire_log()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def stats(self) -> dict:
+        """
+        Bytes written to the log and to snapshots, fsyncs, compactions.
+        """
+        log = self._log
+        return {
+            "log_bytes": self._log_bytes + (log.bytes_written if log else 0),
+            "snapshot_bytes": self._snapshot_bytes,
+            "syncs": self._syncs + (log.syncs if log else 0),
+            "compactions": self._compactions,
+            "generation": self.generation,
+        }
@@ -0,0 +1,116 @@
+"""
+Framed binary records for logs, snapshots and command files.
+
+A record is ``<u32 payload length><u32 crc32(payload)><payload>`` where the
+payload is an operation code byte followed by tagged fields (str, bytes,
+int, float, bool or None). Readers stop cleanly at the first truncated or
+corrupt record, which is how a torn log tail is detected.
+"""
+import struct
+import zlib
+from typing import Iterator
+
+HEADER = struct.Struct("<II")
+_U32 = struct.Struct("<I")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+
+_STR, _BYTES, _INT, _FLOAT, _NONE, _TRUE, _FALSE = b"sbifNTF"
+
+
+def encode_fields(op: int, fields) -> bytes:
+    parts = [bytes((op,))]
+    for value in fields:
+        if isinstance(value, str):
+            data = value.encode("utf-8")
+            parts += (b"s", _U32.pack(len(data)), data)
+        elif isinstance(value, bool):
+            parts.append(b"T" if value else b"F")
+        elif isinstance(value, int):
+            parts += (b"i", _I64.pack(value))
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            parts += (b"b", _U32.pack(len(value)), bytes(value))
+        elif isinstance(value, float):
+            parts += (b"f", _F64.pack(value))
+        elif value is None:
+            parts.append(b"N")
+        else:
+            raise TypeError(f"cannot encode {type(value).__name__} value {value!r}")
+    return b"".join(parts)
+
+
+def encode_record(op: int, *fields) -> bytes:
+    payload = encode_fields(op, fields)
+    return HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def decode_payload(payload) -> tuple[int, tuple]:
+    """
+    (op, fields) for one record payload (bytes or memoryview).
+    """
+    view = memoryview(payload)
+    end = len(view)
+    pos = 1
+    fields = []
+    while pos < end:
+        tag = view[pos]
+        pos += 1
+        if tag == _STR or tag == _BYTES:
+            (n,) = _U32.unpack_from(view, pos)
+            pos += 4
+            chunk = view[pos:pos + n]
+            fields.append(str(chunk, "utf-8") if tag == _STR else chunk.tobytes())
+            pos += n
+        elif tag == _INT:
+            fields.append(_I64.unpack_from(view, pos)[0])
+            pos += 8
+        elif tag == _FLOAT:
+            fields.append(_F64.unpack_from(view, pos)[0])
+            pos += 8
+        elif tag == _NONE:
+            fields.append(None)
+        elif tag == _TRUE or tag == _FALSE:
+            fields.append(tag == _TRUE)
+        else:
+            raise ValueError(f"unknown field tag {tag!r} at {pos - 1}")
+    if pos != end:
+        raise ValueError("field overruns record")
+    return view[0], tuple(fields)
+
+
+def iter_records(buffer, offset: int = 0) -> Iterator[tuple[int, tuple, int]]:
+    """
+    Yield (op, fields, end_offset) for consecutive records in buffer (bytes,
+    mmap, ...) from offset, stopping at the end or at the first truncated or
+    corrupt record; the last end_offset is where valid data ends.
+    """
+    view = memoryview(buffer)
+    size = len(view)
+    while offset + HEADER.size <= size:
+        length, crc = HEADER.unpack_from(view, offset)
+        start = offset + HEADER.size
+        payload = view[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc or not length:
+            return
+        op, fields = decode_payload(payload)
+        offset = start + length
+        yield op, fields, offset
+
+
+def read_records(fh, chunk_size: int = 1 << 20) -> Iterator[tuple[int, tuple]]:
+    """
+    Stream (op, fields) from a binary file object without loading it whole.
+    Raises ValueError if the file ends in a truncated or corrupt record.
+    """
+    buffer = bytearray()
+    while True:
+        chunk = fh.read(chunk_size)
+        buffer += chunk
+        used = 0
+        for op, fields, used in iter_records(bytes(buffer)):
+            yield op, fields
+        del buffer[:used]
+        if not chunk:
+            if buffer:
+                raise ValueError(f"truncated or corrupt record ({len(buffer)} bytes left)")
+            return
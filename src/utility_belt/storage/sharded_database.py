@@ -0,0 +1,99 @@
+"""
+Thread-safe InMemoryDatabase for sharing between threads.
+
+ShardedInMemoryDatabase partitions keys over N InMemoryDatabase shards, each
+behind its own lock: operations on keys in different shards do not wait for
+each other, and every operation (including the read-modify-write of
+compare_and_set / compare_and_delete) runs under its key's shard lock, so it
+is linearizable per key. batch() runs several operations atomically, taking
+the shard locks it needs in ascending shard order so concurrent batches
+cannot deadlock.
+
+    db = ShardedInMemoryDatabase(shards=16)
+    db.batch([
+        ("compare_and_set", "acct:1", "balance", "100", "90", ts),
+        ("compare_and_set", "acct:2", "balance", "0", "10", ts),
+    ])
+"""
+import threading
+from contextlib import ExitStack
+from typing import Iterable
+
+from utility_belt.storage.in_memory_database import InMemoryDatabase
+
+DEFAULT_SHARDS = 16
+
+# Operations batch() accepts, as InMemoryDatabase method names.
+BATCH_OPERATIONS = frozenset({
+    "set", "get", "compare_and_set", "compare_and_delete", "look_back",
+    "set_with_ttl", "expire",
+})
+
+
+class ShardedInMemoryDatabase:
+    def __init__(self, shards: int = DEFAULT_SHARDS, **options):
+        """
+        options (max_versions, max_age) are passed to every shard.
+        """
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        self.shards = [InMemoryDatabase(**options) for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+
+    def shard_of(self, key) -> int:
+        return hash(key) % len(self.shards)
+
+    def _call(self, name, key, *args):
+        i = self.shard_of(key)
+        with self._locks[i]:
+            return getattr(self.shards[i], name)(key, *args)
+
+    def set(self, key, field, value, timestamp):
+        return self._call("set", key, field, value, timestamp)
+
+    def get(self, key, field, timestamp):
+        return self._call("get", key, field, timestamp)
+
+    def compare_and_set(self, key, field, expected_value, new_value, timestamp):
+        return self._call("compare_and_set", key, field, expected_value, new_value, timestamp)
+
+    def compare_and_delete(self, key, field, expected_value, timestamp):
+        return self._call("compare_and_delete", key, field, expected_value, timestamp)
+
+    def look_back(self, key, field, past_timestamp):
+        return self._call("look_back", key, field, past_timestamp)
+
+    def set_with_ttl(self, key, field, value, timestamp, ttl):
+        return self._call("set_with_ttl", key, field, value, timestamp, ttl)
+
+    def expire(self, key, timestamp, ttl):
+        return self._call("expire", key, timestamp, ttl)
+
+    def advance_to(self, timestamp) -> int:
+        """
+        InMemoryDatabase.advance_to on every shard, one shard lock at a time.
+        """
+        evicted = 0
+        for lock, shard in zip(self._locks, self.shards):
+            with lock:
+                evicted += shard.advance_to(timestamp)
+        return evicted
+
+    def batch(self, operations: Iterable[tuple]) -> list:
+        """
+        Run (method_name, key, *args) operations in order as one atomic step
+        and return their results. No other operation on the keys involved
+        can interleave; unknown method names raise ValueError before anything
+        runs.
+        """
+        operations = list(operations)
+        for op in operations:
+            if op[0] not in BATCH_OPERATIONS:
+                raise ValueError(f"unsupported batch operation: {op[0]!r}")
+        routed = [(self.shard_of(op[1]), op) for op in operations]
+        # Fixed (ascending) lock order: two batches never wait on each other in a cycle.
+        needed = sorted({i for i, _ in routed})
+        with ExitStack() as stack:
+            for i in needed:
+                stack.enter_context(self._locks[i])
+            return [getattr(self.shards[i], op[0])(*op[1:]) for i, op in routed]
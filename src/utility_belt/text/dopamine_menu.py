@@ -0,0 +1,171 @@
+"""
+Streaming parser for dopamine-menu markdown exports:
+
+    ## Category
+    ### Subcategory
+    1. **Activity name**
+    - Energy: 🔋🔋
+    - Tags: 🏠 ⚡
+
+Each numbered **name** item becomes one row (Category, Subcategory, Name,
+then one column per EXPECTED_KEYS detail, None when missing). Lines are read
+one at a time and rows are yielded as each item ends, so rows can go straight
+to CSV or JSON lines and memory stays flat however big the export is.
+"""
+import csv
+import json
+import os
+import re
+import tempfile
+from contextlib import suppress
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from utility_belt import metrics
+
+EXPECTED_KEYS = ("Energy", "Executive Function", "Spoons", "Cost", "Time", "Boost", "Tags", "Notes")
+COLUMNS = ("Category", "Subcategory", "Name", *EXPECTED_KEYS)
+FORMATS = ("csv", "jsonl")
+
+_ITEM_START = re.compile(r"\d+\. \*\*")
+_DETAIL = re.compile(r"-\s*(.+?):\s*(.+)")
+
+
+def _item_name(line: str) -> str | None:
+    # "N. **name**" (the whole line ends in "**"); the name stops at the first "**".
+    start = _ITEM_START.match(line)
+    if start is None:
+        return None
+    rest = line[start.end():]
+    if len(rest) < 2 or not rest.endswith("**"):
+        return None
+    return rest[:rest.index("**")].strip()
+
+
+def parse_menu(lines: Iterable[str]) -> Iterator[dict]:
+    """
+    Rows from the lines of a menu, in one pass. An item's "- key: value"
+    details run until a blank line, the next item or a heading; other text
+    inside an item is ignored, and a repeated key keeps its last value.
+    Keys outside EXPECTED_KEYS are kept after the expected ones.
+    """
+    category = subcategory = None
+    row = None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            if row is not None:
+                yield row
+                row = None
+            continue
+        first = line[0]
+        if first == "#":
+            if line.startswith("## "):
+                category, subcategory = line[3:].strip(), None
+            elif line.startswith("### "):
+                subcategory = line[4:].strip()
+            else:
+                continue
+            if row is not None:
+                yield row
+                row = None
+        elif first == "-":
+            if row is not None and line.startswith("- "):
+                match = _DETAIL.match(line)
+                if match:
+                    row[match.group(1).strip()] = match.group(2).strip()
+        else:
+            name = _item_name(line)
+            if name is not None:
+                if row is not None:
+                    yield row
+                row = {"Category": category, "Subcategory": subcategory, "Name": name,
+                       **dict.fromkeys(EXPECTED_KEYS)}
+    if row is not None:
+        yield row
+
+
+def parse_dopamine_menu(path) -> Iterator[dict]:
+    """
+    Rows of the UTF-8 menu file at path (see parse_menu), read line by line.
+    """
+    with open(path, "r", encoding="utf-8") as fh:
+        yield from parse_menu(fh)
+
+
+def write_csv(rows: Iterable[dict], fh, columns=COLUMNS, header: bool = True) -> int:
+    """
+    Write rows to text stream fh (opened with newline="") as CSV with the
+    given columns: missing values and None are empty, other keys are
+    dropped, lines end in "\n" as pandas' to_csv does. Returns rows written.
+    """
+    writer = csv.writer(fh, lineterminator="\n")
+    if header:
+        writer.writerow(columns)
+    n = 0
+    for row in rows:
+        writer.writerow([row.get(column) for column in columns])
+        n += 1
+    return n
+
+
+def write_jsonl(rows: Iterable[dict], fh) -> int:
+    """
+    Write rows to text stream fh as JSON lines, every key kept. Returns rows written.
+    """
+    n = 0
+    for row in rows:
+        fh.write(json.dumps(row, ensure_ascii=False))
+        fh.write("\n")
+        n += 1
+    return n
+
+
+def write_rows(rows: Iterable[dict], fh, fmt: str, columns=COLUMNS, header: bool = True) -> int:
+    if fmt == "csv":
+        return write_csv(rows, fh, columns, header)
+    if fmt == "jsonl":
+        return write_jsonl(rows, fh)
+    raise ValueError(f"unknown format {fmt!r} (expected one of {', '.join(FORMATS)})")
+
+
+def format_for(path) -> str:
+    """
+    Output format for path's extension: .csv, or .jsonl / .ndjson.
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix == ".csv":
+        return "csv"
+    if suffix in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"cannot tell the output format of {path}; use .csv or .jsonl")
+
+
+def convert_file(input_path, output_path, fmt: str | None = None, columns=COLUMNS,
+                 header: bool = True) -> int:
+    """
+    Parse one menu file into a CSV or JSON lines table at output_path
+    (format from its extension unless fmt is given), atomically: rows go to
+    a temporary file next to output_path that is then renamed over it.
+    Returns the number of rows.
+    """
+    fmt = fmt or format_for(output_path)
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format {fmt!r} (expected one of {', '.join(FORMATS)})")
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(
+        dir=output_path.parent, prefix=f".{output_path.name}.", suffix=".tmp"
+    )
+    try:
+        with metrics.span("text.menu_table"), \
+                open(input_path, "r", encoding="utf-8") as src, \
+                open(fd, "w", encoding="utf-8", newline="") as dst:
+            rows = write_rows(parse_menu(src), dst, fmt, columns, header)
+        os.replace(tmp, output_path)
+    except BaseException:
+        with suppress(OSError):
+            os.unlink(tmp)
+        raise
+    metrics.count("text.menu_rows", rows)
+    return rows
@@ -0,0 +1,197 @@
+"""
+Concurrent, pooled HTTP fetching for batches of URLs.
+
+fetch_many() shares one requests.Session (keep-alive connection pools) across
+a thread pool, caps requests per host, retries transient failures with
+exponential backoff and yields one FetchResult per URL as soon as it is done.
+"""
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterable, Iterator, NamedTuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utility_belt import metrics
+
+# Status codes worth retrying: throttling and transient server errors.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FetchResult(NamedTuple):
+    url: str
+    text: str | None
+    status: int | None
+    error: str | None
+    attempts: int
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def make_session(pool_size: int = 16) -> requests.Session:
+    """
+    Session whose connection pools keep up to pool_size connections per host.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def conditional_get(session, url: str, timeout: float = 10, cache=None):
+    """
+    GET url through session (or the requests module). With an HTTPCache, a
+    cached copy is revalidated with If-None-Match / If-Modified-Since and
+    fresh 200 responses are stored. Returns (response, text); after a 304,
+    text is the cached body.
+
+    Requests are timed as the web.fetch metrics span (web.fetch_ms holds
+    the latencies); 304s served from the cache count as web.cache_hits.
+    """
+    headers = cache.request_headers(url) if cache is not None else {}
+    response = _timed_get(session, url, timeout, headers)
+    if response.status_code == 304 and headers:
+        body = cache.not_modified(url, response.headers)
+        if body is not None:
+            metrics.count("web.cache_hits")
+            return response, body
+        # Evicted between building the headers and the reply: fetch in full.
+        response = _timed_get(session, url, timeout)
+    if cache is not None and response.status_code == 200:
+        cache.store(url, response.text, response.headers)
+    return response, response.text
+
+
+def _timed_get(session, url: str, timeout: float, headers=None):
+    if not metrics.enabled():
+        return session.get(url, timeout=timeout, headers=headers)
+    start = time.perf_counter()
+    with metrics.span("web.fetch"):
+        response = session.get(url, timeout=timeout, headers=headers)
+    metrics.observe("web.fetch_ms", (time.perf_counter() - start) * 1000)
+    metrics.count("web.requests")
+    metrics.count("web.fetch.bytes", len(response.content))
+    return response
+
+
+def fetch_with_retries(
+    session: requests.Session,
+    url: str,
+    retries: int = 2,
+    backoff: float = 0.5,
+    timeout: float = 10,
+    cache=None,
+) -> FetchResult:
+    """
+    GET url, retrying connection errors, timeouts and RETRY_STATUSES up to
+    `retries` times, sleeping backoff * 2**attempt in between. Never raises.
+    With a cache (web.http_cache.HTTPCache) the request is conditional.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            response, text = conditional_get(session, url, timeout, cache)
+            if response.status_code in RETRY_STATUSES and attempt <= retries:
+                response.close()
+                metrics.count("web.retries")
+            else:
+                response.raise_for_status()
+                return FetchResult(url, text, response.status_code, None, attempt)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt > retries:
+                return FetchResult(url, None, None, f"{type(e).__name__}: {e}", attempt)
+            metrics.count("web.retries")
+        except requests.RequestException as e:
+            status = e.response.status_code if e.response is not None else None
+            return FetchResult(url, None, status, f"{type(e).__name__}: {e}", attempt)
+        except Exception as e:
+            return FetchResult(url, None, None, f"{type(e).__name__}: {e}", attempt)
+        time.sleep(backoff * 2 ** (attempt - 1))
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def fetch_many(
+    urls: Iterable[str],
+    concurrency: int = 16,
+    per_host: int = 4,
+    retries: int = 2,
+    backoff: float = 0.5,
+    timeout: float = 10,
+    session: requests.Session | None = None,
+    cache=None,
+) -> Iterator[FetchResult]:
+    """
+    Fetch urls concurrently and yield a FetchResult for each, in completion order.
+
+    At most `concurrency` requests run at once and at most `per_host` against
+    any one host; URLs for a busy host wait without tying up a worker. urls
+    is consumed lazily, so it can be a generator over a very long list.
+    Failures are reported in the result (see fetch_with_retries), never raised.
+    Pass an HTTPCache as cache to revalidate instead of re-downloading.
+    """
+    owns_session = session is None
+    if owns_session:
+        session = make_session(max(concurrency, per_host))
+    source = iter(urls)
+    exhausted = False
+    buffered = 0
+    max_buffered = max(4 * concurrency, 64)
+    # host -> URLs waiting for a slot; ordered so hosts are served round-robin.
+    queues: OrderedDict[str, deque] = OrderedDict()
+    active: dict[str, int] = {}
+    running = {}
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            try:
+                while True:
+                    while not exhausted and buffered < max_buffered:
+                        url = next(source, None)
+                        if url is None:
+                            exhausted = True
+                            break
+                        queues.setdefault(host_of(url), deque()).append(url)
+                        buffered += 1
+
+                    for host in list(queues):
+                        queue = queues[host]
+                        while (
+                            queue
+                            and active.get(host, 0) < per_host
+                            and len(running) < concurrency
+                        ):
+                            url = queue.popleft()
+                            buffered -= 1
+                            active[host] = active.get(host, 0) + 1
+                            fut = pool.submit(
+                                fetch_with_retries, session, url, retries, backoff, timeout, cache
+                            )
+                            running[fut] = host
+                        if not queue:
+                            del queues[host]
+                        else:
+                            queues.move_to_end(host)
+
+                    if not running:
+                        return
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        host = running.pop(fut)
+                        active[host] -= 1
+                        yield fut.result()
+            finally:
+                # Stopped early: drop requests that have not started yet.
+                for fut in running:
+                    fut.cancel()
+    finally:
+        if owns_session:
+            session.close()
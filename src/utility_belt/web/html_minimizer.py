@@ -0,0 +1,179 @@
+"""
+Single-pass HTML minimizer on the stdlib html.parser event stream.
+
+Applies the same rules as minimal_html.clean_soup / build_minimal_html
+(drop DROP_TAGS with their content and all comments, keep ALLOWED_TAGS with
+their allowed attributes, unwrap everything else, keep only the <body> when
+the page has one) without building a tree: output is written as the input is
+fed, memory stays flat and deeply nested pages cannot hit the recursion limit.
+
+    with open("page.html") as src, open("min.html", "w") as dst:
+        minimize_html_stream(src, dst)
+"""
+from html import escape
+from html.parser import HTMLParser
+from typing import Callable, Iterable
+
+# Tag -> attributes kept on it; every other tag is unwrapped (content kept).
+ALLOWED_TAGS = {
+    "p": [],
+    "br": [],
+    "h1": [], "h2": [], "h3": [], "h4": [], "h5": [], "h6": [],
+    "ul": [], "ol": [], "li": [],
+    "a": ["href", "title"],
+    "strong": [],
+    "em": [],
+    "blockquote": [],
+    "img": ["src", "alt"],  # optionally allow images with minimal attributes
+}
+
+# Removed together with everything inside them.
+DROP_TAGS = frozenset({"script", "style", "noscript", "iframe", "footer", "header", "form"})
+
+# Never have content or an end tag.
+VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+})
+
+DEFAULT_TITLE = "Minimal HTML"
+CHUNK_CHARS = 64 * 1024
+
+
+class HTMLMinimizer(HTMLParser):
+    """
+    Feed HTML with feed(), then call close(); minimal HTML goes to write().
+
+    Content before <body> is held back until the body starts or the input
+    ends, so only the <head> is ever buffered. As in the tree path, a <body>
+    inside another element (normally <html>) is the whole output: what comes
+    before and after it is dropped. A top-level <body> or none at all is
+    unwrapped like any other tag, and then the whole document is the body.
+    """
+
+    def __init__(self, write: Callable[[str], object]):
+        super().__init__(convert_charrefs=True)
+        self._out = write
+        self._pending: list[str] | None = []  # None once <body> has started
+        self._after_body = False
+        self._body_at: int | None = None  # stack depth of a <body> kept on its own
+        # Open elements as (tag, emitted); void elements are never pushed.
+        self._stack: list[tuple[str, bool]] = []
+        # Stack depth of the outermost open DROP_TAGS element, if any.
+        self._drop_at: int | None = None
+        self._title: list[str] | None = None  # collecting the first <title>
+        self._title_done = False
+
+    def _emit(self, text: str) -> None:
+        if self._pending is None:
+            self._out(text)
+        else:
+            self._pending.append(text)
+
+    def _start_document(self) -> None:
+        title = "".join(self._title or ()) or DEFAULT_TITLE
+        title = escape(title, quote=False)
+        self._out(f"<!DOCTYPE html>\n<html><head><title>{title}</title></head><body>")
+
+    def handle_starttag(self, tag, attrs):
+        void = tag in VOID_TAGS
+        if self._drop_at is not None or self._after_body:
+            if not void:
+                self._stack.append((tag, False))
+            return
+        if tag in DROP_TAGS:
+            self._stack.append((tag, False))
+            self._drop_at = len(self._stack)
+            return
+        if tag == "body" and self._pending is not None:
+            if self._stack:
+                self._pending = None
+                self._start_document()
+                self._body_at = len(self._stack)
+                self._stack.append((tag, False))
+                return
+            pending, self._pending = self._pending, None
+            self._start_document()
+            self._out("".join(pending))
+        if tag == "title" and not self._title_done and self._title is None:
+            self._title = []
+
+        allowed = ALLOWED_TAGS.get(tag)
+        if allowed is not None:
+            kept = "".join(
+                f' {name}="{escape(value or "")}"' for name, value in attrs if name in allowed
+            )
+            self._emit(f"<{tag}{kept}/>" if void else f"<{tag}{kept}>")
+        if not void:
+            self._stack.append((tag, allowed is not None))
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            return
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i][0] == tag:
+                break
+        else:
+            return  # Stray end tag: ignored, as a tree builder would.
+        while len(self._stack) > i:
+            name, emitted = self._stack.pop()
+            if self._drop_at is not None and len(self._stack) < self._drop_at:
+                self._drop_at = None
+            elif emitted and not self._after_body:
+                self._emit(f"</{name}>")
+            if name == "title" and self._title is not None:
+                self._title_done = True
+            elif name == "body" and len(self._stack) == self._body_at:
+                self._after_body = True
+
+    def handle_data(self, data):
+        if self._drop_at is not None or self._after_body:
+            return
+        if self._title is not None and not self._title_done:
+            self._title.append(data)
+        self._emit(escape(data, quote=False))
+
+    def close(self) -> None:
+        super().close()
+        if self._drop_at is not None:
+            # Unclosed dropped element: everything after it is gone too.
+            del self._stack[self._drop_at - 1:]
+            self._drop_at = None
+        if not self._after_body:
+            for name, emitted in reversed(self._stack):
+                if emitted:
+                    self._emit(f"</{name}>")
+        if self._pending is not None:
+            # No <body>: like the tree path, the whole document is the body.
+            self._title_done = True
+            pending, self._pending = self._pending, None
+            self._start_document()
+            self._out("".join(pending))
+        self._stack.clear()
+        self._out("</body></html>\n")
+
+
+def minimize_html_stream(chunks: Iterable[str], out) -> None:
+    """
+    Minimize HTML read from chunks (an open text file or any iterable of
+    strings) and write it to the text stream out as it is produced.
+    """
+    if hasattr(chunks, "read"):
+        src = chunks
+        chunks = iter(lambda: src.read(CHUNK_CHARS), "")
+    parser = HTMLMinimizer(out.write)
+    for chunk in chunks:
+        parser.feed(chunk)
+    parser.close()
+
+
+def minimize_html(html: str) -> str:
+    """
+    Minimal HTML for html in one pass; same retained text as
+    build_minimal_html(clean_soup(BeautifulSoup(html, "html.parser"))).
+    """
+    parts: list[str] = []
+    parser = HTMLMinimizer(parts.append)
+    parser.feed(html)
+    parser.close()
+    return "".join(parts)
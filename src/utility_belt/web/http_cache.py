@@ -0,0 +1,221 @@
+"""
+On-disk HTTP cache for conditional re-fetching.
+
+HTTPCache keeps response bodies with their ETag / Last-Modified so the next
+fetch of a URL can send If-None-Match / If-Modified-Since and reuse the body
+on a 304. It also keeps the minimal HTML built from a body, keyed by the body
+hash, so unchanged pages skip parsing entirely. Total size is capped with LRU
+eviction; counters are available from HTTPCache.stats.
+
+Layout under the cache directory: ``bodies/<sha256 of url>``,
+``minimal/<sha256 of body>`` and ``index.json`` (written by save()/close()).
+Files written after the last save (say, before a crash) are picked up from
+disk at load, as the most recently used entries, so they still count
+toward max_bytes and can be evicted.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import suppress
+from pathlib import Path
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+INDEX_VERSION = 1
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class HTTPCache:
+    """
+    Thread-safe; share one instance across fetch_many workers:
+
+        with HTTPCache("~/.cache/pages") as cache:
+            for url, html, error in minimal_html_many(urls, cache=cache):
+                ...
+    """
+
+    def __init__(self, directory, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        (self.directory / "bodies").mkdir(parents=True, exist_ok=True)
+        (self.directory / "minimal").mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # "bodies/<key>" or "minimal/<key>" -> metadata (always has "size"),
+        # least recently used first.
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self._total = 0
+        self._stats = dict.fromkeys(
+            ("hits", "misses", "minimal_hits", "minimal_misses", "evictions"), 0
+        )
+        self._load()
+
+    def _load(self):
+        on_disk = {}  # name -> (mtime_ns, size)
+        for sub in ("bodies", "minimal"):
+            with os.scandir(self.directory / sub) as it:
+                for entry in it:
+                    if entry.name.endswith(".tmp"):
+                        # Left by a write that never finished.
+                        with suppress(OSError):
+                            os.unlink(entry.path)
+                        continue
+                    st = entry.stat()
+                    on_disk[f"{sub}/{entry.name}"] = (st.st_mtime_ns, st.st_size)
+        try:
+            with open(self.directory / "index.json", "r", encoding="utf-8") as fh:
+                index = json.load(fh)
+        except (OSError, ValueError):
+            index = {}
+        if index.get("version") == INDEX_VERSION:
+            for name, meta in index.get("entries", []):
+                if name in on_disk:
+                    self._add(name, dict(meta, size=on_disk.pop(name)[1]))
+        for name in sorted(on_disk, key=on_disk.get):
+            self._add(name, {"size": on_disk[name][1]})
+        with self._lock:
+            self._evict()
+
+    def _add(self, name: str, meta: dict) -> None:
+        self._entries[name] = meta
+        self._total += meta["size"]
+
+    def save(self) -> None:
+        with self._lock:
+            index = {"version": INDEX_VERSION, "entries": list(self._entries.items())}
+        tmp = self.directory / "index.json.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(index, fh, separators=(",", ":"))
+        os.replace(tmp, self.directory / "index.json")
+
+    def close(self) -> None:
+        self.save()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write(self, name: str, text: str, meta: dict) -> None:
+        data = text.encode("utf-8")
+        path = self.directory / name
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        with self._lock:
+            old = self._entries.pop(name, None)
+            if old is not None:
+                self._total -= old["size"]
+            meta["size"] = len(data)
+            self._entries[name] = meta
+            self._total += len(data)
+            self._evict()
+
+    def _read(self, name: str) -> str | None:
+        try:
+            return (self.directory / name).read_text(encoding="utf-8")
+        except OSError:
+            self._drop(name)
+            return None
+
+    def _drop(self, name: str) -> None:
+        with self._lock:
+            meta = self._entries.pop(name, None)
+            if meta is not None:
+                self._total -= meta["size"]
+
+    def _evict(self) -> None:
+        # Caller holds the lock. The newest entry always stays.
+        while self._total > self.max_bytes and len(self._entries) > 1:
+            name, meta = self._entries.popitem(last=False)
+            self._total -= meta["size"]
+            self._stats["evictions"] += 1
+            try:
+                os.unlink(self.directory / name)
+            except OSError:
+                pass
+
+    def request_headers(self, url: str) -> dict:
+        """
+        Conditional request headers for url (empty if nothing is cached).
+        """
+        with self._lock:
+            meta = self._entries.get(f"bodies/{_sha256(url)}")
+        headers = {}
+        if meta is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def not_modified(self, url: str, headers=None) -> str | None:
+        """
+        Cached body for url after a 304, counted as a hit; None if it is gone.
+        Validators the 304 carries (headers) replace the stored ones, and the
+        entry's checked time is updated.
+        """
+        name = f"bodies/{_sha256(url)}"
+        body = self._read(name)
+        if body is None:
+            return None
+        headers = headers or {}
+        with self._lock:
+            meta = self._entries.get(name)
+            if meta is not None:
+                self._entries.move_to_end(name)
+                if headers.get("ETag"):
+                    meta["etag"] = headers["ETag"]
+                if headers.get("Last-Modified"):
+                    meta["last_modified"] = headers["Last-Modified"]
+                meta["checked"] = time.time()
+            self._stats["hits"] += 1
+        return body
+
+    def store(self, url: str, body: str, headers) -> None:
+        """
+        Cache a full (200) response body with its validators; counted as a miss.
+        Responses without ETag or Last-Modified are not cached.
+        """
+        with self._lock:
+            self._stats["misses"] += 1
+        etag, last_modified = headers.get("ETag"), headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        now = time.time()
+        meta = {"url": url, "etag": etag, "last_modified": last_modified,
+                "stored": now, "checked": now}
+        self._write(f"bodies/{_sha256(url)}", body, meta)
+
+    def minimal_for(self, body: str, variant: str = "") -> str | None:
+        """
+        Minimal HTML previously built from exactly this body, if cached.
+        variant separates outputs of different builders for the same body.
+        """
+        name = self._minimal_name(body, variant)
+        with self._lock:
+            known = name in self._entries
+            if known:
+                self._entries.move_to_end(name)
+        html = self._read(name) if known else None
+        with self._lock:
+            self._stats["minimal_hits" if html is not None else "minimal_misses"] += 1
+        return html
+
+    def store_minimal(self, body: str, html: str, variant: str = "") -> None:
+        self._write(self._minimal_name(body, variant), html, {})
+
+    @staticmethod
+    def _minimal_name(body: str, variant: str) -> str:
+        key = _sha256(variant + "\0" + body if variant else body)
+        return f"minimal/{key}"
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), bytes=self._total)
@@ -1,19 +1,24 @@
 # %%
 import sys
+
 import requests
 from bs4 import BeautifulSoup, Comment
 
+from utility_belt import metrics
+from utility_belt.web.fetch import conditional_get, fetch_many
+from utility_belt.web.html_minimizer import ALLOWED_TAGS, DROP_TAGS, minimize_html
+
+
 # %%
-def fetch_html(url):
+def fetch_html(url, session=None, timeout=10, cache=None):
     """
-    Fetch the HTML content of the URL.
+    Fetch the HTML content of the URL. Raises requests.RequestException on
+    failure; pass a session (see fetch.make_session) to reuse connections
+    and an http_cache.HTTPCache to revalidate instead of re-downloading.
     """
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        return response.text
-    except Exception as e:
-        sys.exit(f"Error fetching URL: {e}")
+    response, text = conditional_get(session or requests, url, timeout, cache)
+    response.raise_for_status()
+    return text
 
 def clean_soup(soup):
     """
@@ -21,30 +26,20 @@ def clean_soup(soup):
     Also remove extraneous attributes from allowed tags.
     """
     # Remove all <script> and <style> tags
-    for element in soup(["script", "style", "noscript", "iframe", "footer", "header", "form"]):
+    for element in soup(sorted(DROP_TAGS)):
         element.decompose()
 
     # Remove comments
     for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
         comment.extract()
 
-    # Define allowed tags and attributes
-    allowed_tags = {
-        "p": [],
-        "br": [],
-        "h1": [], "h2": [], "h3": [], "h4": [], "h5": [], "h6": [],
-        "ul": [], "ol": [], "li": [],
-        "a": ["href", "title"],
-        "strong": [],
-        "em": [],
-        "blockquote": [],
-        "img": ["src", "alt"],  # optionally allow images with minimal attributes
-    }
+    allowed_tags = ALLOWED_TAGS
 
     def recursive_clean(tag):
         if tag.name is not None:
             # If the tag is not in allowed_tags and has a parent, unwrap it.
-            if tag.name not in allowed_tags and tag.parent is not None:
+            # <title> stays so build_minimal_html can still find it.
+            if tag.name not in allowed_tags and tag.name != "title" and tag.parent is not None:
                 tag.unwrap()
                 return  # Once unwrapped, stop processing this branch.
             elif tag.name in allowed_tags:
@@ -87,13 +82,79 @@ def build_minimal_html(soup):
     original_body = soup.body if soup.body else soup
 
     # Append the cleaned content from the original body into our new document.
-    for child in original_body.contents:
+    for child in list(original_body.contents):
         # Note: Extract and append each child so that our new document's body
-        # consists only of cleaned elements.
+        # consists only of cleaned elements. Iterate over a copy: append()
+        # removes the child from original_body.contents.
         body_tag.append(child)
 
     # Prepend the doctype and return a string
     return doctype + minimal_html.prettify()
+
+
+ENGINES = ("soup", "stream")
+
+
+def minimal_html_from(html_content, cache=None, engine="soup"):
+    """
+    Parse, clean and rebuild html_content as minimal HTML. engine "soup"
+    goes through clean_soup/build_minimal_html; "stream" uses the single-pass
+    html_minimizer (same retained text, compact output, much faster on big
+    pages). With an HTTPCache the result is reused for identical input,
+    skipping the parse.
+
+    The work is timed as metrics spans web.parse / web.clean / web.build
+    (soup) or web.minimize (stream); cache reuse counts as
+    web.minimal_cache_hits.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine {engine!r}; expected one of {ENGINES}")
+    # The soup engine keeps the unqualified cache key it has always used.
+    variant = "" if engine == "soup" else engine
+    if cache is not None:
+        cached = cache.minimal_for(html_content, variant)
+        if cached is not None:
+            metrics.count("web.minimal_cache_hits")
+            return cached
+    if engine == "stream":
+        with metrics.span("web.minimize"):
+            minimal_html = minimize_html(html_content)
+    else:
+        with metrics.span("web.parse"):
+            soup = BeautifulSoup(html_content, "html.parser")
+        with metrics.span("web.clean"):
+            soup = clean_soup(soup)
+        with metrics.span("web.build"):
+            minimal_html = build_minimal_html(soup)
+    metrics.count("web.pages")
+    if cache is not None:
+        cache.store_minimal(html_content, minimal_html, variant)
+    return minimal_html
+
+
+def fetch_minimal_html(url, session=None, timeout=10, cache=None, engine="soup"):
+    """
+    fetch_html + minimal_html_from; with a cache, an unchanged page costs a
+    304 round trip and no parsing.
+    """
+    return minimal_html_from(fetch_html(url, session, timeout, cache), cache, engine)
+
+
+def minimal_html_many(urls, cache=None, engine="soup", **fetch_options):
+    """
+    Fetch urls concurrently (see fetch.fetch_many for the options) and yield
+    (url, minimal_html, error) as each page completes; minimal_html is None
+    when error is set.
+    """
+    for result in fetch_many(urls, cache=cache, **fetch_options):
+        if not result.ok:
+            yield result.url, None, result.error
+            continue
+        try:
+            yield result.url, minimal_html_from(result.text, cache, engine), None
+        except Exception as e:
+            yield result.url, None, f"{type(e).__name__}: {e}"
+
 # %%
 def main():
     # if len(sys.argv) != 2:
@@ -101,7 +162,10 @@ def main():
 
     # url = sys.argv[1]
     url = "https://bam.elementsist.com/coach"
-    html_content = fetch_html(url)
+    try:
+        html_content = fetch_html(url)
+    except Exception as e:
+        sys.exit(f"Error fetching URL: {e}")
 
     # Parse fetched HTML
     soup = BeautifulSoup(html_content, "html.parser")
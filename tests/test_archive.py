@@ -0,0 +1,66 @@
+import pytest
+
+from utility_belt.files.archive import MergedArchive, ShardWriter, index_path_for
+from utility_belt.files.merge import merge_files_to_text
+
+
+def test_sharded_merge_round_trips_through_index(tmp_path):
+    src = tmp_path / "src"
+    (src / "sub").mkdir(parents=True)
+    contents = {f"sub/f{i:02d}.txt": f"line {i}\n" * (i * 10 + 1) for i in range(12)}
+    contents["héllo.md"] = "ünïcode ✓\r\nwindows line\r\n"
+    for rel, text in contents.items():
+        (src / rel).write_bytes(text.encode("utf-8"))
+    out = tmp_path / "merged.txt"
+
+    summary = merge_files_to_text(src, out, shard_bytes=2000)
+
+    assert summary["written"] == 13
+    assert len(summary["shards"]) > 1
+    assert not out.exists()
+    with MergedArchive(summary["index"]) as archive:
+        assert len(archive) == 13
+        for rel, text in contents.items():
+            assert archive.read_text(rel) == text.replace("\r\n", "\n")
+        shard, offset, length = archive.locate("sub/f03.txt")
+        assert shard.read_bytes()[offset:offset + length] == contents["sub/f03.txt"].encode()
+        assert "missing.txt" not in archive
+
+
+def test_shard_tokens_budget(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    for i in range(4):
+        (src / f"{i}.txt").write_text("x" * 400, encoding="utf-8")
+
+    summary = merge_files_to_text(src, tmp_path / "m.txt", shard_tokens=100)
+
+    assert len(summary["shards"]) == 4
+
+
+def test_rerun_with_fewer_shards_drops_the_old_ones(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    for i in range(6):
+        (src / f"{i}.txt").write_text("x" * 400, encoding="utf-8")
+    out = tmp_path / "m.txt"
+    assert len(merge_files_to_text(src, out, shard_bytes=500)["shards"]) == 6
+
+    summary = merge_files_to_text(src, out, shard_bytes=100_000)
+
+    assert len(summary["shards"]) == 1
+    assert sorted(p.name for p in tmp_path.glob("m.*")) == ["m.00000.txt", "m.index.json"]
+
+
+def test_failed_merge_publishes_no_index(tmp_path):
+    out = tmp_path / "m.txt"
+    with ShardWriter(out, 100, lambda shard: b"") as shards:
+        shards.fit(10).write(b"done")
+        shards.add("a.txt", 0, 4)
+    assert index_path_for(out).exists()
+
+    with pytest.raises(RuntimeError):
+        with ShardWriter(out, 100, lambda shard: b"") as shards:
+            shards.fit(10).write(b"half")
+            raise RuntimeError("merge failed")
+    assert not index_path_for(out).exists()
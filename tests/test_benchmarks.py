@@ -0,0 +1,71 @@
+import importlib.util
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from utility_belt.files.merge import merge_files_to_text
+from utility_belt.storage.in_memory_database import InMemoryDatabase
+
+BENCHMARKS = Path(__file__).resolve().parent.parent / "benchmarks"
+
+
+def _load(name):
+    spec = importlib.util.spec_from_file_location(name, BENCHMARKS / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+synthetic = _load("synthetic")
+
+
+def test_synthetic_tree_matches_what_merge_sees(tmp_path):
+    stats = synthetic.make_tree(tmp_path / "tree", files=300, median_bytes=512,
+                                binary_ratio=0.1, excluded_depth=4)
+    assert stats["files"] == stats["text_files"] + stats["binary_files"] + stats["excluded_files"]
+    assert stats["binary_files"] and stats["excluded_files"]
+
+    summary = merge_files_to_text(tmp_path / "tree", tmp_path / "out.txt", max_file_bytes=None)
+    assert summary["discovered"] == stats["text_files"] + stats["binary_files"]
+    assert summary["skipped"] == stats["binary_files"]
+    assert synthetic.make_tree(tmp_path / "again", files=300, median_bytes=512,
+                               binary_ratio=0.1, excluded_depth=4) == stats
+
+
+def test_synthetic_db_trace_replays():
+    trace = synthetic.make_db_trace(2000, keys=50)
+    results = list(InMemoryDatabase().execute_batch(trace))
+    assert len(results) == 2000
+    assert {command[0] for command in trace} == {
+        "SET", "GET", "LOOK_BACK", "COMPARE_AND_SET", "SET_WITH_TTL",
+    }
+
+
+def test_synthetic_menu_parses_like_the_notebook(tmp_path, monkeypatch):
+    from utility_belt.text.dopamine_menu import parse_dopamine_menu
+
+    monkeypatch.syspath_prepend(str(BENCHMARKS))
+    bench = _load("bench_menu_table")
+    src = tmp_path / "menu.md"
+    src.write_text(synthetic.make_menu(50_000), encoding="utf-8")
+    rows = list(parse_dopamine_menu(src))
+    assert len(rows) > 50 and any(row["Notes"] for row in rows)
+    assert rows == bench.notebook_parse(src)
+
+
+def test_suite_writes_comparable_json(tmp_path):
+    out = tmp_path / "results.json"
+    cases = "merge_serial,remove_emojis,db_ops"
+    command = [sys.executable, str(BENCHMARKS / "bench_suite.py"), "--scale", "0.02",
+               "--repeat", "1", "--only", cases]
+    subprocess.run(command + ["--output", str(out)], check=True, capture_output=True)
+
+    report = json.loads(out.read_text(encoding="utf-8"))
+    assert set(report["results"]) == set(cases.split(","))
+    for result in report["results"].values():
+        assert result["throughput"] > 0 and result["peak_bytes"] > 0
+    compared = subprocess.run(command + ["--no-memory", "--compare", str(out),
+                                         "--tolerance", "1"],
+                              check=True, capture_output=True, text=True)
+    assert "vs baseline" in compared.stdout
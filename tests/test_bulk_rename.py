@@ -0,0 +1,181 @@
+import json
+import os
+import sys
+
+from utility_belt.files import bulk_rename
+from utility_belt.files.bulk_rename import (
+    UNSAFE_CHARS,
+    apply_plan,
+    make_directories,
+    plan_directory,
+    plan_renames,
+    slugify_all,
+    target_names,
+    undo_journal,
+)
+
+
+def _notebook_slug(txt):
+    # The per-row loop from bulk-rename-files.ipynb that slugify_all replaces.
+    txt = txt.replace(" - ", "-")
+    txt = txt.replace(" and ", "-")
+    txt = txt.replace(" ", "-").lower()
+    for i in [c for c in txt if c in UNSAFE_CHARS]:
+        txt = txt.replace(i, "")
+    return "-".join(txt.split())
+
+
+def _touch(directory, *names):
+    directory.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        (directory / name).write_text(name, encoding="utf-8")
+
+
+def test_slugs_match_the_notebook_rules():
+    names = ["Circuit Breaker Panels", "Salt and Pepper", "A - B", "Tom's #1 Deal?",
+             "100% [new]/old", "Ünïcode Café", "", "x~y|z",
+             " x\t", "\tTab\tName\n", "\t", " \tx \n", "a\t\n\tb"]
+    assert slugify_all(names) == [_notebook_slug(n) for n in names]
+    assert slugify_all(["tab\there", "\tedge\n"]) == ["tab-here", "edge"]
+    assert slugify_all([]) == []
+
+
+def test_template_fields():
+    names = ["IMG 1.JPG", "b.png"]
+    assert target_names(names, "product-{parent}-{n}{ext}", "Circuit Panels") == [
+        "product-circuit-panels-1.JPG", "product-circuit-panels-2.png",
+    ]
+    assert target_names(names, "{stem}{ext}") == ["img-1.JPG", "b.png"]
+
+
+def test_chains_and_cycles_are_ordered(tmp_path):
+    _touch(tmp_path, "a", "b", "c", "x", "y")
+    moves = {tmp_path / "a": tmp_path / "b", tmp_path / "b": tmp_path / "c",
+             tmp_path / "c": tmp_path / "d",  # chain ending in a free name
+             tmp_path / "x": tmp_path / "y", tmp_path / "y": tmp_path / "x"}  # cycle
+    plan = plan_renames(moves, set(tmp_path.iterdir()))
+    assert not plan.conflicts
+    assert [os.path.basename(r.src) for r in plan.chains[0]] == ["c", "b", "a"]
+    assert len(plan.chains[1]) == 3  # x -> tmp, y -> x, tmp -> y
+
+    summary = apply_plan(plan)
+    assert summary["renamed"] == 6 and summary["failed"] == 0
+    contents = {p.name: p.read_text() for p in tmp_path.iterdir()}
+    assert contents == {"b": "a", "c": "b", "d": "c", "x": "y", "y": "x"}
+
+
+def test_conflicts_are_reported_and_propagate(tmp_path):
+    _touch(tmp_path, "A", "a?", "Keep", "keep", "Next")
+    plan = plan_directory(tmp_path)
+    reasons = {os.path.basename(c.src): c.reason for c in plan.conflicts}
+    # "A" and "a?" both want "a"; "Keep" wants "keep", which stays put.
+    assert reasons == {"A": "target claimed by several entries",
+                       "a?": "target claimed by several entries",
+                       "Keep": "target exists"}
+    assert plan.renames == [(str(tmp_path / "Next"), str(tmp_path / "next"))]
+    assert plan.unchanged == 1
+
+    # Dropping a conflicting move keeps its source in place, blocking moves into it.
+    existing = {tmp_path / n for n in ("p", "q", "r")}
+    moves = {tmp_path / "p": tmp_path / "r", tmp_path / "q": tmp_path / "p"}
+    plan = plan_renames(moves, existing)
+    assert not plan.renames and len(plan.conflicts) == 2
+
+
+def test_threads_journal_and_undo(tmp_path):
+    names = [f"File Number {i}.TXT" for i in range(300)]
+    _touch(tmp_path / "d", *names)
+    journal = tmp_path / "run.journal.jsonl"
+    plan = plan_directory(tmp_path / "d")
+
+    assert apply_plan(plan, dry_run=True)["renamed"] == 0
+    assert sorted(os.listdir(tmp_path / "d")) == sorted(names)
+
+    summary = apply_plan(plan, journal=journal, workers=8)
+    assert summary["renamed"] == 300
+    assert sorted(os.listdir(tmp_path / "d")) == sorted(slugify_all(names))
+    undone = undo_journal(journal, workers=8)
+    assert undone["renamed"] == 300 and undone["failed"] == 0
+    assert sorted(os.listdir(tmp_path / "d")) == sorted(names)
+
+
+def test_never_replaces_and_undo_covers_only_completed_steps(tmp_path):
+    _touch(tmp_path, "One", "Two", "three")
+    plan = plan_directory(tmp_path)  # One -> one, Two -> two
+    (tmp_path / "two").write_text("appeared after planning", encoding="utf-8")
+    journal = tmp_path / "j.journal.jsonl"
+
+    summary = apply_plan(plan, journal=journal)
+    assert summary["renamed"] == 1 and summary["failed"] == 1
+    assert "target exists" in summary["errors"][0][2]
+    assert (tmp_path / "two").read_text() == "appeared after planning"
+
+    lines = [json.loads(line) for line in journal.read_text().splitlines()]
+    assert sum(1 for e in lines if e.get("op") == "done") == 1
+    assert undo_journal(journal)["renamed"] == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        ["One", "Two", "three", "two", "j.journal.jsonl"]
+    )
+
+
+def test_make_directories_reads_parent_once(tmp_path, monkeypatch):
+    (tmp_path / "salt-pepper").mkdir()
+    scans = []
+    real_scandir = os.scandir
+    monkeypatch.setattr(bulk_rename.os, "scandir", lambda p: scans.append(p) or real_scandir(p))
+    journal = tmp_path / "mk.journal.jsonl"
+
+    summary = make_directories(tmp_path, ["Salt and Pepper", "Circuit Panels", "circuit panels"],
+                               journal=journal)
+    assert len(scans) == 1
+    assert summary["created"] == [str(tmp_path / "circuit-panels")]
+    assert summary["existing"] == 1 and summary["duplicates"] == ["circuit panels"]
+    assert undo_journal(journal)["removed_dirs"] == 1
+    assert not (tmp_path / "circuit-panels").exists()
+
+
+def test_cli_subdirs_template_and_undo(tmp_path, monkeypatch, capsys):
+    from utility_belt.cli.bulk_rename import main
+
+    _touch(tmp_path / "photos" / "Circuit Panels", "b.png", "a.JPG")
+    _touch(tmp_path / "photos" / "Salt and Pepper", "x.png")
+    journal = tmp_path / "cli.journal.jsonl"
+    argv = ["ub-bulk-rename", str(tmp_path / "photos"), "--subdirs",
+            "-t", "product-{parent}-{n}{ext}", "--journal", str(journal)]
+
+    monkeypatch.setattr(sys, "argv", argv + ["--dry-run"])
+    main()
+    assert "Would rename: 3" in capsys.readouterr().out
+    assert not journal.exists()
+
+    monkeypatch.setattr(sys, "argv", argv)
+    main()
+    assert "Renamed: 3 of 3" in capsys.readouterr().out
+    assert sorted(os.listdir(tmp_path / "photos" / "Circuit Panels")) == [
+        "product-circuit-panels-1.JPG", "product-circuit-panels-2.png",
+    ]
+    assert os.listdir(tmp_path / "photos" / "Salt and Pepper") == ["product-salt-pepper-1.png"]
+
+    monkeypatch.setattr(sys, "argv", ["ub-bulk-rename", "--undo", str(journal)])
+    main()
+    assert sorted(os.listdir(tmp_path / "photos" / "Circuit Panels")) == ["a.JPG", "b.png"]
+
+
+def test_done_marks_reach_the_journal_before_close(tmp_path, monkeypatch):
+    _touch(tmp_path / "d", "One", "Two")
+    journal = tmp_path / "live.journal.jsonl"
+    synced = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(bulk_rename.os, "fsync", lambda fd: synced.append(fd) or real_fsync(fd))
+    seen = []
+    real_rename = os.rename
+
+    def rename(src, dst):
+        # Each rename sees the marks of the ones before it on disk already.
+        seen.append(journal.read_text(encoding="utf-8").count('"op": "done"'))
+        real_rename(src, dst)
+
+    monkeypatch.setattr(bulk_rename.os, "rename", rename)
+    assert apply_plan(plan_directory(tmp_path / "d"), journal=journal)["renamed"] == 2
+    assert seen == [0, 1]
+    assert len(synced) == 1 + 2 + 1  # Plan, one per finished chain, close.
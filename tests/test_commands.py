@@ -0,0 +1,47 @@
+import io
+
+import pytest
+
+from utility_belt.storage.commands import (
+    iter_binary_commands,
+    iter_text_commands,
+    read_command_file,
+    write_binary_commands,
+)
+from utility_belt.storage.in_memory_database import InMemoryDatabase
+
+TEXT = """# recorded session
+SET 1000 user1 age 30
+SET\t1500\tuser1\tbio\tlikes long walks
+LOOK_BACK 1100 user1 age
+
+GET 1600 user1 bio
+COMPARE_AND_SET 1700 user1 age 30 31
+"""
+EXPECTED = ["", "", "30", "likes long walks", "true"]
+
+
+def test_text_and_binary_files_replay_the_same(tmp_path):
+    commands = list(iter_text_commands(io.StringIO(TEXT)))
+    assert commands[1] == ("SET", 1500, "user1", "bio", "likes long walks")
+
+    text_file = tmp_path / "session.txt"
+    text_file.write_text(TEXT, encoding="utf-8")
+    binary_file = tmp_path / "session.cmd"
+    with open(binary_file, "wb") as fh:
+        assert write_binary_commands(commands, fh) == 5
+
+    for path in (text_file, binary_file):
+        assert list(read_command_file(path)) == commands
+        assert list(InMemoryDatabase().execute_batch(read_command_file(path))) == EXPECTED
+
+
+def test_malformed_input_is_reported():
+    with pytest.raises(ValueError, match="line 2"):
+        list(iter_text_commands(["SET 1 k f v", "GET 2"]))
+    with pytest.raises(ValueError):
+        list(iter_binary_commands(io.BytesIO(b"not commands")))
+    buf = io.BytesIO()
+    write_binary_commands([("GET", 1, "k", "f")], buf)
+    with pytest.raises(ValueError, match="truncated"):
+        list(iter_binary_commands(io.BytesIO(buf.getvalue()[:-2])))
@@ -0,0 +1,49 @@
+from utility_belt.files.discovery import ExcludeMatcher, iter_files
+
+
+def _touch(root, *paths):
+    for rel in paths:
+        p = root / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(rel, encoding="utf-8")
+
+
+def test_order_matches_sorted_rglob(tmp_path):
+    _touch(tmp_path, "a.txt", "a/b.txt", "a/b/c.txt", "a-b.txt", "B.txt", "z/y/x.txt", "a.b/c.txt")
+    expected = [p for p in sorted(tmp_path.rglob("*")) if p.is_file()]
+    assert [e.path for e in iter_files(tmp_path)] == expected
+
+
+def test_entries_carry_stat(tmp_path):
+    _touch(tmp_path, "one.txt")
+    (entry,) = iter_files(tmp_path)
+    st = (tmp_path / "one.txt").stat()
+    assert (entry.size, entry.mtime_ns) == (st.st_size, st.st_mtime_ns)
+
+
+def test_excludes_prune_by_component_and_glob(tmp_path):
+    _touch(
+        tmp_path,
+        "keep.py",
+        "node_modules/x/dep.js",
+        "src/node_modules/dep.js",
+        "rebuild/keep.txt",
+        "build/out.txt",
+        "docs/build/page.md",
+        "docs/api/build",
+        "logs/app.log",
+        "fixtures/deep/big.json",
+        "fixtures/small.json",
+    )
+    patterns = ["node_modules", "*.LOG", "docs/build/", "/fixtures/deep", "**/api/build"]
+    found = {e.path.relative_to(tmp_path).as_posix() for e in iter_files(tmp_path, None, patterns)}
+    assert found == {"keep.py", "rebuild/keep.txt", "build/out.txt", "fixtures/small.json"}
+
+
+def test_matcher_dir_only_and_ancestors():
+    m = ExcludeMatcher(["out/", "*.tmp"])
+    assert m.match("out", is_dir=True)
+    assert not m.match("out")
+    assert m.excludes("a/out/file.txt")
+    assert m.excludes("a/b/c.TMP")
+    assert not m.excludes("a/output/file.txt")
@@ -0,0 +1,112 @@
+import io
+import json
+import sys
+
+import pytest
+
+from utility_belt.cli.menu_table import main
+from utility_belt.text.dopamine_menu import (
+    COLUMNS,
+    convert_file,
+    parse_dopamine_menu,
+    parse_menu,
+    write_csv,
+)
+
+MENU = """\
+# Dopamine Menu
+
+## Appetizers
+### Quick hits
+1. **Stretch break**
+- Energy: 🔋
+- Tags: 🏠 ⚡
+2. **Dance to one song** 
+  - Energy: 🔋🔋
+- Notes: loud: yes, "fun"
+free text inside an item is ignored
+- Energy: 🔋🔋🔋
+3. **Not** an item
+- Where: nowhere
+
+- Cost: orphan detail, ignored
+## Entrees
+1. **Walk outside**
+- Time: ⏱️⏱️
+- Where: park
+## Sides
+1. **Tea**
+"""
+
+
+def test_rows_follow_the_notebook_rules():
+    rows = list(parse_menu(io.StringIO(MENU)))
+    names = ["Stretch break", "Dance to one song", "Walk outside", "Tea"]
+    assert [r["Name"] for r in rows] == names
+    first, second, walk, tea = rows
+    assert list(first) == list(COLUMNS)
+    assert (first["Category"], first["Subcategory"]) == ("Appetizers", "Quick hits")
+    assert first["Tags"] == "🏠 ⚡"
+    assert first["Notes"] is None
+    # Later values win; the "3. **Not** an item" line does not end in "**".
+    assert second["Energy"] == "🔋🔋🔋" and second["Notes"] == 'loud: yes, "fun"'
+    assert second["Where"] == "nowhere"
+    # A heading ends the item above it and resets the subcategory.
+    assert (walk["Category"], walk["Subcategory"], walk["Where"]) == ("Entrees", None, "park")
+    assert tea["Category"] == "Sides" and tea["Time"] is None
+
+
+def test_parse_is_lazy():
+    def lines():
+        yield "## A\n"
+        yield "1. **one**\n"
+        yield "\n"
+        raise AssertionError("read past the first row")
+
+    assert next(parse_menu(lines()))["Name"] == "one"
+
+
+def test_csv_and_jsonl_files(tmp_path):
+    src = tmp_path / "menu.md"
+    src.write_text(MENU, encoding="utf-8")
+
+    assert convert_file(src, tmp_path / "out" / "menu.csv") == 4
+    lines = (tmp_path / "out" / "menu.csv").read_text(encoding="utf-8").split("\n")
+    assert lines[0] == ",".join(COLUMNS)
+    assert lines[2] == 'Appetizers,Quick hits,Dance to one song,🔋🔋🔋,,,,,,,"loud: yes, ""fun"""'
+
+    assert convert_file(src, tmp_path / "menu.jsonl") == 4
+    rows = [json.loads(line) for line in (tmp_path / "menu.jsonl").read_text("utf-8").splitlines()]
+    assert rows == list(parse_dopamine_menu(src))
+
+    with pytest.raises(ValueError):
+        convert_file(src, tmp_path / "menu.xlsx")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["menu.jsonl", "menu.md", "out"]
+
+
+def test_write_csv_extra_columns():
+    out = io.StringIO()
+    assert write_csv(parse_menu(io.StringIO(MENU)), out, (*COLUMNS, "Where")) == 4
+    assert out.getvalue().splitlines()[3].endswith(",park")
+
+
+def test_cli_combines_files_in_order_with_workers(tmp_path, monkeypatch, capsys):
+    menus = tmp_path / "menus"
+    menus.mkdir()
+    for i in range(4):
+        (menus / f"{i}.md").write_text(f"## Cat {i}\n1. **item {i}**\n- Cost: 💰\n", "utf-8")
+    (menus / "skip.json").write_text("{}", encoding="utf-8")
+
+    out = tmp_path / "all.csv"
+    monkeypatch.setattr(sys, "argv", ["ub-menu-table", str(menus), "-o", str(out), "-j", "2"])
+    main()
+    assert "Rows: 4 from 4 files" in capsys.readouterr().err
+    lines = out.read_text(encoding="utf-8").splitlines()
+    assert lines[0].startswith("Category,") and len(lines) == 5
+    assert [line.split(",")[2] for line in lines[1:]] == [f"item {i}" for i in range(4)]
+
+    monkeypatch.setattr(sys, "argv", ["ub-menu-table", str(menus), "--output-dir",
+                                      str(tmp_path / "tables"), "-f", "jsonl", "-j", "2"])
+    main()
+    tables = sorted(p.name for p in (tmp_path / "tables").iterdir())
+    assert tables == [f"{i}.jsonl" for i in range(4)]
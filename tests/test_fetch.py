@@ -0,0 +1,169 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utility_belt import metrics
+from utility_belt.web.fetch import fetch_many
+from utility_belt.web.http_cache import HTTPCache
+from utility_belt.web.minimal_html import fetch_minimal_html, minimal_html_many
+
+PAGE = b"<html><head><title>T</title><script>x()</script></head><body><p>Hello</p></body></html>"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            hits = server.hits[self.path]
+        try:
+            time.sleep(0.02)
+            if self.path.startswith("/cached"):
+                if self.headers.get("If-None-Match") == '"v1"':
+                    self._send(304, b"")
+                else:
+                    self._send(200, PAGE + self.path.encode(), etag='"v1"')
+            elif self.path.startswith("/flaky") and hits < 3:
+                self._send(503, b"busy")
+            elif self.path.startswith("/missing"):
+                self._send(404, b"nope")
+            else:
+                self._send(200, PAGE)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def _send(self, status, body, etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html")
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.lock = threading.Lock()
+    srv.active = srv.peak = 0
+    srv.hits = {}
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv, f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_fetch_many_caps_per_host_and_reports_errors(server):
+    srv, base = server
+    urls = [f"{base}/page/{i}" for i in range(20)] + [f"{base}/missing", f"{base}/flaky"]
+
+    results = {r.url: r for r in fetch_many(urls, concurrency=8, per_host=3, backoff=0.01)}
+
+    assert len(results) == 22
+    assert srv.peak <= 3
+    assert all(results[u].ok and results[u].text == PAGE.decode() for u in urls[:20])
+    missing = results[f"{base}/missing"]
+    assert (missing.ok, missing.status, missing.attempts) == (False, 404, 1)
+    flaky = results[f"{base}/flaky"]
+    assert (flaky.ok, flaky.attempts) == (True, 3)
+
+
+def test_fetch_many_gives_up_after_retries(server):
+    _, base = server
+    (result,) = fetch_many([f"{base}/flaky/x"], retries=1, backoff=0.01)
+    assert (result.ok, result.status, result.attempts) == (False, 503, 2)
+
+
+def test_minimal_html_many_streams_cleaned_pages(server):
+    _, base = server
+    out = list(minimal_html_many([f"{base}/a", f"{base}/missing"], per_host=2, backoff=0.01))
+
+    by_url = {url: (html, error) for url, html, error in out}
+    html, error = by_url[f"{base}/a"]
+    assert error is None and "Hello" in html and "x()" not in html
+    assert by_url[f"{base}/missing"][0] is None
+
+
+def test_cache_revalidates_and_skips_parsing(server, tmp_path):
+    _, base = server
+    url = f"{base}/cached/page"
+
+    with HTTPCache(tmp_path / "cache") as cache:
+        first = fetch_minimal_html(url, cache=cache)
+        second = fetch_minimal_html(url, cache=cache)
+        assert first == second and "Hello" in first
+        assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+        assert cache.stats["minimal_hits"] == 1
+
+    # The index survives a restart; batch fetches revalidate too.
+    cache = HTTPCache(tmp_path / "cache")
+    results = list(fetch_many([url, f"{base}/cached/other"], cache=cache))
+    assert sorted(r.status for r in results) == [200, 304]
+    assert all(r.text.startswith(PAGE.decode()) for r in results)
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = HTTPCache(tmp_path, max_bytes=250)
+    headers = {"ETag": '"x"'}
+    for name in ("a", "b", "c"):
+        cache.store(f"http://h/{name}", name * 100, headers)
+    assert cache.request_headers("http://h/a") == {}
+    assert cache.request_headers("http://h/c") == {"If-None-Match": '"x"'}
+    assert cache.stats["evictions"] == 1 and cache.stats["bytes"] == 200
+
+
+def test_fetch_and_parse_are_instrumented(server, tmp_path):
+    _, base = server
+    url = f"{base}/cached/metrics"
+
+    with metrics.recording() as rec, HTTPCache(tmp_path / "cache") as cache:
+        fetch_minimal_html(url, cache=cache)
+        fetch_minimal_html(url, cache=cache)
+    report = rec.report()
+    assert report["spans"]["web.fetch"]["calls"] == 2
+    assert report["histograms"]["web.fetch_ms"]["count"] == 2
+    for phase in ("web.parse", "web.clean", "web.build"):
+        assert report["spans"][phase]["calls"] == 1
+    assert report["counters"]["web.cache_hits"] == 1
+    assert report["counters"]["web.minimal_cache_hits"] == 1
+
+
+def test_cache_adopts_files_written_after_the_last_save(tmp_path):
+    cache = HTTPCache(tmp_path, max_bytes=10_000)
+    cache.store("http://h/saved", "s" * 100, {"ETag": '"s"'})
+    cache.save()
+    cache.store("http://h/a", "a" * 100, {"ETag": '"a"'})
+    cache.store_minimal("a" * 100, "m" * 50)
+    (tmp_path / "bodies" / "x.123.tmp").write_text("partial")
+    # No save(): the process "crashes" here.
+
+    reopened = HTTPCache(tmp_path, max_bytes=10_000)
+    assert reopened.stats["entries"] == 3 and reopened.stats["bytes"] == 250
+    assert reopened.request_headers("http://h/saved") == {"If-None-Match": '"s"'}
+    assert not (tmp_path / "bodies" / "x.123.tmp").exists()
+
+    small = HTTPCache(tmp_path, max_bytes=160)
+    # The saved entry is the least recently used one.
+    assert small.stats["bytes"] == 150 and small.stats["evictions"] == 1
+    assert small.request_headers("http://h/saved") == {}
+
+
+def test_not_modified_refreshes_validators(tmp_path):
+    cache = HTTPCache(tmp_path)
+    cache.store("http://h/p", "body", {"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024"})
+    assert cache.not_modified("http://h/p", {"ETag": '"v2"'}) == "body"
+    assert cache.request_headers("http://h/p") == {
+        "If-None-Match": '"v2"', "If-Modified-Since": "Mon, 01 Jan 2024",
+    }
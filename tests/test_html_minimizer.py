@@ -0,0 +1,66 @@
+import io
+
+from bs4 import BeautifulSoup
+
+from utility_belt.web.html_minimizer import minimize_html, minimize_html_stream
+from utility_belt.web.minimal_html import build_minimal_html, clean_soup, minimal_html_from
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>Hi &amp; bye</title><style>p { color: red }</style></head>
+<body class="page">
+<header><h1>Site</h1></header>
+<div id="main"><p class="lead">Para &lt;one&gt; <span>two</span>
+<a href="/x" onclick="evil()">link</a></p><!-- note -->
+<script>if (a < b) { bad() }</script><form>field<div>more</div></form>
+<section><ul><li>a<li>b</ul><img src="a.png" alt='q"' width="3"></section></div>
+<p>tail<br>end</p><noscript>enable js</noscript>
+<footer>foot</footer>
+</body></html>
+<p>after body</p>"""
+
+
+def _text(html):
+    # prettify() re-flows whitespace, so compare with it removed.
+    return "".join(BeautifulSoup(html, "html.parser").get_text().split())
+
+
+def _soup_path(html):
+    return build_minimal_html(clean_soup(BeautifulSoup(html, "html.parser")))
+
+
+def test_same_retained_text_as_soup_path():
+    fragment = "<title>T</title><div><p>frag<form>gone</form> ment</p><iframe>x</iframe></div>"
+    for html in (
+        PAGE,
+        fragment,
+        "<body><p>only <em>body</em></body>",
+        "plain text",
+        "<title>T</title><body><p>in</p></body><p>after</p>",
+        "<body>a</body>x<body>y</body>z",
+        "<html><body>a<div><body>b</body>c</div></body>d</html>e",
+        "<div><body>a</body>b</div>c",
+    ):
+        assert _text(minimize_html(html)) == _text(_soup_path(html))
+
+
+def test_applies_allow_lists():
+    out = minimize_html(PAGE)
+    assert out.startswith("<!DOCTYPE html>\n<html><head><title>Hi &amp; bye</title>")
+    assert '<p>Para &lt;one&gt; two\n<a href="/x">link</a></p>' in out
+    assert '<img src="a.png" alt="q&quot;"/>' in out
+    for gone in ("class=", "id=", "width=", "<div", "<span", "bad()", "note", "foot", "after"):
+        assert gone not in out
+
+
+def test_streamed_chunks_match_whole_input_and_deep_nesting():
+    out = io.StringIO()
+    minimize_html_stream((PAGE[i:i + 7] for i in range(0, len(PAGE), 7)), out)
+    assert out.getvalue() == minimize_html(PAGE)
+
+    deep = "<body>" + "<div>" * 20000 + "<p>deep</p>" + "</div>" * 20000 + "</body>"
+    assert minimize_html(deep).endswith("<body><p>deep</p></body></html>\n")
+
+
+def test_minimal_html_from_engines():
+    assert minimal_html_from(PAGE, engine="stream") == minimize_html(PAGE)
+    assert _text(minimal_html_from(PAGE)) == _text(minimize_html(PAGE))
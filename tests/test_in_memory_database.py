@@ -0,0 +1,140 @@
+import random
+
+import pytest
+
+from utility_belt.storage.in_memory_database import InMemoryDatabase
+
+
+def test_look_back_matches_linear_reference_with_out_of_order_sets():
+    rng = random.Random(7)
+    db = InMemoryDatabase()
+    reference = {}  # field -> [(timestamp, write order, value)]
+    for i in range(2000):
+        field = rng.choice("abc")
+        ts = rng.randrange(0, 500)
+        db.set("k", field, str(i), ts)
+        reference.setdefault(field, []).append((ts, i, str(i)))
+
+    for field, versions in reference.items():
+        assert db.get("k", field, 10_000) == max(versions)[2]
+        for t in range(-1, 502, 3):
+            older = [v for v in versions if v[0] <= t]
+            assert db.look_back("k", field, t) == (max(older)[2] if older else "")
+    assert db.look_back("k", "missing", 100) == "" and db.look_back("nope", "a", 100) == ""
+
+
+def test_retention_by_versions_and_age():
+    db = InMemoryDatabase(max_versions=3)
+    for ts in range(10):
+        db.set("k", "f", f"v{ts}", ts)
+    history = db.data["k"]["f"]
+    assert list(history.times) == [7, 8, 9]
+    assert db.look_back("k", "f", 8) == "v8" and db.look_back("k", "f", 5) == ""
+
+    db = InMemoryDatabase(max_age=100)
+    for ts in (0, 50, 120, 130, 300):
+        db.set("k", "f", f"v{ts}", ts)
+    # Everything superseded before 300 - 100 goes; the version current at 200 stays.
+    assert list(db.data["k"]["f"].times) == [130, 300]
+    assert db.look_back("k", "f", 250) == "v130" and db.get("k", "f", 300) == "v300"
+
+
+def test_compare_and_set_and_delete():
+    db = InMemoryDatabase()
+    db.set("u", "age", "30", 1000)
+    assert db.compare_and_set("u", "age", "29", "31", 1100) == "false"
+    assert db.compare_and_set("u", "age", "30", "31", 1200) == "true"
+    assert db.look_back("u", "age", 1150) == "30" and db.get("u", "age", 1300) == "31"
+    assert db.compare_and_delete("u", "age", "31", 1400) == "true"
+    assert "u" not in db.data and db.get("u", "age", 1500) == ""
+
+
+def test_ttl_active_expiration():
+    db = InMemoryDatabase()
+    db.set_with_ttl("a", "f", "1", 100, ttl=50)
+    db.set_with_ttl("b", "f", "2", 100, ttl=200)
+    db.set("c", "f", "3", 100)
+    assert db.expire("c", 110, 20) == "true" and db.expire("zzz", 110, 20) == "false"
+    db.set_with_ttl("a", "f", "1b", 120, ttl=500)  # Renewed: the old heap entry is stale.
+
+    assert db.advance_to(149) == 1 and set(db.data) == {"a", "b"}  # c expired at 130
+    assert db.advance_to(300) == 1 and set(db.data) == {"a"}
+    assert db.get("a", "f", 619) == "1b" and db.get("a", "f", 620) == ""
+    assert db.advance_to(10_000) == 0 and not db.expiry_times
+
+
+def test_expired_key_after_delete_does_not_raise():
+    db = InMemoryDatabase()
+    db.set_with_ttl("k", "f", "v", 0, ttl=10)
+    assert db.compare_and_delete("k", "f", "v", 1) == "true"
+    assert db.get("k", "f", 20) == "" and db.set("k", "f", "w", 30) == ""
+    assert db.get("k", "f", 40) == "w"
+
+
+@pytest.mark.parametrize("sweep", [False, True])
+def test_reset_after_ttl_ran_out(sweep):
+    db = InMemoryDatabase()
+    db.set_with_ttl("k", "f", "v1", 100, ttl=10)
+    db.set("p", "f", "old", 100)
+    db.expire("p", 100, 10)
+    if sweep:
+        assert db.advance_to(200) == 2
+    db.set_with_ttl("k", "f", "v2", 200, ttl=50)
+    db.set("p", "f", "new", 200)
+
+    assert db.get("k", "f", 210) == "v2" and db.get("p", "f", 210) == "new"
+    assert db.expiry_times == {"k": 250} and set(db.data) == {"k", "p"}
+    assert db.look_back("k", "f", 150) == ""  # The expired record is gone.
+
+
+def test_ttl_heap_stays_compact_under_renewals():
+    db = InMemoryDatabase()
+    for ts in range(10_000):
+        db.set_with_ttl("hot", "f", str(ts), ts, ttl=100)
+    assert len(db._expiry_heap) < 200
+    assert db.advance_to(10_098) == 0 and db.advance_to(10_099) == 1
+
+
+def test_execute_batch_matches_one_by_one_calls():
+    rng = random.Random(3)
+    commands = []
+    for ts in range(5000):
+        key, field = f"k{rng.randrange(30)}", rng.choice("ab")
+        r = rng.random()
+        if r < 0.25:
+            commands.append(("SET", ts, key, field, str(ts)))
+        elif r < 0.3:
+            commands.append(("SET_WITH_TTL", ts, key, field, str(ts), rng.randrange(1, 40)))
+        elif r < 0.35:
+            commands.append(("COMPARE_AND_SET", ts, key, field, str(ts - 1), str(ts)))
+        elif r < 0.4:
+            commands.append(("COMPARE_AND_DELETE", ts, key, field, str(rng.randrange(ts + 1))))
+        elif r < 0.7:
+            commands.append(("GET", ts, key, field))
+        else:
+            commands.append(("LOOK_BACK", ts - rng.randrange(100), key, field))
+
+    one_by_one = InMemoryDatabase()
+    expected = []
+    for name, ts, key, field, *args in commands:
+        method = {
+            "SET": one_by_one.set, "GET": one_by_one.get, "LOOK_BACK": one_by_one.look_back,
+            "COMPARE_AND_SET": one_by_one.compare_and_set,
+            "COMPARE_AND_DELETE": one_by_one.compare_and_delete,
+        }.get(name)
+        if name == "SET_WITH_TTL":
+            expected.append(one_by_one.set_with_ttl(key, field, args[0], ts, args[1]))
+        else:
+            expected.append(method(key, field, *args, ts))
+
+    batched = InMemoryDatabase()
+    results = batched.execute_batch(iter(commands))
+    assert next(results) == expected[0]  # Lazy: results come out as commands go in.
+    assert [expected[0], *results] == expected
+
+
+def test_execute_batch_rejects_unknown_commands():
+    results = InMemoryDatabase().execute_batch([("SET", 1, "k", "f", "v"), ("DROP", 2, "k")])
+    assert next(results) == ""
+    with pytest.raises(ValueError):
+        next(results)
@@ -0,0 +1,66 @@
+import random
+
+from utility_belt.storage import key_index
+from utility_belt.storage.in_memory_database import InMemoryDatabase
+from utility_belt.storage.key_index import SortedKeyIndex
+from utility_belt.storage.persistence import DurableInMemoryDatabase
+
+
+def test_sorted_key_index_matches_sorted_set(monkeypatch):
+    monkeypatch.setattr(key_index, "BLOCK_SIZE", 4)  # Force many block splits and merges.
+    rng = random.Random(5)
+    index, reference = SortedKeyIndex(), set()
+    for _ in range(3000):
+        key = f"{rng.randrange(400):03d}"
+        if rng.random() < 0.6:
+            index.add(key)
+            reference.add(key)
+        else:
+            index.discard(key)
+            reference.discard(key)
+    ordered = sorted(reference)
+    assert list(index) == ordered and len(index) == len(ordered)
+    assert list(index.irange("100", "200")) == [k for k in ordered if "100" <= k < "200"]
+    assert list(index.irange("100", after="150")) == [k for k in ordered if k > "150"]
+    assert ("050" in index) == ("050" in reference) and "zzz" not in index
+
+
+def test_scans_follow_writes_deletes_and_expiry():
+    db = InMemoryDatabase()
+    for user in range(30):
+        for item in range(3):
+            db.set(f"user:{user:03d}:{item}", "f", "v", 0)
+    db.set("user:010:x", "f", "v", 0)
+    db.set_with_ttl("user:010:ttl", "f", "v", 0, ttl=100)
+    db.compare_and_delete("user:010:1", "f", "v", 1)
+
+    live = ["user:010:0", "user:010:2", "user:010:x"]
+    assert db.scan_prefix("user:010:", 50) == live[:2] + ["user:010:ttl"] + live[2:]
+    assert db.scan_prefix("user:010:", 100) == live
+    assert db.scan_range("user:028", "user:029", 0) == ["user:028:0", "user:028:1", "user:028:2"]
+    assert db.scan_range("user:029:1", None, 0, limit=5) == ["user:029:1", "user:029:2"]
+
+    db.advance_to(100)
+    assert "user:010:ttl" not in db.key_index
+
+    pages, cursor = [], None
+    while True:
+        page, cursor = db.scan_page(200, prefix="user:01", limit=7, cursor=cursor)
+        pages.append(page)
+        if cursor is None:
+            break
+    assert [k for p in pages for k in p] == db.scan_prefix("user:01", 200)
+    assert len(pages) == 5 and all(len(p) == 7 for p in pages[:-1])
+
+
+def test_scan_fields_and_restart_rebuilds_index(tmp_path):
+    with DurableInMemoryDatabase(tmp_path) as db:
+        for field in ("b", "a", "d", "c"):
+            db.set("k", field, field.upper(), 10)
+        db.set_with_ttl("gone", "f", "v", 0, ttl=5)
+        assert db.scan_fields("k", 10, "b", "d") == [("b", "B"), ("c", "C")]
+        assert db.scan_fields("gone", 5) == []
+        db.compact()
+    with DurableInMemoryDatabase(tmp_path) as db:
+        assert list(db.key_index) == ["gone", "k"]
+        assert db.scan_range(None, None, 5) == ["k"]
@@ -0,0 +1,235 @@
+import io
+
+from utility_belt.files.archive import MergedArchive
+from utility_belt.files.merge import copy_decoded, merge_files_to_text, safe_read_text
+
+
+def _make_tree(root):
+    (root / "pkg" / "sub").mkdir(parents=True)
+    (root / "node_modules").mkdir()
+    (root / "a.txt").write_text("alpha\n", encoding="utf-8")
+    (root / "b.md").write_text("# bravo\n", encoding="utf-8")
+    (root / "pkg" / "mod.py").write_text("print('hi')\n", encoding="utf-8")
+    (root / "pkg" / "sub" / "data.json").write_text('{"k": "ü"}', encoding="utf-8")
+    (root / "node_modules" / "dep.js").write_text("ignored()", encoding="utf-8")
+    (root / "image.png").write_bytes(b"\x89PNG\x00\x00")
+    for i in range(30):
+        (root / "pkg" / f"f{i:02d}.txt").write_text(f"file {i}\n" * (i + 1), encoding="utf-8")
+
+
+def _body(path):
+    # Drop the timestamp line so two runs can be compared byte for byte.
+    lines = path.read_bytes().split(b"\n")
+    return b"\n".join(line for line in lines if not line.startswith(b"# Timestamp:"))
+
+
+def test_merge_serial(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    _make_tree(src)
+    out = tmp_path / "out.txt"
+
+    summary = merge_files_to_text(src, out)
+
+    text = out.read_text(encoding="utf-8")
+    assert summary["written"] == 34
+    assert "===== FILE: a.txt | SIZE: 6 bytes =====\nalpha\n" in text
+    assert "ignored()" not in text
+    assert text.index("pkg/mod.py") < text.index("pkg/sub/data.json")
+
+
+def test_merge_parallel_matches_serial(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    _make_tree(src)
+    serial = tmp_path / "serial.txt"
+    parallel = tmp_path / "parallel.txt"
+
+    merge_files_to_text(src, serial)
+    summary = merge_files_to_text(src, parallel, workers=4, window=3)
+
+    assert summary["written"] == 34
+    assert _body(parallel) == _body(serial)
+
+
+def test_incremental_reuses_unchanged_segments(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    _make_tree(src)
+    out = tmp_path / "out.txt"
+
+    first = merge_files_to_text(src, out, incremental=True)
+    assert (first["manifest_hits"], first["manifest_misses"]) == (0, 34)
+
+    (src / "pkg" / "f03.txt").write_text("changed\n", encoding="utf-8")
+    (src / "new.txt").write_text("new\n", encoding="utf-8")
+    (src / "b.md").unlink()
+    second = merge_files_to_text(src, out, incremental=True, workers=3)
+    assert (second["manifest_hits"], second["manifest_misses"]) == (32, 2)
+
+    fresh = tmp_path / "fresh.txt"
+    merge_files_to_text(src, fresh)
+    assert _body(out) == _body(fresh)
+
+    third = merge_files_to_text(src, out, incremental=True)
+    assert (third["manifest_hits"], third["manifest_misses"]) == (34, 0)
+    assert _body(out) == _body(fresh)
+
+
+def test_incremental_rebuilds_when_output_edited(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    _make_tree(src)
+    out = tmp_path / "out.txt"
+    merge_files_to_text(src, out, incremental=True)
+
+    with open(out, "a", encoding="utf-8") as fh:
+        fh.write("tampered")
+    summary = merge_files_to_text(src, out, incremental=True)
+    assert summary["manifest_hits"] == 0
+    assert b"tampered" not in out.read_bytes()
+
+
+def test_copy_decoded_matches_text_mode_read(tmp_path):
+    samples = [
+        b"plain ascii\n" * 50,
+        "h\u00e9llo w\u00f6rld \U0001f600\n".encode("utf-8") * 40,
+        b"crlf\r\nlines\r\nand lone\rcr\r" * 30,
+        b"bad \xff\xfe bytes \xe2\x82 truncated\n" * 30,
+        "\ufeffbom first".encode("utf-8"),
+        b"ends mid char \xe2\x82",
+    ]
+    for i, data in enumerate(samples):
+        path = tmp_path / f"s{i}.txt"
+        path.write_bytes(data)
+        expected = path.read_text(encoding="utf-8", errors="replace")
+        for chunk_size in (1, 2, 3, 7, 64, 1 << 16):
+            with open(path, "rb") as src:
+                out = io.BytesIO()
+                n = copy_decoded(src, out, chunk_size=chunk_size)
+            assert out.getvalue().decode("utf-8") == expected
+            assert n == len(out.getvalue())
+
+
+def test_binary_and_oversized_files_are_skipped(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "ok.txt").write_text("fine", encoding="utf-8")
+    (src / "blob.txt").write_bytes(b"abc\x00def")
+    (src / "big.txt").write_text("x" * 100, encoding="utf-8")
+    out = tmp_path / "out.txt"
+
+    summary = merge_files_to_text(src, out, max_file_bytes=50)
+
+    assert (summary["written"], summary["skipped"]) == (1, 2)
+    text = out.read_text(encoding="utf-8")
+    assert "blob.txt" not in text and "big.txt" not in text
+    assert safe_read_text(src / "ok.txt") == "fine"
+
+
+def _dup_tree(root):
+    (root / "vendor").mkdir(parents=True)
+    payload = "shared = True\n" * 20
+    (root / "a.py").write_text(payload, encoding="utf-8")
+    (root / "b.py").write_text("unique\n", encoding="utf-8")
+    (root / "vendor" / "a_copy.py").write_text(payload, encoding="utf-8")
+    (root / "vendor" / "crlf_copy.py").write_bytes(payload.replace("\n", "\r\n").encode())
+
+
+def test_dedup_writes_back_references(tmp_path):
+    src = tmp_path / "src"
+    _dup_tree(src)
+    plain, deduped = tmp_path / "plain.txt", tmp_path / "dedup.txt"
+
+    merge_files_to_text(src, plain)
+    summary = merge_files_to_text(src, deduped, dedup=True, workers=2)
+
+    text = deduped.read_text(encoding="utf-8")
+    assert summary["duplicates"] == 2
+    assert text.count("shared = True") == 20
+    assert "FILE: vendor/a_copy.py | SIZE: 280 bytes | DUPLICATE OF: a.py =====" in text
+    saved = len(plain.read_bytes()) - len(deduped.read_bytes())
+    assert summary["dedup_bytes_saved"] == saved > 0
+
+
+def test_dedup_without_headers_and_in_index(tmp_path):
+    src = tmp_path / "src"
+    _dup_tree(src)
+
+    out = tmp_path / "m.txt"
+    merge_files_to_text(src, out, dedup=True, include_headers=False, include_eof_markers=False)
+    assert "\n===== DUPLICATE OF: a.py =====\n" in out.read_text(encoding="utf-8")
+
+    summary = merge_files_to_text(src, tmp_path / "s.txt", dedup=True, shard_bytes=100)
+    with MergedArchive(summary["index"]) as archive:
+        assert archive.read_text("vendor/a_copy.py") == archive.read_text("a.py")
+
+
+def test_dedup_incremental_repoints_when_first_copy_changes(tmp_path):
+    src = tmp_path / "src"
+    _dup_tree(src)
+    out = tmp_path / "out.txt"
+    merge_files_to_text(src, out, dedup=True, incremental=True)
+
+    (src / "a.py").write_text("now different\n", encoding="utf-8")
+    summary = merge_files_to_text(src, out, dedup=True, incremental=True)
+
+    # a.py changed and vendor/a_copy.py must now carry the content itself.
+    assert summary["manifest_misses"] == 2
+    fresh = tmp_path / "fresh.txt"
+    merge_files_to_text(src, fresh, dedup=True)
+    assert _body(out) == _body(fresh)
+    assert "DUPLICATE OF: vendor/a_copy.py" in out.read_text(encoding="utf-8")
+
+
+def test_dedup_keeps_content_when_back_reference_is_longer(tmp_path):
+    src = tmp_path / "src"
+    for i in range(50):
+        (src / f"package_{i:02d}").mkdir(parents=True)
+        (src / f"package_{i:02d}" / "__init__.py").write_text("", encoding="utf-8")
+    (src / "a.py").write_text("shared = True\n" * 20, encoding="utf-8")
+    (src / "b.py").write_text("shared = True\n" * 20, encoding="utf-8")
+    plain, deduped = tmp_path / "plain.txt", tmp_path / "dedup.txt"
+
+    merge_files_to_text(src, plain)
+    summary = merge_files_to_text(src, deduped, dedup=True, incremental=True)
+
+    assert summary["duplicates"] == 1
+    saved = len(plain.read_bytes()) - len(deduped.read_bytes())
+    assert summary["dedup_bytes_saved"] == saved > 0
+    assert "DUPLICATE OF: package_00/__init__.py" not in deduped.read_text(encoding="utf-8")
+
+    summary = merge_files_to_text(src, deduped, dedup=True, incremental=True)
+    assert summary["manifest_hits"] == 52
+    fresh = tmp_path / "fresh.txt"
+    merge_files_to_text(src, fresh, dedup=True)
+    assert _body(deduped) == _body(fresh)
+
+
+def test_dedup_incremental_reads_copy_whose_back_reference_grew(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "b.py").write_text("x = 1\n" * 8, encoding="utf-8")
+    (src / "c.py").write_text("x = 1\n" * 8, encoding="utf-8")
+    out = tmp_path / "out.txt"
+    merge_files_to_text(src, out, dedup=True, incremental=True)
+    assert "DUPLICATE OF: b.py" in out.read_text(encoding="utf-8")
+
+    (src / "b.py").rename(src / ("a" * 80 + ".py"))
+    summary = merge_files_to_text(src, out, dedup=True, incremental=True)
+
+    assert summary["duplicates"] == 0
+    assert summary["dedup_bytes_saved"] == 0
+    fresh = tmp_path / "fresh.txt"
+    merge_files_to_text(src, fresh, dedup=True)
+    assert _body(out) == _body(fresh)
+
+
+def test_merge_accepts_str_paths(tmp_path, monkeypatch):
+    _make_tree(tmp_path / "src")
+    monkeypatch.chdir(tmp_path / "src")
+
+    summary = merge_files_to_text(".", str(tmp_path / "out" / "merged.txt"))
+
+    assert summary["written"] > 0
+    assert "FILE: a.txt" in (tmp_path / "out" / "merged.txt").read_text(encoding="utf-8")
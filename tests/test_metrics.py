@@ -0,0 +1,105 @@
+import io
+import json
+import pstats
+import sys
+import threading
+
+from utility_belt import metrics
+from utility_belt.cli import merge_files_to_text as merge_cli
+from utility_belt.files.merge import merge_files_to_text
+from utility_belt.text.remove_emojis import clean_stream
+
+
+def test_disabled_calls_record_nothing():
+    assert not metrics.enabled()
+    with metrics.span("x") as span:
+        assert span is None
+    metrics.count("x")
+    metrics.observe("x", 1.0)
+    assert metrics.timed("x", len) is len
+    with metrics.recording() as rec:
+        pass
+    assert metrics.timed("x", len) is len
+    assert rec.report()["spans"] == {} and rec.report()["counters"] == {}
+
+
+def test_spans_counters_and_histograms_from_threads():
+    def work():
+        for i in range(100):
+            with metrics.span("phase"):
+                metrics.count("phase.bytes", 10)
+                metrics.observe("sizes", i)
+
+    with metrics.recording() as rec:
+        assert metrics.timed("call", len)("abc") == 3
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    report = rec.report()
+    assert report["spans"]["phase"]["calls"] == 400
+    assert report["spans"]["call"]["calls"] == 1
+    assert report["spans"]["phase"]["mb_per_s"] > 0
+    assert report["counters"]["phase.bytes"] == 4000
+    sizes = report["histograms"]["sizes"]
+    assert (sizes["count"], sizes["min"], sizes["p50"], sizes["max"]) == (400, 0, 50, 99)
+    assert not metrics.enabled()
+
+
+def test_recording_nests_and_restores():
+    with metrics.recording() as outer:
+        with metrics.recording() as inner:
+            metrics.count("n")
+        metrics.count("n", 2)
+    assert inner.counters == {"n": 1} and outer.counters == {"n": 2}
+
+
+def test_merge_reports_its_phases(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    for i in range(20):
+        (src / f"f{i}.txt").write_text("line\n" * (i + 1), encoding="utf-8")
+    (src / "bin.txt").write_bytes(b"\x00\x01")
+
+    with metrics.recording() as rec:
+        summary = merge_files_to_text(src, tmp_path / "out.txt", workers=4, incremental=True)
+        merge_files_to_text(src, tmp_path / "out.txt", incremental=True)
+    report = rec.report()
+    spans = report["spans"]
+    for phase in ("merge.discover", "merge.read", "merge.decode", "merge.write",
+                  "merge.replay", "merge.copy", "merge.manifest"):
+        assert spans[phase]["calls"] > 0, phase
+    counters = report["counters"]
+    assert counters["merge.files"] == 2 * summary["written"]
+    assert counters["merge.skipped"] == 2  # The binary file, once per run.
+    assert counters["merge.manifest_hits"] == summary["written"]
+    assert report["histograms"]["merge.file_bytes"]["count"] >= 21
+
+
+def test_clean_stream_counts_characters():
+    with metrics.recording() as rec:
+        clean_stream(io.StringIO("ok ✅ done"), io.StringIO())
+    assert rec.counters["text.chars_read"] == 9
+    assert rec.counters["text.chars_removed"] == 1
+    assert rec.spans["text.clean"][0] >= 1
+
+
+def test_merge_cli_writes_profile_and_cprofile(tmp_path, monkeypatch, capsys):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.txt").write_text("alpha\n", encoding="utf-8")
+    profile, stats = tmp_path / "profile.json", tmp_path / "run.prof"
+    monkeypatch.setattr(sys, "argv", [
+        "ub-merge-files", "-i", str(src), "-o", str(tmp_path / "out.txt"),
+        "--profile", str(profile), "--cprofile", str(stats),
+    ])
+    merge_cli.main()
+
+    report = json.loads(profile.read_text(encoding="utf-8"))
+    assert report["counters"]["merge.files"] == 1
+    assert "merge.decode" in report["spans"] and report["wall_seconds"] > 0
+    assert report["cprofile"] == str(stats)
+    assert pstats.Stats(str(stats)).total_calls > 0
+    assert "Profile:" in capsys.readouterr().out
+    assert not metrics.enabled()
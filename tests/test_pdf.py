@@ -0,0 +1,76 @@
+import re
+
+from utility_belt import metrics
+from utility_belt.pdf.write_string_report_to_pdf import (
+    generate_pdf_from_report,
+    generate_pdfs,
+    tokenize_line,
+)
+
+REPORT = """Intro line
+continues
+
+## 1: Findings
+1. first
+2. second
+
+### Details
+Closing paragraph.
+"""
+
+
+def _three_regexes(line):
+    # The per-line classification the combined tokenizer replaced.
+    for kind, pattern in (("section", r'##\s*\d+:\s*(.+)'), ("sub", r'###\s*(.+)'),
+                          ("item", r'\d+\.\s+(.+)')):
+        m = re.match(pattern, line)
+        if m:
+            return kind, m.group(1)
+    return ("blank", None) if not line.strip() else ("text", line)
+
+
+def test_tokenizer_matches_separate_patterns():
+    lines = ["## 1: A", "##12:B", "## x: no", "### Sub", "###", "####  deep", "###1: s",
+             "1. one", "10.  ten ", "1.   ", "1.x", "  ", "", "plain", " ## 1: indented"]
+    for line in lines:
+        assert tokenize_line(line) == _three_regexes(line), line
+
+
+def test_generate_pdfs_reports_failures_per_job(tmp_path):
+    jobs = [(REPORT * (i + 1), tmp_path / f"r{i}.pdf") for i in range(6)]
+    jobs.insert(2, (REPORT, tmp_path / "missing" / "dir" / "x.pdf"))
+
+    results = list(generate_pdfs(iter(jobs), workers=2))
+
+    assert [r.path for r in results] == [str(p) for _, p in jobs]
+    assert [r.ok for r in results] == [True, True, False, True, True, True, True]
+    for _, path in jobs[:2] + jobs[3:]:
+        assert path.read_bytes().startswith(b"%PDF")
+    assert list(generate_pdfs([(REPORT, tmp_path / "s.pdf")]))[0].ok
+
+
+def test_streaming_matches_string_build(tmp_path, monkeypatch):
+    from reportlab import rl_config
+
+    from utility_belt.pdf import write_string_report_to_pdf as pdf
+
+    monkeypatch.setattr(rl_config, "invariant", 1)
+    monkeypatch.setattr(pdf, "FLOWABLE_WINDOW", 4)
+    text = REPORT * 40
+    source = tmp_path / "report.txt"
+    source.write_text(text, encoding="utf-8")
+
+    pdf.generate_pdf_from_report(text, tmp_path / "whole.pdf")
+    pdf.generate_pdf_streaming(source, tmp_path / "file.pdf")
+    pdf.generate_pdf_streaming(iter(text.splitlines(keepends=True)), tmp_path / "lines.pdf")
+
+    whole = (tmp_path / "whole.pdf").read_bytes()
+    assert (tmp_path / "file.pdf").read_bytes() == whole
+    assert (tmp_path / "lines.pdf").read_bytes() == whole
+
+
+def test_tokenize_and_build_are_timed_separately(tmp_path):
+    with metrics.recording() as rec:
+        generate_pdf_from_report(REPORT, tmp_path / "r.pdf")
+    assert rec.spans["pdf.tokenize"][0] == rec.spans["pdf.build"][0] == 1
+    assert rec.counters["pdf.reports"] == 1 and rec.counters["pdf.flowables"] > 0
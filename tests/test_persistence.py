@@ -0,0 +1,105 @@
+import random
+import subprocess
+import sys
+
+import pytest
+
+from utility_belt.storage.in_memory_database import InMemoryDatabase
+from utility_belt.storage.persistence import DurableInMemoryDatabase, log_name
+
+
+def _state(db):
+    data = {
+        key: {field: (list(h.times), list(h.values)) for field, h in fields.items()}
+        for key, fields in db.data.items()
+    }
+    return data, dict(db.expiry_times)
+
+
+def _random_ops(db, rng, n, start=0):
+    for ts in range(start, start + n):
+        key, field = f"k{rng.randrange(40)}", rng.choice("abc")
+        r = rng.random()
+        if r < 0.5:
+            db.set(key, field, f"v{ts}", ts - rng.randrange(5))
+        elif r < 0.65:
+            db.set_with_ttl(key, field, f"t{ts}", ts, rng.randrange(1, 50))
+        elif r < 0.75:
+            db.compare_and_set(key, field, db.get(key, field, ts), f"c{ts}", ts)
+        elif r < 0.85:
+            db.compare_and_delete(key, field, db.get(key, field, ts), ts)
+        elif r < 0.9:
+            db.expire(key, ts, rng.randrange(1, 50))
+        elif r < 0.95:
+            db.advance_to(ts)
+        else:
+            db.get(key, field, ts)
+
+
+def test_restart_restores_state_across_compactions(tmp_path):
+    reference = InMemoryDatabase(max_versions=5)
+    db = DurableInMemoryDatabase(tmp_path, max_versions=5, group_size=16, compact_bytes=4096)
+    _random_ops(reference, random.Random(1), 3000)
+    _random_ops(db, random.Random(1), 3000)
+    assert db.stats["compactions"] > 2
+    assert db.stats["syncs"] < 3000 / 4
+    db.close()
+
+    db = DurableInMemoryDatabase(tmp_path, max_versions=5, compact_bytes=4096)
+    assert _state(db) == _state(reference)
+    assert 0 < db.replayed < 3000
+    assert sorted(p.name for p in tmp_path.iterdir()) == [log_name(db.generation), "snapshot.bin"]
+
+    # Keeps working after the restart, including expirations.
+    _random_ops(reference, random.Random(2), 500, start=3000)
+    _random_ops(db, random.Random(2), 500, start=3000)
+    db.close()
+    with DurableInMemoryDatabase(tmp_path, max_versions=5) as db:
+        assert _state(db) == _state(reference)
+
+
+def test_torn_log_tail_is_truncated(tmp_path):
+    with DurableInMemoryDatabase(tmp_path) as db:
+        db.set("user1", "age", "30", 1000)
+        db.set_with_ttl("session", "token", "abc", 1000, ttl=60)
+    log = tmp_path / log_name(0)
+    good = log.stat().st_size
+    with open(log, "ab") as fh:
+        fh.write(b"\x40\x00\x00\x00garbage")
+
+    with DurableInMemoryDatabase(tmp_path) as db:
+        assert log.stat().st_size == good
+        assert db.get("user1", "age", 1001) == "30" and db.expiry_times == {"session": 1060}
+        db.set("user1", "age", "31", 1100)
+    with DurableInMemoryDatabase(tmp_path) as db:
+        assert db.look_back("user1", "age", 1050) == "30" and db.get("user1", "age", 1200) == "31"
+        assert db.advance_to(1060) == 1
+    with DurableInMemoryDatabase(tmp_path) as db:
+        assert "session" not in db.data
+
+
+def test_unencodable_value_changes_nothing(tmp_path):
+    with DurableInMemoryDatabase(tmp_path) as db:
+        db.set("user1", "age", "30", 1000)
+        with pytest.raises(TypeError):
+            db.set("user1", "age", object(), 1001)
+        assert db.get("user1", "age", 1002) == "30"
+        before = _state(db)
+    with DurableInMemoryDatabase(tmp_path) as db:
+        assert _state(db) == before
+
+
+def test_idle_write_reaches_disk_without_another_write(tmp_path):
+    # One write, then the process dies without close() (no more appends).
+    script = (
+        "import os, sys, time\n"
+        "from utility_belt.storage.persistence import DurableInMemoryDatabase\n"
+        "db = DurableInMemoryDatabase(sys.argv[1], group_interval=0.05)\n"
+        "db.set('user1', 'age', '30', 1000)\n"
+        "time.sleep(0.5)\n"
+        "os._exit(0)\n"
+    )
+    subprocess.run([sys.executable, "-c", script, str(tmp_path)], check=True)
+
+    with DurableInMemoryDatabase(tmp_path) as db:
+        assert db.get("user1", "age", 1001) == "30"
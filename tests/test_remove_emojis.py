@@ -0,0 +1,70 @@
+import io
+import sys
+
+from utility_belt.cli.clean_text import main
+from utility_belt.text.remove_emojis import (
+    _remove_per_char,
+    clean_file,
+    iter_safe_chunks,
+    remove_emojis_and_uncommon_symbols,
+)
+
+
+def test_matches_per_char_reference_on_every_codepoint():
+    # Every codepoint except lone surrogates, in blocks so runs of removals are exercised.
+    chars = [chr(cp) for cp in range(sys.maxunicode + 1) if not 0xD800 <= cp <= 0xDFFF]
+    for i in range(0, len(chars), 4096):
+        block = "".join(chars[i:i + 4096])
+        assert remove_emojis_and_uncommon_symbols(block) == _remove_per_char(block)
+
+
+def test_examples():
+    cleaned = remove_emojis_and_uncommon_symbols("Ship it \U0001F680✅ $5 + tax!")
+    assert cleaned == "Ship it  $5 + tax!"
+    assert remove_emojis_and_uncommon_symbols("© café → ok") == " café  ok"
+    ascii_text = "plain <ascii> text ^_^ ~"
+    assert remove_emojis_and_uncommon_symbols(ascii_text) is ascii_text
+
+
+def test_safe_chunks_keep_emoji_sequences_whole():
+    family = "\U0001F468‍\U0001F469‍\U0001F467"
+    text = ("ab" + family + "❤️" + "é" + "\U0001F44D\U0001F3FD") * 50
+    for size in (1, 2, 3, 5, 8):
+        chunks = list(iter_safe_chunks(io.StringIO(text), size))
+        assert "".join(chunks) == text
+        for chunk in chunks[:-1]:
+            assert chunk[-1] != "‍"
+            assert not chunk.endswith("\U0001F468")  # never split before a ZWJ
+        for chunk in chunks[1:]:
+            assert chunk[0] not in "‍️́\U0001F3FD"
+
+
+def test_clean_text_cli_directory_and_workers(tmp_path, monkeypatch, capsys):
+    src = tmp_path / "docs"
+    (src / "nested").mkdir(parents=True)
+    for i in range(6):
+        text = f"row {i} ✅\r\nnext \U0001F680\n"
+        (src / "nested" / f"{i}.txt").write_text(text, encoding="utf-8", newline="")
+    (src / "skip.bin").write_bytes(b"\xff")
+    out = tmp_path / "clean"
+
+    monkeypatch.setattr(sys, "argv", ["ub-clean-text", str(src), "-o", str(out), "-j", "2"])
+    main()
+
+    assert "Cleaned: 6 files, 12 characters removed" in capsys.readouterr().out
+    cleaned = (out / "nested" / "3.txt").read_bytes()
+    assert cleaned == "row 3 \r\nnext \n".encode()
+    assert not (out / "skip.bin").exists()
+
+
+def test_clean_file_is_atomic_on_error(tmp_path):
+    bad = tmp_path / "bad.txt"
+    bad.write_bytes(b"ok \xff broken")
+    target = tmp_path / "out.txt"
+    target.write_text("previous", encoding="utf-8")
+    try:
+        clean_file(bad, target)
+    except UnicodeDecodeError:
+        pass
+    assert target.read_text(encoding="utf-8") == "previous"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["bad.txt", "out.txt"]
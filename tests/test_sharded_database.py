@@ -0,0 +1,77 @@
+import sys
+import threading
+
+import pytest
+
+from utility_belt.storage.sharded_database import ShardedInMemoryDatabase
+
+
+@pytest.fixture
+def fast_switching():
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def _run_threads(n, target):
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def test_compare_and_set_counters_lose_no_updates(fast_switching):
+    db = ShardedInMemoryDatabase(shards=4)
+    keys = [f"counter{i}" for i in range(3)]
+    for key in keys:
+        db.set(key, "n", "0", 0)
+    per_thread = 300
+
+    def worker(t):
+        for i in range(per_thread):
+            key = keys[(t + i) % len(keys)]
+            while True:
+                current = db.get(key, "n", 1)
+                if db.compare_and_set(key, "n", current, str(int(current) + 1), 1) == "true":
+                    break
+
+    _run_threads(8, worker)
+    assert sum(int(db.get(k, "n", 2)) for k in keys) == 8 * per_thread
+
+
+def test_batches_are_atomic_across_shards(fast_switching):
+    db = ShardedInMemoryDatabase(shards=8)
+    accounts = [f"acct{i}" for i in range(10)]
+    for a in accounts:
+        db.set(a, "balance", "100", 0)
+    torn = []
+
+    def writer(t):
+        for i in range(300):
+            # Shift one unit between two accounts, rewriting all of them at once.
+            balances = [int(b) for b in db.batch([("get", a, "balance", 1) for a in accounts])]
+            balances[(t + i) % 10] -= 1
+            balances[(t + 2 * i + 1) % 10] += 1
+            db.batch([("set", a, "balance", str(b), 1) for a, b in zip(accounts, balances)])
+
+    def reader(t):
+        for _ in range(300):
+            total = sum(int(b) for b in db.batch([("get", a, "balance", 1) for a in accounts]))
+            if total != 1000:
+                torn.append(total)
+
+    _run_threads(6, lambda t: (writer if t % 2 else reader)(t))
+    assert not torn
+    assert sum(int(db.get(a, "balance", 2)) for a in accounts) == 1000
+
+
+def test_batch_rejects_unknown_operations_and_ttl_sweeps_all_shards():
+    db = ShardedInMemoryDatabase(shards=3)
+    with pytest.raises(ValueError):
+        db.batch([("set", "k", "f", "v", 1), ("drop_table", "k")])
+    assert db.get("k", "f", 1) == ""
+    for i in range(30):
+        db.set_with_ttl(f"k{i}", "f", "v", 0, ttl=10)
+    assert db.advance_to(10) == 30
@@ -0,0 +1,84 @@
+import subprocess
+import sys
+import time
+
+import utility_belt
+
+HEAVY_MODULES = ("reportlab", "bs4", "requests")
+
+# Generous: a cold interpreter is ~20-50 ms; importing reportlab alone blows it.
+STARTUP_BUDGET = 2.0
+
+
+def run_python(code: str, cwd=None) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=cwd
+    )
+
+
+def loaded_heavy(code: str) -> list[str]:
+    report = f"import sys; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    out = run_python(f"{code}\n{report}").stdout
+    return [m for m in out.splitlines()[-1].split(",") if m]
+
+
+def test_import_package_and_merge_cli_skip_heavy_dependencies():
+    assert loaded_heavy("import utility_belt") == []
+    assert loaded_heavy("import utility_belt.cli.merge_files_to_text") == []
+    assert loaded_heavy("import utility_belt.cli.clean_text") == []
+    assert loaded_heavy("import utility_belt.storage.persistence") == []
+
+
+def test_lazy_attributes_load_their_module_on_first_access():
+    code = (
+        "import sys, utility_belt\n"
+        "assert 'utility_belt.storage.in_memory_database' not in sys.modules\n"
+        "db = utility_belt.InMemoryDatabase()\n"
+        "assert 'utility_belt.storage.in_memory_database' in sys.modules\n"
+        "assert utility_belt.storage.in_memory_database.InMemoryDatabase is type(db)\n"
+    )
+    run_python(code)
+    assert "merge_files_to_text" in dir(utility_belt)
+    assert utility_belt.remove_emojis_and_uncommon_symbols("ok ✅") == "ok "
+
+
+def test_unknown_attribute_raises_attribute_error():
+    try:
+        utility_belt.no_such_helper
+    except AttributeError as e:
+        assert "no_such_helper" in str(e)
+    else:
+        raise AssertionError("expected AttributeError")
+
+
+def test_imports_have_no_side_effects(tmp_path):
+    result = run_python(
+        "import utility_belt.files.create_files, utility_belt.files.create_repo\n"
+        "import utility_belt.storage.in_memory_database\n"
+        "import utility_belt.pdf.write_string_report_to_pdf\n",
+        cwd=tmp_path,
+    )
+    assert result.stdout == ""
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_create_files_main_creates_the_default_files(tmp_path, capsys):
+    from utility_belt.files.create_files import DEFAULT_FILENAMES, main
+
+    assert main([str(tmp_path)]) == 0
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(DEFAULT_FILENAMES)
+    assert "Script finished." in capsys.readouterr().out
+
+
+def test_merge_cli_help_is_fast():
+    code = (
+        "import sys; sys.argv = ['ub-merge-files', '--help']\n"
+        "from utility_belt.cli.merge_files_to_text import main\n"
+        "main()"
+    )
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    assert result.returncode == 0
+    assert "--input-dir" in result.stdout
+    assert elapsed < STARTUP_BUDGET